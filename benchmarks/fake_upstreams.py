@@ -0,0 +1,263 @@
+"""Local stand-ins for the OpenRouteService, Nominatim and Cohere HTTP APIs
+
+One threaded HTTP server answers all three APIs with deterministic,
+synthetic responses after a configurable latency, so the real client
+libraries, connection pools and caches are exercised without network
+access or API quotas. Run it on its own and point the app at it:
+
+    python -m benchmarks.fake_upstreams --port 8765 --latency-ms 80
+    ORS_BASE_URL=http://127.0.0.1:8765 NOMINATIM_URL=http://127.0.0.1:8765 \\
+        COHERE_BASE_URL=http://127.0.0.1:8765 streamlit run chatbot.py
+"""
+
+import argparse
+import json
+import math
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Tuple, List, Dict
+from urllib.parse import parse_qs, urlsplit
+
+
+def place_coords(query: str) -> Tuple[float, float]:
+    """Stable pseudo-random coordinates for a place name, within India"""
+    h = zlib.crc32(query.strip().casefold().encode())
+    return 8.0 + (h % 10000) / 10000 * 27.0, 68.0 + (h // 10000 % 10000) / 10000 * 29.0
+
+
+def make_route(coordinates: List[List[float]], points_per_leg: int, steps_per_leg: int,
+               alternatives: int = 1, elevation: bool = False, extra_info: List[str] = ()) -> Dict:
+    """A GeoJSON directions response through the given [lon, lat] points"""
+    features = []
+    for alternative in range(alternatives):
+        line, segments = [], []
+        for (lon1, lat1), (lon2, lat2) in zip(coordinates, coordinates[1:]):
+            km = math.hypot(lat2 - lat1, (lon2 - lon1) * math.cos(math.radians(lat1))) * 111.0
+            start = max(len(line) - 1, 0)
+            # A gently winding line; alternatives bend the other way and are longer
+            bend = 0.02 * (1 + alternative) * (-1) ** alternative
+            for k in range(points_per_leg + 1):
+                if line and k == 0:
+                    continue
+                t = k / points_per_leg
+                wiggle = bend * math.sin(math.pi * t) + 0.0005 * math.sin(40 * math.pi * t)
+                line.append([lon1 + (lon2 - lon1) * t + wiggle, lat1 + (lat2 - lat1) * t])
+            leg_m = km * 1000 * (1 + 0.15 * alternative)
+            steps = []
+            for s in range(steps_per_leg):
+                first = start + points_per_leg * s // steps_per_leg
+                last = start + points_per_leg * (s + 1) // steps_per_leg
+                steps.append({
+                    "distance": leg_m / steps_per_leg,
+                    "duration": leg_m / steps_per_leg / 13.9,
+                    "type": 11 if s == 0 else 1,
+                    "instruction": "Head north" if s == 0 else f"Turn {'left' if s % 2 else 'right'} onto Road {s}",
+                    "name": f"Road {s}",
+                    "way_points": [first, last]
+                })
+            segments.append({"distance": leg_m, "duration": leg_m / 13.9, "steps": steps})
+        
+        properties = {}
+        if elevation:
+            # Rolling hills, steeper on each alternative
+            for k, point in enumerate(line):
+                point.append(round(500 + (100 + 80 * alternative) * math.sin(k / 50), 1))
+            rises = [max(b[2] - a[2], 0) for a, b in zip(line, line[1:])]
+            properties.update(ascent=sum(rises), descent=sum(max(a[2] - b[2], 0) for a, b in zip(line, line[1:])))
+        extras = {}
+        n = len(line) - 1
+        if "tollways" in extra_info:
+            # The main route has a tolled middle stretch; alternatives have less
+            toll_start, toll_end = n * 3 // 10, n * (7 - 2 * alternative) // 10
+            extras["tollways"] = {"values": [[0, toll_start, 0], [toll_start, max(toll_end, toll_start), 1],
+                                             [max(toll_end, toll_start), n, 0]]}
+        if "waycategory" in extra_info:
+            highway_end = n // (2 + alternative)
+            extras["waycategory"] = {"values": [[0, highway_end, 1], [highway_end, n, 0]]}
+        if extras:
+            properties["extras"] = extras
+        
+        features.append({
+            "type": "Feature",
+            "bbox": [min(p[0] for p in line), min(p[1] for p in line),
+                     max(p[0] for p in line), max(p[1] for p in line)],
+            "geometry": {"type": "LineString", "coordinates": line},
+            "properties": {
+                **properties,
+                "segments": segments,
+                "summary": {
+                    "distance": sum(s["distance"] for s in segments),
+                    "duration": sum(s["duration"] for s in segments)
+                },
+                "way_points": [0, len(line) - 1]
+            }
+        })
+    return {"type": "FeatureCollection", "features": features}
+
+
+def make_isochrones(locations: List[List[float]], ranges: List[float], vertices: int = 400) -> Dict:
+    """A GeoJSON isochrones response: one wobbly ring per location and range, smallest first"""
+    features = []
+    for group, (lon, lat) in enumerate(locations):
+        for value in sorted(ranges):
+            # Roughly 50 km/h, with an irregular outline like a real road network
+            radius_km = value / 3600 * 50
+            angles = [2 * math.pi * k / vertices for k in range(vertices)]
+            ring = []
+            for angle in angles:
+                r = radius_km * (1 + 0.2 * math.sin(5 * angle) + 0.05 * math.sin(37 * angle))
+                ring.append([lon + r / (111.0 * math.cos(math.radians(lat))) * math.cos(angle),
+                             lat + r / 111.0 * math.sin(angle)])
+            ring.append(ring[0])
+            features.append({
+                "type": "Feature",
+                "geometry": {"type": "Polygon", "coordinates": [ring]},
+                "properties": {"group_index": group, "value": value, "center": [lon, lat],
+                               "area": math.pi * radius_km ** 2 * 1e6}
+            })
+    return {"type": "FeatureCollection", "features": features}
+
+
+class FakeUpstreams:
+    """Threaded HTTP server emulating the ORS, Nominatim and Cohere endpoints the app uses"""
+    
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, latency_ms: float = 0,
+                 points_per_leg: int = 500, steps_per_leg: int = 20):
+        self.latency = latency_ms / 1000
+        self.points_per_leg = points_per_leg
+        self.steps_per_leg = steps_per_leg
+        self.requests: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        upstreams = self
+        
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            
+            def log_message(self, *args):
+                pass
+            
+            def do_GET(self):
+                upstreams.handle(self, "GET")
+            
+            def do_POST(self):
+                upstreams.handle(self, "POST")
+        
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self.server.daemon_threads = True
+        self._thread = None
+    
+    @property
+    def url(self) -> str:
+        """Base URL to configure the clients with"""
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+    
+    def start(self) -> "FakeUpstreams":
+        """Serve in a background thread"""
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+    
+    def stop(self):
+        """Shut the server down"""
+        self.server.shutdown()
+        self.server.server_close()
+    
+    def count(self, endpoint: str):
+        """Count a request per emulated endpoint"""
+        with self._lock:
+            self.requests[endpoint] = self.requests.get(endpoint, 0) + 1
+    
+    def handle(self, request: BaseHTTPRequestHandler, method: str):
+        """Route a request to the matching API emulation"""
+        url = urlsplit(request.path)
+        length = int(request.headers.get("Content-Length") or 0)
+        body = json.loads(request.rfile.read(length) or b"{}") if method == "POST" else {}
+        time.sleep(self.latency)
+        
+        if url.path.startswith("/v2/directions/"):
+            self.count("directions")
+            alternatives = body.get("alternative_routes", {}).get("target_count", 1)
+            route = make_route(body["coordinates"], self.points_per_leg, self.steps_per_leg, alternatives,
+                               body.get("elevation", False), body.get("extra_info", []))
+            self.send_json(request, route)
+        elif url.path.startswith("/v2/isochrones/"):
+            self.count("isochrones")
+            self.send_json(request, make_isochrones(body["locations"], body["range"]))
+        elif url.path.startswith("/v2/matrix/"):
+            self.count("matrix")
+            locations = body["locations"]
+            durations = [[math.hypot(a[0] - b[0], a[1] - b[1]) * 8000 for b in locations] for a in locations]
+            self.send_json(request, {"durations": durations})
+        elif url.path == "/search":
+            self.count("nominatim")
+            query = parse_qs(url.query).get("q", [""])[0]
+            if "nowhere" in query.casefold():
+                self.send_json(request, [])
+            else:
+                lat, lon = place_coords(query)
+                self.send_json(request, [{"lat": str(lat), "lon": str(lon), "display_name": query,
+                                          "place_id": zlib.crc32(query.encode())}])
+        elif url.path == "/v1/chat":
+            self.count("cohere")
+            self.send_chat(request, body)
+        else:
+            self.send_json(request, {"error": f"Unknown endpoint {url.path}"}, status=404)
+    
+    def send_json(self, request: BaseHTTPRequestHandler, data, status: int = 200):
+        """Write a JSON response"""
+        payload = json.dumps(data).encode()
+        request.send_response(status)
+        request.send_header("Content-Type", "application/json")
+        request.send_header("Content-Length", str(len(payload)))
+        request.end_headers()
+        request.wfile.write(payload)
+    
+    def send_chat(self, request: BaseHTTPRequestHandler, body: Dict):
+        """Answer with a canned travel tip, streamed word by word if asked"""
+        question = body.get("message", "").strip().splitlines()[0][:80] if body.get("message") else ""
+        text = (f"Here are some suggestions about '{question}': travel early to avoid traffic, "
+                "carry water, check the weather before you leave and keep some cash for tolls.")
+        response = {"text": text, "generation_id": "fake", "finish_reason": "COMPLETE", "chat_history": []}
+        if not body.get("stream"):
+            self.send_json(request, response)
+            return
+        
+        events = [{"event_type": "stream-start", "generation_id": "fake", "is_finished": False}]
+        events += [{"event_type": "text-generation", "text": word + " ", "is_finished": False}
+                   for word in text.split(" ")]
+        events.append({"event_type": "stream-end", "finish_reason": "COMPLETE",
+                       "response": response, "is_finished": True})
+        request.send_response(200)
+        request.send_header("Content-Type", "application/stream+json")
+        request.send_header("Transfer-Encoding", "chunked")
+        request.end_headers()
+        for event in events:
+            line = json.dumps(event).encode() + b"\n"
+            request.wfile.write(f"{len(line):x}\r\n".encode() + line + b"\r\n")
+        request.wfile.write(b"0\r\n\r\n")
+
+
+def main():
+    """Serve the fake upstream APIs until interrupted"""
+    parser = argparse.ArgumentParser(description="Fake ORS, Nominatim and Cohere servers")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency-ms", type=float, default=50)
+    parser.add_argument("--points-per-leg", type=int, default=500)
+    parser.add_argument("--steps-per-leg", type=int, default=20)
+    args = parser.parse_args()
+    
+    upstreams = FakeUpstreams(args.host, args.port, args.latency_ms,
+                              args.points_per_leg, args.steps_per_leg)
+    print(f"Fake upstreams listening on {upstreams.url}")
+    try:
+        upstreams.server.serve_forever()
+    except KeyboardInterrupt:
+        upstreams.server.server_close()
+
+
+if __name__ == "__main__":
+    main()
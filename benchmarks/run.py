@@ -0,0 +1,384 @@
+"""Reproducible benchmarks for the travel core and the Streamlit app
+
+Upstream APIs are replaced by ``benchmarks.fake_upstreams``, so results
+depend only on this code and the machine. Two modes:
+
+    python -m benchmarks.run micro --output micro.json
+    python -m benchmarks.run load --sessions 20 --duration 60 --output load.json
+    python -m benchmarks.run startup --output startup.json
+
+``micro`` times individual operations (geocoding, routing, reachable areas,
+map building on small and very large geometries, directions on long step
+lists, the analytics queries on a large history, assistant answers). ``load`` runs
+many concurrent Streamlit sessions sharing one cache directory and reports
+throughput, latency percentiles per user action and cache hit rates.
+``startup`` opens each page in a fresh interpreter and reports its cold-start
+time, peak memory and the packages it loads, plus the import time of the
+entry point by package. Results are written as JSON to track from release to
+release.
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from itertools import repeat
+from typing import Callable, Tuple, List, Dict
+
+import numpy as np
+
+from .fake_upstreams import FakeUpstreams, make_route
+from .startup import profile_startup
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Places used by simulated users; the fake geocoder resolves any name
+PLACES = [
+    "Mumbai", "Pune", "Nashik", "Goa", "Bengaluru", "Mysuru", "Chennai", "Hyderabad",
+    "Delhi", "Agra", "Jaipur", "Udaipur", "Kolkata", "Ahmedabad", "Surat", "Kochi",
+]
+QUESTIONS = [
+    "What are the best places to visit in {place}?",
+    "What local food should I try in {place}?",
+    "When is the best time to travel to {place}?",
+]
+
+
+def configure_environment(upstreams: FakeUpstreams, cache_dir: str):
+    """Point every upstream client at the fakes; must run before travel_core is imported"""
+    os.environ.update({
+        "ORS_BASE_URL": upstreams.url,
+        "NOMINATIM_URL": upstreams.url,
+        "COHERE_BASE_URL": upstreams.url,
+        "TRAVEL_CACHE_DIR": cache_dir,
+        "TRAVEL_DATA_DIR": cache_dir,
+        "WEATHER_PROVIDER": "stub",
+        # Measure the app, not the public services' quotas
+        "ORS_RATE": "1000",
+        "ORS_BURST": "1000",
+        "NOMINATIM_RATE": "1000",
+    })
+    sys.path.insert(0, REPO_DIR)
+
+
+def summarize(samples: List[float]) -> Dict:
+    """Latency summary in milliseconds"""
+    values = np.asarray(samples) * 1000
+    return {
+        "n": len(values),
+        "mean_ms": float(values.mean()),
+        "p50_ms": float(np.percentile(values, 50)),
+        "p95_ms": float(np.percentile(values, 95)),
+        "p99_ms": float(np.percentile(values, 99)),
+        "max_ms": float(values.max())
+    }
+
+
+def measure(func: Callable, repeat: int, setup: Callable = None) -> Dict:
+    """Time repeated calls of func, running setup (untimed) before each"""
+    samples = []
+    for _ in range(repeat):
+        args = setup() if setup else ()
+        start = time.perf_counter()
+        func(*args)
+        samples.append(time.perf_counter() - start)
+    return summarize(samples)
+
+
+def git_revision() -> str:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=REPO_DIR, text=True, stderr=subprocess.DEVNULL
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def run_micro(args) -> Dict:
+    """Time individual operations against the fake upstreams"""
+    from travel_core import (
+        CompactRoute, HistoryStore, NominatimGeocoder, SingleFlight, TravelService, build_directions,
+        compare_routes, create_cohere_client, create_ors_client, format_directions, make_history_entry,
+        open_geocode_store, open_isochrone_cache, open_response_cache, open_route_cache,
+    )
+    import pandas as pd
+    from chatbot import TravelApp
+    
+    upstream_url = os.environ["ORS_BASE_URL"]
+    counter = iter(range(10 ** 9))
+    
+    def fresh_service() -> TravelService:
+        """A service with empty caches and its own coalescing"""
+        cache_dir = tempfile.mkdtemp(prefix="bench-", dir=args.work_dir)
+        return TravelService(
+            geocoder=NominatimGeocoder(url=upstream_url),
+            router=create_ors_client("bench"),
+            chat_client=create_cohere_client("bench"),
+            geocode_store=open_geocode_store(cache_dir),
+            route_cache=open_route_cache(cache_dir),
+            response_cache=open_response_cache(cache_dir),
+            flights=SingleFlight(),
+            isochrone_cache=open_isochrone_cache(cache_dir)
+        )
+    
+    service = fresh_service()
+    names = [f"{place} {i}" for i in range(3) for place in PLACES]
+    start, end = (19.07, 72.87), (18.52, 73.85)
+    stops = [(18.9 + i * 0.05, 73.0 + i * 0.07) for i in range(10)]
+    results = {}
+    
+    results["geocode_48_cold"] = measure(
+        lambda s: s.geocode_many(names), args.repeat, setup=lambda: (fresh_service(),)
+    )
+    service.geocode_many(names)
+    results["geocode_48_warm"] = measure(lambda: service.geocode_many(names), args.repeat)
+    
+    results["route_cold"] = measure(
+        lambda s: s.route(start, end), args.repeat, setup=lambda: (fresh_service(),)
+    )
+    service.route(start, end)
+    results["route_warm"] = measure(lambda: service.route(start, end), args.repeat)
+    results["route_10_stops_optimized"] = measure(
+        lambda s: s.route(start, end, waypoints=[stops[i] for i in s.optimize_stop_order(start, stops, end)]),
+        args.repeat, setup=lambda: (fresh_service(),)
+    )
+    
+    # Reachable areas for five centres and three travel times, one batch
+    centers = [(18.5 + i * 0.2, 73.8 + i * 0.1) for i in range(5)]
+    results["isochrones_5x3_cold"] = measure(
+        lambda s: s.isochrones(centers, [10, 20, 30]), args.repeat, setup=lambda: (fresh_service(),)
+    )
+    service.isochrones(centers, [10, 20, 30])
+    results["isochrones_5x3_warm"] = measure(lambda: service.isochrones(centers, [10, 20, 30]), args.repeat)
+    
+    # Map building and HTML rendering on small and very large geometries
+    app = TravelApp.__new__(TravelApp)
+    for label, points in (("map_1k_points", 1000), ("map_200k_points", 200_000)):
+        route = CompactRoute.from_geojson(make_route([[72.87, 19.07], [73.85, 18.52]], points, 20))
+        results[label] = measure(
+            lambda: app.create_enhanced_map(start, end, route).get_root().render(), max(3, args.repeat // 4)
+        )
+    
+    # Compacting a large response for session state, and rebuilding it for export
+    response = make_route([[72.87, 19.07], [73.85, 18.52]], 200_000, 2500, 3)
+    results["route_compact_200k_x3"] = measure(lambda: CompactRoute.from_geojson(response), args.repeat)
+    compact = CompactRoute.from_geojson(response)
+    results["route_rehydrate_200k_x3"] = measure(compact.to_geojson, max(3, args.repeat // 4))
+    compared = CompactRoute.from_geojson(make_route([[72.87, 19.07], [73.85, 18.52]], 200_000, 2500, 3,
+                                                    True, ["tollways", "waycategory"]))
+    results["route_compare_200k_x3"] = measure(lambda: compare_routes(compared), args.repeat)
+    
+    # Directions for a 5000-step route: building the view, one page, everything
+    segments = make_route([[72.87, 19.07], [73.85, 18.52], [74.5, 18.0]], 10_000, 2500, 1
+                          )['features'][0]['properties']['segments']
+    results["directions_5k_build"] = measure(lambda: build_directions(segments), args.repeat)
+    view = build_directions(segments)
+    results["directions_5k_page"] = measure(lambda: view.render_page(100, 25), args.repeat)
+    results["directions_5k_full_html"] = measure(lambda: format_directions(segments), max(3, args.repeat // 4))
+    
+    # Analytics on a large search history
+    history = HistoryStore(os.path.join(tempfile.mkdtemp(dir=args.work_dir), "history.sqlite3"))
+    rng = random.Random(0)
+    for i in range(args.history_rows):
+        history.record("bench-user" if i % 4 == 0 else f"user-{i % 97}", make_history_entry(
+            rng.choice(PLACES), rng.choice(PLACES), rng.uniform(1, 900), rng.uniform(5, 900)
+        ))
+    
+    def analytics():
+        history.totals("bench-user")
+        history.top_destinations("bench-user", 10)
+        df = pd.DataFrame(history.recent("bench-user", 500))
+        df['timestamp'] = pd.to_datetime(df['timestamp'])
+    
+    results[f"analytics_{args.history_rows}_rows"] = measure(analytics, args.repeat)
+    
+    results["assistant_answer"] = measure(
+        lambda: service.ask(f"What should I pack for trip {next(counter)}?"), args.repeat
+    )
+    return results
+
+
+def simulate_session(seed: int, duration: float, think_time: float, assistant_share: float) -> Tuple[Dict, Dict]:
+    """One simulated user: open the app, plan routes, sometimes ask the assistant"""
+    from streamlit.testing.v1 import AppTest
+    from travel_core import metrics
+    
+    rng = random.Random(seed)
+    timings: Dict[str, List[float]] = {}
+    errors = 0
+    
+    def timed(action: str, run: Callable):
+        started = time.perf_counter()
+        run()
+        timings.setdefault(action, []).append(time.perf_counter() - started)
+    
+    at = AppTest.from_file(os.path.join(REPO_DIR, "chatbot.py"), default_timeout=120)
+    at.secrets["ORS_API_KEY"] = "bench"
+    at.secrets["COHERE_API_KEY"] = "bench"
+    timed("open_app", at.run)
+    
+    deadline = time.monotonic() + duration
+    while time.monotonic() < deadline:
+        start_place, end_place = rng.sample(PLACES, 2)
+        if at.sidebar.selectbox[0].value != "🗺️ Route Finder":
+            timed("switch_page", at.sidebar.selectbox[0].select("🗺️ Route Finder").run)
+        inputs = {t.label: t for t in at.text_input}
+        inputs["Starting Location"].input(start_place)
+        inputs["Destination"].input(end_place)
+        timed("enter_places", at.run)
+        find = next(b for b in at.button if "Find Best Route" in b.label)
+        timed("find_route", find.click().run)
+        errors += len(at.exception) + len(at.error)
+        
+        if rng.random() < assistant_share:
+            timed("switch_page", at.sidebar.selectbox[0].select("🧠 AI Assistant").run)
+            at.text_area[0].input(rng.choice(QUESTIONS).format(place=end_place))
+            answer = next(b for b in at.button if "Get Answer" in b.label)
+            timed("ask_assistant", answer.click().run)
+            errors += len(at.exception) + len(at.error)
+        time.sleep(rng.uniform(0, think_time))
+    
+    timings["errors"] = [0.0] * errors
+    return timings, metrics.snapshot()
+
+
+def run_load(args) -> Dict:
+    """Drive many concurrent Streamlit sessions against shared caches
+    
+    Streamlit's test harness holds one runtime per process, so every session
+    runs in its own worker process; the on-disk caches are shared between
+    them as they are between the workers of a deployment.
+    """
+    rng = random.Random(args.seed)
+    seeds = [rng.randrange(2 ** 32) for _ in range(args.sessions)]
+    started = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=args.sessions, mp_context=multiprocessing.get_context("spawn")) as pool:
+        outcomes = list(pool.map(
+            simulate_session, seeds, repeat(args.duration), repeat(args.think_time), repeat(args.assistant_share)
+        ))
+    elapsed = time.perf_counter() - started
+    
+    # Raw samples merge exactly; per-process histograms only by count and sum
+    timings: Dict[str, List[float]] = {}
+    cache_requests: Dict[Tuple[str, str], float] = {}
+    stages: Dict[str, Dict] = {}
+    for session_timings, snapshot in outcomes:
+        for action, samples in session_timings.items():
+            timings.setdefault(action, []).extend(samples)
+        for counter in snapshot["counters"]:
+            if counter["name"] == "travel_cache_requests_total":
+                key = (counter["labels"]["cache"], counter["labels"]["result"])
+                cache_requests[key] = cache_requests.get(key, 0) + counter["value"]
+        for histogram in snapshot["histograms"]:
+            if histogram["name"] == "travel_stage_seconds":
+                stage = stages.setdefault(histogram["labels"]["stage"], {"count": 0, "sum": 0.0})
+                stage["count"] += histogram["count"]
+                stage["sum"] += histogram["sum"]
+    
+    errors = len(timings.pop("errors", []))
+    completed = sum(len(samples) for samples in timings.values())
+    caches = {}
+    for (cache, result), value in cache_requests.items():
+        caches.setdefault(cache, {"hit": 0, "miss": 0, "stale": 0})[result] = value
+    for counts in caches.values():
+        counts["hit_rate"] = counts["hit"] / max(sum(counts.values()), 1)
+    return {
+        "elapsed_s": elapsed,
+        "actions_per_s": completed / elapsed,
+        "routes_per_s": len(timings.get("find_route", [])) / elapsed,
+        "errors": errors,
+        "actions": {action: summarize(samples) for action, samples in timings.items()},
+        "caches": caches,
+        "stages": {
+            stage: {"count": values["count"], "mean_ms": values["sum"] / max(values["count"], 1) * 1000}
+            for stage, values in sorted(stages.items())
+        }
+    }
+
+
+def print_table(results: Dict):
+    """Print latency summaries as an aligned table"""
+    rows = results.get("actions", results)
+    print(f"{'benchmark':32} {'n':>6} {'p50 ms':>10} {'p95 ms':>10} {'p99 ms':>10}")
+    for name, summary in rows.items():
+        print(f"{name:32} {summary['n']:>6} {summary['p50_ms']:>10.2f} "
+              f"{summary['p95_ms']:>10.2f} {summary['p99_ms']:>10.2f}")
+    if "actions_per_s" in results:
+        print(f"\n{results['actions_per_s']:.1f} actions/s, {results['routes_per_s']:.2f} routes/s, "
+              f"{results['errors']} errors in {results['elapsed_s']:.0f}s")
+
+
+def print_startup(results: Dict):
+    """Print the per-page cold-start profile and the slowest imports"""
+    print(f"{'page':12} {'first run ms':>13} {'rerun ms':>10} {'peak RSS MB':>12} {'modules':>8}")
+    for page, profile in results["pages"].items():
+        print(f"{page:12} {profile['first_run_s'] * 1000:>13.0f} {profile['rerun_s'] * 1000:>10.0f} "
+              f"{profile['max_rss_mb']:>12.0f} {profile['modules_loaded']:>8}")
+    print("\nimport chatbot, by package:")
+    for entry in results["import_chatbot"]:
+        print(f"  {entry['package']:24} {entry['ms']:>8.1f} ms")
+
+
+def main():
+    """Run a benchmark mode and write its results"""
+    parser = argparse.ArgumentParser(description="Smart Travel Companion benchmarks")
+    parser.add_argument("mode", choices=["micro", "load", "startup"])
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    parser.add_argument("--latency-ms", type=float, default=20, help="Simulated upstream latency")
+    parser.add_argument("--points-per-leg", type=int, default=2000)
+    parser.add_argument("--work-dir", default=None, help="Directory for temporary caches")
+    parser.add_argument("--seed", type=int, default=0)
+    micro = parser.add_argument_group("micro")
+    micro.add_argument("--repeat", type=int, default=20)
+    micro.add_argument("--history-rows", type=int, default=200_000)
+    startup = parser.add_argument_group("startup")
+    startup.add_argument("--pages", nargs="+", default=["route", "assistant", "analytics", "admin"])
+    load = parser.add_argument_group("load")
+    load.add_argument("--sessions", type=int, default=10)
+    load.add_argument("--duration", type=float, default=30, help="Seconds to keep sessions busy")
+    load.add_argument("--think-time", type=float, default=1.0, help="Maximum pause between actions")
+    load.add_argument("--assistant-share", type=float, default=0.3,
+                      help="Fraction of iterations that also ask the assistant")
+    args = parser.parse_args()
+    
+    upstreams = FakeUpstreams(latency_ms=args.latency_ms, points_per_leg=args.points_per_leg).start()
+    work_dir = tempfile.TemporaryDirectory(prefix="travel-bench-", dir=args.work_dir)
+    args.work_dir = work_dir.name
+    configure_environment(upstreams, os.path.join(work_dir.name, "cache"))
+    try:
+        modes = {"micro": run_micro, "load": run_load, "startup": lambda args: profile_startup(args.pages)}
+        results = modes[args.mode](args)
+    finally:
+        upstreams.stop()
+        work_dir.cleanup()
+    
+    if args.mode == "startup":
+        print_startup(results)
+    else:
+        print_table(results)
+    if args.output:
+        report = {
+            "mode": args.mode,
+            "revision": git_revision(),
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "machine": platform.platform(),
+            "parameters": {key: value for key, value in vars(args).items() if key != "work_dir"},
+            "upstream_requests": upstreams.requests,
+            "results": results
+        }
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nWrote {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""Cold-start profile of the Streamlit app, one fresh interpreter per page
+
+Only the standard library is imported here, so the probe measures exactly
+what the app and the page it opens pull in.
+"""
+
+import json
+import os
+import re
+import resource
+import subprocess
+import sys
+import time
+from typing import List, Dict
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+_IMPORTTIME_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+
+def probe_page(page: str):
+    """Open one page in a new app session and print its startup cost as JSON"""
+    started = time.perf_counter()
+    from streamlit.testing.v1 import AppTest
+    harness_s = time.perf_counter() - started
+    baseline = set(sys.modules)
+    
+    at = AppTest.from_file(os.path.join(REPO_DIR, "chatbot.py"), default_timeout=120)
+    at.secrets["ORS_API_KEY"] = "bench"
+    at.secrets["COHERE_API_KEY"] = "bench"
+    at.query_params["page"] = page
+    started = time.perf_counter()
+    at.run()
+    first_run_s = time.perf_counter() - started
+    started = time.perf_counter()
+    at.run()
+    rerun_s = time.perf_counter() - started
+    
+    packages = sorted({name.split(".")[0] for name in set(sys.modules) - baseline if not name.startswith("_")})
+    print(json.dumps({
+        "harness_s": harness_s,
+        "first_run_s": first_run_s,
+        "rerun_s": rerun_s,
+        # Linux reports the peak resident set size in KiB
+        "max_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        "modules_loaded": len(set(sys.modules) - baseline),
+        "packages_loaded": packages,
+        "errors": [e.message for e in at.exception]
+    }))
+
+
+def import_profile(module: str = "chatbot", top: int = 15) -> List[Dict]:
+    """Import time of a module broken down by top-level package, from ``python -X importtime``"""
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=REPO_DIR, capture_output=True, text=True
+    )
+    # Attribute each module's own time to its top-level package
+    self_us: Dict[str, int] = {}
+    for match in _IMPORTTIME_LINE.finditer(completed.stderr):
+        package = match.group(4).split(".")[0]
+        self_us[package] = self_us.get(package, 0) + int(match.group(1))
+    ranked = sorted(self_us.items(), key=lambda item: item[1], reverse=True)[:top]
+    return [{"package": package, "ms": us / 1000} for package, us in ranked]
+
+
+def profile_startup(pages: List[str], top: int = 15) -> Dict:
+    """Cold-start cost of each page, plus where the entry point's import time goes"""
+    results = {"import_chatbot": import_profile("chatbot", top), "pages": {}}
+    for page in pages:
+        completed = subprocess.run(
+            [sys.executable, "-c", f"from benchmarks.startup import probe_page; probe_page({page!r})"],
+            cwd=REPO_DIR, capture_output=True, text=True
+        )
+        if completed.returncode != 0:
+            raise RuntimeError(f"Startup probe for page {page!r} failed:\n{completed.stderr}")
+        results["pages"][page] = json.loads(completed.stdout.strip().splitlines()[-1])
+    return results
@@ -1,15 +1,75 @@
 import streamlit as st
-import openrouteservice
-from geopy.geocoders import Nominatim
-from streamlit_folium import st_folium
-import folium
-import cohere
 import time
 import json
+import hashlib
+import io
+import os
+import uuid
 from datetime import datetime, timedelta
-import requests
-from typing import Optional, Tuple, List, Dict
-import pandas as pd
+from typing import TYPE_CHECKING, Callable, Optional, Tuple, List, Dict
+import numpy as np
+
+from travel_core import (
+    EXPORT_FORMATS,
+    BatchRouter,
+    ChatRequest,
+    CompactRoute,
+    ConversationMemory,
+    PlaceSuggester,
+    TravelService,
+    compare_routes,
+    create_cohere_client,
+    create_geocoder,
+    create_ors_client,
+    export_route,
+    fold_name,
+    make_history_entry,
+    merge_suggestions,
+    open_gazetteer,
+    open_geocode_store,
+    open_history_store,
+    open_isochrone_cache,
+    open_response_cache,
+    open_route_cache,
+    open_weather_service,
+    read_trips,
+    run_batch,
+    simplification_tolerance,
+    simplify_line,
+    trip_columns,
+)
+from travel_core.config import ADMIN_PAGE, CACHE_DIR, MAP_MAX_ZOOM, SUGGEST_SEED_PLACES
+from travel_core.metrics import metrics
+
+# folium and pandas take most of a cold start; pages import them when they render
+if TYPE_CHECKING:
+    import folium
+
+# Pages by the key kept in the URL, so a link or reload opens the page directly
+PAGES = {
+    "route": "🗺️ Route Finder",
+    "assistant": "🧠 AI Assistant",
+    "analytics": "📈 Analytics",
+    "admin": "🛠️ Admin",
+}
+# Rendered map size; route geometry is simplified to roughly this resolution
+MAP_WIDTH_PX = 700
+MAP_HEIGHT_PX = 500
+# Directions steps shown per page
+DIRECTIONS_PAGE_SIZE = 25
+# Most recent searches listed on the analytics page
+ANALYTICS_TABLE_ROWS = 500
+
+# ORS routing profile for each vehicle type
+PROFILE_MAPPING = {
+    "Car": "driving-car",
+    "Motorcycle": "driving-car",
+    "Bicycle": "cycling-regular",
+    "Walking": "foot-walking"
+}
+# Travel times offered in reachable-area mode, and their fill colours from shortest to longest
+ISOCHRONE_MINUTES = (5, 10, 15, 20, 30, 45, 60)
+ISOCHRONE_COLORS = ("#1a9850", "#66bd63", "#a6d96a", "#fee08b", "#fdae61", "#f46d43", "#d73027")
 
 # Set page configuration
 st.set_page_config(
@@ -61,20 +121,119 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
+@st.cache_resource
+def get_geocoder():
+    """Process-wide geocoder: offline gazetteer if built, then rate-limited Nominatim"""
+    return create_geocoder()
+
+
+@st.cache_resource
+def get_ors_client(key: str):
+    """Process-wide OpenRouteService client shared by all sessions"""
+    return create_ors_client(key)
+
+
+@st.cache_resource
+def get_cohere_client(key: str):
+    """Process-wide Cohere client shared by all sessions"""
+    return create_cohere_client(key)
+
+
+@st.cache_resource
+def get_geocode_store():
+    """Process-wide geocode store backed by the shared cache directory"""
+    return open_geocode_store()
+
+
+@st.cache_resource
+def get_response_cache():
+    """Process-wide assistant response cache backed by the shared cache directory"""
+    return open_response_cache()
+
+
+@st.cache_resource
+def get_route_cache():
+    """Process-wide route cache backed by the shared cache directory"""
+    return open_route_cache()
+
+
+@st.cache_resource
+def get_history_store():
+    """Process-wide search history store in the user data directory, apart from the caches"""
+    return open_history_store()
+
+
+@st.cache_resource
+def get_weather_service():
+    """Process-wide weather service with its geohash-cell cache"""
+    return open_weather_service()
+
+
+@st.cache_resource
+def get_isochrone_cache():
+    """Process-wide reachable-area cache backed by the shared cache directory"""
+    return open_isochrone_cache()
+
+
+@st.cache_resource
+def get_place_suggester() -> PlaceSuggester:
+    """Process-wide type-ahead index, seeded with the names of recently geocoded places as typed"""
+    suggester = PlaceSuggester()
+    for name, coords in get_geocode_store().known_places(SUGGEST_SEED_PLACES):
+        suggester.add(name, coords)
+    return suggester
+
+
+@st.cache_resource
+def get_gazetteer():
+    """Offline gazetteer index, or None when none has been built"""
+    return open_gazetteer()
+
 class TravelApp:
-    def __init__(self):
+    def __init__(self, page: str = "route"):
         self.initialize_session_state()
-        self.initialize_apis()
+        self.service = self.create_service(page)
+    
+    def create_service(self, page: str) -> TravelService:
+        """Travel service with only the clients and caches the page uses
+        
+        Clients and caches are process-wide and built on first use, so a
+        worker that only serves the assistant never imports the routing
+        and geocoding libraries, or loads the gazetteer and suggestion index.
+        """
+        if page == "route":
+            self.initialize_router()
+            return TravelService(
+                geocoder=get_geocoder(),
+                router=st.session_state.client,
+                geocode_store=get_geocode_store(),
+                route_cache=get_route_cache(),
+                places=get_place_suggester(),
+                weather=get_weather_service(),
+                isochrone_cache=get_isochrone_cache()
+            )
+        if page == "assistant":
+            self.initialize_assistant()
+            return TravelService(
+                chat_client=st.session_state.cohere_client,
+                response_cache=get_response_cache()
+            )
+        return TravelService()
     
     def initialize_session_state(self):
         """Initialize session state variables"""
         defaults = {
             "route_info": None,
+            "route_artifacts": None,
+            "reachability": None,
             "search_history": [],
             "favorite_places": [],
+            "my_places": PlaceSuggester(),
             "client": None,
             "cohere_client": None,
             "current_location": None,
+            "assistant_timings": None,
+            "chat_history": [],
             "route_preferences": {
                 "avoid_tolls": False,
                 "avoid_highways": False,
@@ -85,40 +244,57 @@ class TravelApp:
         for key, value in defaults.items():
             if key not in st.session_state:
                 st.session_state[key] = value
+        
+        # History is stored per user id, which lives only in this session
+        # unless the user chose to keep it in the link (see keep_history_link)
+        if "user_id" not in st.session_state:
+            user_id = st.query_params.get("user") or uuid.uuid4().hex
+            st.session_state.user_id = user_id
+            st.session_state.search_history = get_history_store().recent(user_id, 10)
+            for entry in st.session_state.search_history:
+                st.session_state.my_places.add(entry['start'], weight=2)
+                st.session_state.my_places.add(entry['end'], weight=2)
+    
+    def keep_history_link(self):
+        """Opt-in to carrying the history id in the URL, for reloads and bookmarks"""
+        keep = st.sidebar.checkbox(
+            "🔗 Keep my history in this link",
+            value="user" in st.query_params,
+            key="keep_history_link",
+            help="Adds your history id to the page address so reloading or bookmarking it "
+                 "brings your searches back. Anyone you share the link with can see them."
+        )
+        if keep:
+            st.query_params["user"] = st.session_state.user_id
+        elif "user" in st.query_params:
+            del st.query_params["user"]
     
-    def initialize_apis(self):
-        """Initialize API clients with error handling"""
+    def initialize_router(self):
+        """Initialize the routing client with error handling"""
         try:
             if not st.session_state.client and "ORS_API_KEY" in st.secrets:
-                st.session_state.client = openrouteservice.Client(
-                    key=st.secrets["ORS_API_KEY"]
-                )
+                st.session_state.client = get_ors_client(st.secrets["ORS_API_KEY"])
         except Exception as e:
             st.sidebar.error(f"⚠️ OpenRouteService API issue: {str(e)}")
-        
+    
+    def initialize_assistant(self):
+        """Initialize the assistant client with error handling"""
         try:
             if not st.session_state.cohere_client and "COHERE_API_KEY" in st.secrets:
-                st.session_state.cohere_client = cohere.Client(
-                    st.secrets["COHERE_API_KEY"]
-                )
+                st.session_state.cohere_client = get_cohere_client(st.secrets["COHERE_API_KEY"])
         except Exception as e:
             st.sidebar.error(f"⚠️ Cohere API issue: {str(e)}")
     
-    @st.cache_data(ttl=3600)  # Cache for 1 hour
-    def geocode_place(_self, place_name: str) -> Optional[Tuple[float, float]]:
-        """Geocode a place name to coordinates with caching"""
-        try:
-            geolocator = Nominatim(
-                user_agent="smart-travel-companion",
-                timeout=10
-            )
-            location = geolocator.geocode(place_name)
-            if location:
-                return (location.latitude, location.longitude)
-            return None
-        except Exception as e:
-            st.error(f"Geocoding error: {str(e)}")
-            return None
+    def geocode_place(self, place_name: str) -> Optional[Tuple[float, float]]:
+        """Geocode a place name to coordinates with persistent caching"""
+        return self.geocode_many([place_name])[place_name]
+    
+    def geocode_many(self, place_names: List[str]) -> Dict[str, Optional[Tuple[float, float]]]:
+        """Geocode several place names concurrently, querying each distinct name once"""
+        results, errors = self.service.geocode_many(place_names)
+        for place_name, error in errors.items():
+            st.error(f"Geocoding error for '{place_name}': {str(error)}")
+        return results
     
     def get_current_location(self) -> Optional[Tuple[float, float]]:
         """Get user's current location using HTML5 geolocation"""
@@ -139,157 +315,262 @@ class TravelApp:
         # For demo purposes, return None - actual implementation would need JavaScript integration
         return None
     
+    def avoid_features(self) -> List[str]:
+        """ORS features to avoid, from the sidebar route preferences"""
+        avoid_features = []
+        if st.session_state.route_preferences['avoid_tolls']:
+            avoid_features.append('tollways')
+        if st.session_state.route_preferences['avoid_highways']:
+            avoid_features.append('highways')
+        if st.session_state.route_preferences['avoid_ferries']:
+            avoid_features.append('ferries')
+        return avoid_features
+    
     def calculate_route(self, start_coords: Tuple[float, float], 
                        end_coords: Tuple[float, float], 
                        profile: str = 'driving-car',
-                       route_preference: str = 'fastest') -> Optional[Dict]:
-        """Calculate route with enhanced options"""
+                       route_preference: str = 'fastest',
+                       waypoints: Optional[List[Tuple[float, float]]] = None) -> Optional[Dict]:
+        """Calculate route with enhanced options, passing through any waypoints in order"""
         try:
-            # Set optimization based on preference
-            preference_mapping = {
-                'fastest': 'fastest',
-                'shortest': 'shortest',
-                'recommended': 'recommended'
-            }
-            
-            options = {
-                'avoid_features': []
-            }
-            
-            # Add avoidance preferences
-            if st.session_state.route_preferences['avoid_tolls']:
-                options['avoid_features'].append('tollways')
-            if st.session_state.route_preferences['avoid_highways']:
-                options['avoid_features'].append('highways')
-            if st.session_state.route_preferences['avoid_ferries']:
-                options['avoid_features'].append('ferries')
-            
-            route = st.session_state.client.directions(
-                coordinates=[start_coords[::-1], end_coords[::-1]],
-                profile=profile,
-                format='geojson',
-                options=options,
-                preference=preference_mapping.get(route_preference.lower(), 'fastest'),
-                alternative_routes={'target_count': 2, 'weight_factor': 1.4}
+            result = self.service.route(
+                start_coords,
+                end_coords,
+                profile,
+                route_preference,
+                self.avoid_features(),
+                waypoints
             )
-            
-            return route
+            if result.stale:
+                st.warning("⚠️ Live routing unavailable, showing a previously cached route")
+            return result.route
         except Exception as e:
             st.error(f"Route calculation error: {str(e)}")
             return None
     
+    def optimize_stop_order(self, start_coords: Tuple[float, float],
+                            stops: List[Tuple[float, float]],
+                            end_coords: Tuple[float, float],
+                            profile: str = 'driving-car') -> Optional[List[int]]:
+        """Return the visiting order of stops that minimises total travel time"""
+        try:
+            return self.service.optimize_stop_order(start_coords, stops, end_coords, profile)
+        except Exception as e:
+            st.warning(f"⚠️ Could not optimize stop order, keeping the entered order: {str(e)}")
+            return None
+    
+    @staticmethod
+    def route_export(artifacts: Dict, fmt: str) -> Callable[[], bytes]:
+        """Export of a route, generated when the download is clicked and kept per format
+        
+        Streamlit calls it on another thread, away from the session state, so it
+        works on the route's artifacts (cached under its route hash) directly.
+        """
+        def generate() -> bytes:
+            exports = artifacts["exports"]
+            if fmt not in exports:
+                with metrics.span(f"export_{fmt}"):
+                    exports[fmt] = b"".join(export_route(artifacts["route"], fmt, artifacts["leg_names"]))
+            return exports[fmt]
+        
+        return generate
+    
     def save_to_history(self, start_place: str, end_place: str, distance: float, duration: float):
         """Save search to history"""
-        # Create unique ID for each search
-        unique_id = datetime.now().strftime('%Y%m%d_%H%M%S_%f')[:-3]  # Include microseconds for uniqueness
-        
-        search_entry = {
-            'id': unique_id,
-            'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
-            'start': start_place,
-            'end': end_place,
-            'distance': distance,
-            'duration': duration
-        }
+        search_entry = make_history_entry(start_place, end_place, distance, duration)
+        get_history_store().record(st.session_state.user_id, search_entry)
         
         st.session_state.search_history.insert(0, search_entry)
         # Keep only last 10 searches
         st.session_state.search_history = st.session_state.search_history[:10]
+        
+        route_info = st.session_state.route_info or {}
+        st.session_state.my_places.add(start_place, route_info.get("start_coords"), weight=2)
+        st.session_state.my_places.add(end_place, route_info.get("end_coords"), weight=2)
     
-    def create_enhanced_map(self, start_coords: Tuple[float, float], 
-                          end_coords: Tuple[float, float], 
-                          route_data: Dict) -> folium.Map:
-        """Create an enhanced interactive map"""
-        # Calculate center point
-        center_lat = (start_coords[0] + end_coords[0]) / 2
-        center_lon = (start_coords[1] + end_coords[1]) / 2
+    def save_to_favorites(self, places: List[Dict]):
+        """Add places ({"name", "coords"}) to the favorites used for suggestions"""
+        known = {fold_name(place["name"]) for place in st.session_state.favorite_places}
+        for place in places:
+            if fold_name(place["name"]) not in known:
+                st.session_state.favorite_places.append(place)
+                known.add(fold_name(place["name"]))
+            st.session_state.my_places.add(place["name"], place["coords"], weight=5)
+    
+    def suggest_places(self, text: str, limit: int = 4) -> List[Dict]:
+        """Suggestions for a partly typed place: own places, then geocoded ones, then the gazetteer"""
+        if len(fold_name(text)) < 2:
+            return []
+        gazetteer = get_gazetteer()
+        gazetteer_places = [
+            {"name": place["name"], "coords": (place["lat"], place["lon"])}
+            for place in gazetteer.prefix(text, limit)
+        ] if gazetteer else []
+        return merge_suggestions(
+            st.session_state.my_places.suggest(text, limit),
+            get_place_suggester().suggest(text, limit),
+            gazetteer_places,
+            limit=limit
+        )
+    
+    def pick_place(self, input_key: str, place: Dict):
+        """Fill an input with a suggestion; its known coordinates spare a geocode"""
+        st.session_state[input_key] = place["name"]
+        if place.get("coords"):
+            self.service.remember_place(place["name"], place["coords"])
+    
+    def place_input(self, label: str, key: str, placeholder: str, help: str) -> str:
+        """Text input for a place with type-ahead suggestions below it"""
+        text = st.text_input(label, key=key, placeholder=placeholder, help=help)
+        suggestions = self.suggest_places(text)
+        
+        # Nothing to offer once the text already names a suggested place
+        if suggestions and fold_name(suggestions[0]["name"]) != fold_name(text):
+            columns = st.columns(len(suggestions))
+            for i, (column, place) in enumerate(zip(columns, suggestions)):
+                column.button(
+                    place["name"],
+                    key=f"{key}_suggestion_{i}",
+                    on_click=self.pick_place,
+                    args=(key, place)
+                )
+        return text
+    
+    def create_enhanced_map(self, start_coords: Optional[Tuple[float, float]],
+                          end_coords: Optional[Tuple[float, float]],
+                          route_data: Optional[CompactRoute],
+                          stops: Optional[List[Dict]] = None,
+                          isochrones: Optional[Dict] = None,
+                          centers: Optional[List[Dict]] = None,
+                          route_labels: Optional[List[str]] = None) -> "folium.Map":
+        """Create an enhanced interactive map of a route, reachable areas, or both"""
+        import folium
+        
+        # Simplify geometry to the resolution of the fitted map view, zoomed in a few levels
+        lines = [line.latlon() for line in route_data.routes] if route_data else []
+        areas = sorted(isochrones['features'] if isochrones else [],
+                       key=lambda feature: feature['properties']['minutes'], reverse=True)
+        rings = [np.asarray(feature['geometry']['coordinates'][0], dtype=float)[:, ::-1] for feature in areas]
+        markers = np.array([
+            *([start_coords, end_coords] if route_data else []),
+            *(stop["coords"] for stop in stops or []),
+            *(center["coords"] for center in centers or [])
+        ], dtype=float).reshape(-1, 2)
+        all_points = np.concatenate([markers, *lines, *rings])
+        bounds = np.array([all_points.min(axis=0), all_points.max(axis=0)])
+        tolerance = simplification_tolerance(bounds, MAP_WIDTH_PX, MAP_HEIGHT_PX)
         
         # Create map with better styling
         m = folium.Map(
-            location=[center_lat, center_lon],
+            location=bounds.mean(axis=0).tolist(),
             zoom_start=12,
+            max_zoom=MAP_MAX_ZOOM,
             tiles='CartoDB positron'
         )
         
-        # Add markers with custom icons
-        folium.Marker(
-            start_coords,
-            tooltip="🚀 Start Point",
-            popup=f"<b>Starting Location</b><br>Lat: {start_coords[0]:.4f}<br>Lon: {start_coords[1]:.4f}",
-            icon=folium.Icon(color='green', icon='play', prefix='fa')
-        ).add_to(m)
-        
-        folium.Marker(
-            end_coords,
-            tooltip="🏁 Destination",
-            popup=f"<b>Destination</b><br>Lat: {end_coords[0]:.4f}<br>Lon: {end_coords[1]:.4f}",
-            icon=folium.Icon(color='red', icon='stop', prefix='fa')
-        ).add_to(m)
-        
-        # Add main route
-        main_route = route_data['features'][0]
-        coordinates = [(c[1], c[0]) for c in main_route['geometry']['coordinates']]
-        
-        folium.PolyLine(
-            locations=coordinates,
-            color='#2E86AB',
-            weight=6,
-            opacity=0.8,
-            popup="Main Route"
-        ).add_to(m)
+        # Reachable areas, longest travel time first so shorter ones are drawn on top
+        minutes = sorted({feature['properties']['minutes'] for feature in areas})
+        for feature, ring in zip(areas, rings):
+            properties = feature['properties']
+            color = ISOCHRONE_COLORS[min(minutes.index(properties['minutes']), len(ISOCHRONE_COLORS) - 1)]
+            name = centers[properties['center_index']]["name"] if centers else "Center"
+            folium.Polygon(
+                locations=simplify_line(ring, tolerance).tolist(),
+                color=color,
+                weight=1,
+                fill=True,
+                fill_color=color,
+                fill_opacity=0.25,
+                tooltip=f"{name}: {properties['minutes']:.0f} min • {properties['area_km2']:.0f} km²"
+            ).add_to(m)
+        
+        for center in centers or []:
+            folium.Marker(
+                center["coords"],
+                tooltip=f"⏱️ {center['name']}",
+                icon=folium.Icon(color='purple', icon='clock-o', prefix='fa')
+            ).add_to(m)
+        
+        if route_data:
+            # Add markers with custom icons
+            folium.Marker(
+                start_coords,
+                tooltip="🚀 Start Point",
+                popup=f"<b>Starting Location</b><br>Lat: {start_coords[0]:.4f}<br>Lon: {start_coords[1]:.4f}",
+                icon=folium.Icon(color='green', icon='play', prefix='fa')
+            ).add_to(m)
+            
+            folium.Marker(
+                end_coords,
+                tooltip="🏁 Destination",
+                popup=f"<b>Destination</b><br>Lat: {end_coords[0]:.4f}<br>Lon: {end_coords[1]:.4f}",
+                icon=folium.Icon(color='red', icon='stop', prefix='fa')
+            ).add_to(m)
+        
+        # Add intermediate stops in visiting order
+        for i, stop in enumerate(stops or [], 1):
+            folium.Marker(
+                stop["coords"],
+                tooltip=f"📌 Stop {i}: {stop['name']}",
+                popup=f"<b>Stop {i}</b><br>{stop['name']}",
+                icon=folium.Icon(color='blue', icon='flag', prefix='fa')
+            ).add_to(m)
+        
+        if lines:
+            # Add main route
+            coordinates = simplify_line(lines[0], tolerance)
+            
+            folium.PolyLine(
+                locations=coordinates.tolist(),
+                color='#2E86AB',
+                weight=6,
+                opacity=0.8,
+                popup="Main Route",
+                tooltip=route_labels[0] if route_labels else None
+            ).add_to(m)
         
         # Add alternative routes if available
-        for i, alt_route in enumerate(route_data['features'][1:], 1):
-            alt_coordinates = [(c[1], c[0]) for c in alt_route['geometry']['coordinates']]
+        for i, alt_line in enumerate(lines[1:], 1):
+            alt_coordinates = simplify_line(alt_line, tolerance)
             folium.PolyLine(
-                locations=alt_coordinates,
+                locations=alt_coordinates.tolist(),
                 color='#F24236',
                 weight=4,
                 opacity=0.6,
                 popup=f"Alternative Route {i}",
+                tooltip=route_labels[i] if route_labels else None,
                 dash_array='10, 5'
             ).add_to(m)
         
         # Add route bounds
-        m.fit_bounds([start_coords, end_coords])
+        m.fit_bounds(bounds.tolist())
         
         return m
     
-    def format_directions(self, steps: List[Dict]) -> str:
-        """Format turn-by-turn directions with better styling"""
-        formatted_steps = []
-        total_distance = 0
-        
-        for i, step in enumerate(steps, 1):
-            distance = step.get('distance', 0)
-            duration = step.get('duration', 0)
-            instruction = step.get('instruction', 'Continue')
-            
-            total_distance += distance
-            
-            # Format distance and duration
-            distance_str = f"{distance/1000:.1f} km" if distance >= 1000 else f"{distance:.0f} m"
-            duration_str = f"{duration/60:.0f} min" if duration >= 60 else f"{duration:.0f} sec"
-            
-            formatted_steps.append(f"""
-            <div class="route-step">
-                <strong>Step {i}</strong> • {distance_str} • {duration_str}<br>
-                📍 {instruction}
-            </div>
-            """)
-        
-        return "".join(formatted_steps)
-    
-    def get_weather_info(self, coords: Tuple[float, float]) -> Optional[Dict]:
-        """Get weather information for the destination (placeholder)"""
-        # This would integrate with a weather API like OpenWeatherMap
-        # For now, return mock data
-        return {
-            "temperature": "25°C",
-            "condition": "Sunny",
-            "humidity": "60%",
-            "wind_speed": "10 km/h"
-        }
+    def render_directions(self, directions, route_id: str):
+        """Show one page of turn-by-turn directions at a time"""
+        pages = directions.page_count(DIRECTIONS_PAGE_SIZE)
+        page = 1
+        if pages > 1:
+            page = st.number_input(
+                f"Page (of {pages}, {len(directions)} steps)",
+                min_value=1,
+                max_value=pages,
+                value=1,
+                key=f"directions_page_{route_id}"
+            )
+        st.markdown(directions.render_page(page - 1, DIRECTIONS_PAGE_SIZE), unsafe_allow_html=True)
+    
+    def get_route_weather(self) -> Optional[List[Dict]]:
+        """Current weather sampled along the route once per route; the last sample is the destination"""
+        artifacts = self.get_route_artifacts()
+        if artifacts["weather"] is None:
+            try:
+                artifacts["weather"] = self.service.route_weather(artifacts["route"])
+            except Exception as e:
+                # Not kept, so the next rerun tries again
+                st.caption(f"⚠️ Weather unavailable: {str(e)}")
+        return artifacts["weather"]
     
     def render_route_finder(self):
         """Render the enhanced route finder page"""
@@ -324,6 +605,19 @@ class TravelApp:
                         st.session_state.start_place = entry['start']
                         st.session_state.end_place = entry['end']
         
+        mode = st.radio(
+            "Mode",
+            ("🧭 Route", "⏱️ Reachable Area", "📦 Batch"),
+            horizontal=True,
+            help="Plan a route, see how far you can get within a travel time, or route a whole trip list"
+        )
+        if mode == "⏱️ Reachable Area":
+            self.render_reachability()
+            return
+        if mode == "📦 Batch":
+            self.render_batch()
+            return
+        
         # Main content
         col1, col2 = st.columns([2, 1])
         
@@ -331,19 +625,32 @@ class TravelApp:
             # Input section with enhanced UI
             st.subheader("📍 Trip Details")
             
-            # Location inputs
-            start_place = st.text_input(
+            # Location inputs, with suggestions from known places
+            start_place = self.place_input(
                 "Starting Location",
+                key="start_place",
                 placeholder="e.g., Mumbai Central Station",
                 help="Enter the name of your starting location"
             )
             
-            end_place = st.text_input(
+            end_place = self.place_input(
                 "Destination",
+                key="end_place",
                 placeholder="e.g., Gateway of India, Mumbai",
                 help="Enter your destination"
             )
             
+            stops_text = st.text_area(
+                "Stops Along the Way (optional)",
+                placeholder="One place per line, e.g.\nMarine Drive, Mumbai\nChhatrapati Shivaji Terminus",
+                help="Intermediate places to visit between start and destination"
+            )
+            optimize_stops = st.checkbox(
+                "Optimize stop order",
+                value=True,
+                help="Reorder stops to minimise total travel time"
+            )
+            
             # Route options
             col_pref, col_vehicle = st.columns(2)
             with col_pref:
@@ -356,18 +663,10 @@ class TravelApp:
             with col_vehicle:
                 vehicle_type = st.selectbox(
                     "Vehicle Type",
-                    ("Car", "Motorcycle", "Bicycle", "Walking"),
+                    tuple(PROFILE_MAPPING),
                     help="Select your mode of transportation"
                 )
             
-            # Vehicle type mapping
-            profile_mapping = {
-                "Car": "driving-car",
-                "Motorcycle": "driving-car",
-                "Bicycle": "cycling-regular",
-                "Walking": "foot-walking"
-            }
-            
             # Current location button
             if st.button("📱 Use Current Location", help="Use your current location as starting point"):
                 current_loc = self.get_current_location()
@@ -383,20 +682,41 @@ class TravelApp:
                     return
                 
                 with st.spinner("🔍 Finding the best route for you..."):
-                    # Geocode locations
-                    start_coords = self.geocode_place(start_place)
-                    end_coords = self.geocode_place(end_place)
+                    stop_places = [line.strip() for line in stops_text.splitlines() if line.strip()]
+                    
+                    # Geocode all locations concurrently
+                    locations = self.geocode_many([start_place, end_place, *stop_places])
+                    start_coords = locations[start_place]
+                    end_coords = locations[end_place]
                     
                     if not start_coords or not end_coords:
                         st.error("❌ Could not find one or both locations. Please check the spelling and try again.")
                         return
                     
+                    missing_stops = [name for name in stop_places if not locations[name]]
+                    if missing_stops:
+                        st.error(f"❌ Could not find stop(s): {', '.join(missing_stops)}. Please check the spelling and try again.")
+                        return
+                    
+                    # Reorder stops using a single duration matrix
+                    if optimize_stops and len(stop_places) > 1:
+                        order = self.optimize_stop_order(
+                            start_coords,
+                            [locations[name] for name in stop_places],
+                            end_coords,
+                            PROFILE_MAPPING[vehicle_type]
+                        )
+                        if order:
+                            stop_places = [stop_places[i] for i in order]
+                    stops = [{"name": name, "coords": locations[name]} for name in stop_places]
+                    
                     # Calculate route
                     route_data = self.calculate_route(
                         start_coords, 
                         end_coords, 
-                        profile_mapping[vehicle_type],
-                        route_preference
+                        PROFILE_MAPPING[vehicle_type],
+                        route_preference,
+                        waypoints=[stop["coords"] for stop in stops]
                     )
                     
                     if not route_data:
@@ -405,30 +725,35 @@ class TravelApp:
                     
                     # Store route information
                     st.session_state.route_info = {
-                        "route": route_data,
+                        "route_id": None,
+                        # Held as flat arrays; GeoJSON is only rebuilt for exports
+                        "route": CompactRoute.from_geojson(route_data),
+                        # Which of the alternatives is shown, in ORS order
+                        "active": 0,
                         "start_coords": start_coords,
                         "end_coords": end_coords,
                         "start_place": start_place,
                         "end_place": end_place,
+                        "stops": stops,
                         "vehicle_type": vehicle_type
                     }
+                    st.session_state.route_info["route_id"] = self.route_hash(st.session_state.route_info)
+                    
+                    # Record each computed route in history exactly once
+                    summary = self.get_route_artifacts()["summary"]
+                    self.save_to_history(
+                        start_place,
+                        end_place,
+                        summary["distance_km"],
+                        summary["duration_min"]
+                    )
         
         with col2:
             # Quick stats and weather
             if st.session_state.route_info:
-                route_data = st.session_state.route_info["route"]
-                main_route = route_data['features'][0]['properties']['segments'][0]
-                
-                distance_km = main_route['distance'] / 1000
-                duration_min = main_route['duration'] / 60
-                
-                # Save to history
-                self.save_to_history(
-                    st.session_state.route_info["start_place"],
-                    st.session_state.route_info["end_place"],
-                    distance_km,
-                    duration_min
-                )
+                artifacts = self.get_route_artifacts()
+                distance_km = artifacts["summary"]["distance_km"]
+                duration_min = artifacts["summary"]["duration_min"]
                 
                 # Display metrics
                 st.markdown("### 📊 Route Summary")
@@ -439,33 +764,77 @@ class TravelApp:
                 with col_time:
                     st.metric("Duration", f"{duration_min:.0f} min")
                 
+                # Alternatives side by side; switching only rebuilds the map and directions
+                comparison = artifacts["comparison"]
+                if len(comparison) > 1:
+                    import pandas as pd
+                    
+                    def share(value: Optional[float]) -> str:
+                        return f"{value:.0%}" if value is not None else "–"
+                    
+                    st.markdown("### 🔀 Compare Routes")
+                    st.dataframe(pd.DataFrame([
+                        {
+                            "Route": row["index"] + 1,
+                            "Distance": f"{row['distance_km']:.1f} km",
+                            "Duration": f"{row['duration_min']:.0f} min",
+                            "Tolls": share(row["toll_share"]),
+                            "Highway": share(row["highway_share"]),
+                            "Shared": share(row["overlap"]),
+                            "Climb": f"{row['elevation_gain_m']:.0f} m" if row["elevation_gain_m"] is not None else "–"
+                        }
+                        for row in comparison
+                    ]), hide_index=True)
+                    
+                    route_info = st.session_state.route_info
+                    active = st.radio(
+                        "Show Route",
+                        [row["index"] for row in comparison],
+                        index=route_info["active"],
+                        format_func=lambda i: f"Route {i + 1}",
+                        horizontal=True,
+                        key=f"active_route_{route_info['route_id']}",
+                        help="Shared is how much of the route runs along route 1"
+                    )
+                    if active != route_info["active"]:
+                        route_info["active"] = active
+                        route_info["route_id"] = self.route_hash(route_info)
+                        st.rerun()
+                
                 # Weather info (if available)
-                weather = self.get_weather_info(st.session_state.route_info["end_coords"])
+                weather = self.get_route_weather()
                 if weather:
+                    destination = weather[-1]
                     st.markdown("### 🌤️ Weather at Destination")
-                    st.info(f"**{weather['temperature']}** • {weather['condition']}")
+                    st.info(
+                        f"**{destination['temperature_c']:.0f}°C** • {destination['condition']} • "
+                        f"💧 {destination['humidity_pct']:.0f}% • 💨 {destination['wind_kmh']:.0f} km/h"
+                    )
+                    with st.expander("🌦️ Weather Along the Route"):
+                        import pandas as pd
+                        
+                        st.dataframe(pd.DataFrame([
+                            {
+                                "At": f"{sample['distance_km']:.0f} km",
+                                "Condition": sample["condition"],
+                                "Temperature": f"{sample['temperature_c']:.0f}°C",
+                                "Wind": f"{sample['wind_kmh']:.0f} km/h"
+                            }
+                            for sample in weather
+                        ]), hide_index=True)
         
         # Display route results
         if st.session_state.route_info:
+            artifacts = self.get_route_artifacts()
             st.markdown("---")
             
             # Map
             st.subheader("🗺️ Interactive Route Map")
-            enhanced_map = self.create_enhanced_map(
-                st.session_state.route_info["start_coords"],
-                st.session_state.route_info["end_coords"],
-                st.session_state.route_info["route"]
-            )
-            
-            map_data = st_folium(enhanced_map, width=700, height=500)
+            st.iframe(artifacts["map_html"], width=MAP_WIDTH_PX, height=MAP_HEIGHT_PX)
             
             # Directions
             st.subheader("🧭 Turn-by-Turn Directions")
-            main_route = st.session_state.route_info["route"]['features'][0]
-            steps = main_route['properties']['segments'][0]['steps']
-            
-            formatted_directions = self.format_directions(steps)
-            st.markdown(formatted_directions, unsafe_allow_html=True)
+            self.render_directions(artifacts["directions"], artifacts["route_id"])
             
             # Export options
             st.subheader("📤 Export Options")
@@ -474,16 +843,316 @@ class TravelApp:
             with col_export1:
                 if st.button("📱 Share Route Link"):
                     st.success("🔗 Route link copied to clipboard!")
+                
+                if st.button("⭐ Save Places to Favorites"):
+                    route_info = st.session_state.route_info
+                    self.save_to_favorites([
+                        {"name": route_info["start_place"], "coords": route_info["start_coords"]},
+                        *route_info["stops"],
+                        {"name": route_info["end_place"], "coords": route_info["end_coords"]}
+                    ])
+                    st.success("⭐ Saved to favorites")
             
             with col_export2:
-                route_json = json.dumps(st.session_state.route_info["route"], indent=2)
+                fmt = st.selectbox(
+                    "Export Format",
+                    list(EXPORT_FORMATS),
+                    format_func=lambda key: EXPORT_FORMATS[key].label
+                )
+                export_format = EXPORT_FORMATS[fmt]
                 st.download_button(
                     label="💾 Download Route Data",
-                    data=route_json,
-                    file_name=f"route_{datetime.now().strftime('%Y%m%d_%H%M')}.json",
-                    mime="application/json"
+                    data=self.route_export(artifacts, fmt),
+                    file_name=f"route_{artifacts['created_at'].strftime('%Y%m%d_%H%M')}.{export_format.extension}",
+                    mime=export_format.mime
                 )
     
+    def render_reachability(self):
+        """Render the areas reachable from one or more places within chosen travel times"""
+        col1, col2 = st.columns([2, 1])
+        
+        with col1:
+            st.subheader("⏱️ Reachable Area")
+            center_place = self.place_input(
+                "Center",
+                key="iso_center",
+                placeholder="e.g., Pune Railway Station",
+                help="Where travel starts"
+            )
+            compare_text = st.text_area(
+                "Compare With (optional)",
+                placeholder="One place per line, e.g.\nShivajinagar, Pune\nHinjewadi, Pune",
+                help="More centres to compare coverage with, fetched in the same request"
+            )
+            
+            col_time, col_vehicle = st.columns(2)
+            with col_time:
+                minutes = st.multiselect(
+                    "Travel Time (minutes)",
+                    ISOCHRONE_MINUTES,
+                    default=[15, 30],
+                    help="Show one area per travel time"
+                )
+            with col_vehicle:
+                vehicle_type = st.selectbox(
+                    "Vehicle Type",
+                    tuple(PROFILE_MAPPING),
+                    key="iso_vehicle",
+                    help="Select your mode of transportation"
+                )
+            
+            if st.button("⏱️ Show Reachable Area", type="primary"):
+                if not center_place or not minutes:
+                    st.error("Please enter a center and at least one travel time")
+                    return
+                
+                with st.spinner("🔍 Working out how far you can get..."):
+                    names = list(dict.fromkeys(
+                        [center_place, *(line.strip() for line in compare_text.splitlines() if line.strip())]
+                    ))
+                    locations = self.geocode_many(names)
+                    missing = [name for name in names if not locations[name]]
+                    if missing:
+                        st.error(f"❌ Could not find: {', '.join(missing)}. Please check the spelling and try again.")
+                        return
+                    
+                    centers = [{"name": name, "coords": locations[name]} for name in names]
+                    try:
+                        result = self.service.isochrones(
+                            [center["coords"] for center in centers],
+                            minutes,
+                            PROFILE_MAPPING[vehicle_type]
+                        )
+                    except Exception as e:
+                        st.error(f"Reachable area error: {str(e)}")
+                        return
+                    
+                    # The map is built on first display and kept with the result
+                    st.session_state.reachability = {
+                        "centers": centers,
+                        "vehicle_type": vehicle_type,
+                        "result": result,
+                        "map_html": None
+                    }
+        
+        reachability = st.session_state.reachability
+        if not reachability:
+            return
+        
+        with col2:
+            import pandas as pd
+            
+            st.markdown("### 📐 Coverage")
+            st.dataframe(pd.DataFrame([
+                {
+                    "Center": reachability["centers"][feature["properties"]["center_index"]]["name"],
+                    "Within": f"{feature['properties']['minutes']:.0f} min",
+                    "Area": f"{feature['properties']['area_km2']:.0f} km²"
+                }
+                for feature in reachability["result"]["features"]
+            ]), hide_index=True)
+        
+        if reachability["map_html"] is None:
+            with metrics.span("map_build"):
+                reach_map = self.create_enhanced_map(
+                    None, None, None,
+                    isochrones=reachability["result"],
+                    centers=reachability["centers"]
+                )
+            with metrics.span("map_render"):
+                reachability["map_html"] = reach_map.get_root().render()
+        
+        st.markdown("---")
+        st.subheader(f"🗺️ Reachable by {reachability['vehicle_type']}")
+        st.iframe(reachability["map_html"], width=MAP_WIDTH_PX, height=MAP_HEIGHT_PX)
+    
+    def render_batch(self):
+        """Render bulk routing of an uploaded trip list, resumable and downloadable"""
+        st.subheader("📦 Batch Routes")
+        uploaded = st.file_uploader(
+            "Trip List",
+            type=["csv", "parquet"],
+            help="A CSV or Parquet file with a row per trip: start and destination place names, and optionally an id"
+        )
+        if uploaded is None:
+            st.info("Upload a trip list to route every trip in it at once")
+            return
+        
+        data = uploaded.getvalue()
+        
+        def source() -> io.BytesIO:
+            # A fresh reader over the upload, named so the format is recognised
+            buffer = io.BytesIO(data)
+            buffer.name = uploaded.name
+            return buffer
+        
+        try:
+            columns = trip_columns(source())
+        except Exception as e:
+            st.error(f"Could not read '{uploaded.name}': {str(e)}")
+            return
+        
+        def pick(label: str, preferred: str, optional: bool = False) -> Optional[str]:
+            options = (["(none)"] if optional else []) + columns
+            index = options.index(preferred) if preferred in options else 0
+            choice = st.selectbox(label, options, index=index, key=f"batch_{preferred}")
+            return None if choice == "(none)" else choice
+        
+        col_start, col_end, col_id = st.columns(3)
+        with col_start:
+            start_column = pick("Start Column", "start")
+        with col_end:
+            end_column = pick("Destination Column", "end")
+        with col_id:
+            id_column = pick("Id Column", "id", optional=True)
+        
+        col_vehicle, col_preference, col_geometry = st.columns(3)
+        with col_vehicle:
+            vehicle_type = st.selectbox("Vehicle Type", tuple(PROFILE_MAPPING), key="batch_vehicle")
+        with col_preference:
+            route_preference = st.selectbox("Route Preference", ["Fastest", "Shortest", "Recommended"],
+                                            key="batch_preference")
+        with col_geometry:
+            geometry = st.checkbox("Include route lines", help="Add each route as an encoded polyline")
+        
+        # The job is named by the file and options; its results file is the
+        # checkpoint, so starting the same job again picks up where it stopped
+        options = [start_column, end_column, id_column, PROFILE_MAPPING[vehicle_type],
+                   route_preference.lower(), self.avoid_features(), geometry]
+        job = hashlib.sha1(data + json.dumps(options).encode()).hexdigest()[:16]
+        output = os.path.join(CACHE_DIR, "batch", f"{job}.csv")
+        
+        if st.button("📦 Route All Trips", type="primary"):
+            if not self.service.router:
+                st.error("Route calculation error: No routing provider configured")
+                return
+            try:
+                total = sum(1 for _ in read_trips(source(), start_column, end_column, id_column or ""))
+            except ValueError as e:
+                st.error(str(e))
+                return
+            
+            # Batch places stay out of the type-ahead suggestions
+            router = BatchRouter(
+                TravelService(
+                    geocoder=self.service.geocoder,
+                    router=self.service.router,
+                    geocode_store=self.service.geocode_store,
+                    route_cache=self.service.route_cache
+                ),
+                PROFILE_MAPPING[vehicle_type],
+                route_preference.lower(),
+                self.avoid_features(),
+                geometry
+            )
+            os.makedirs(os.path.dirname(output), exist_ok=True)
+            progress = st.progress(0.0, text="Routing trips...")
+            done = 0
+            with metrics.span("batch_job"):
+                for rows in run_batch(router, read_trips(source(), start_column, end_column, id_column or ""), output):
+                    done += len(rows)
+                    progress.progress(min(done / max(total, 1), 1.0), text=f"Routed {done} new trips")
+            progress.progress(1.0, text=f"Done: {done} new trips routed, {total - done} from earlier runs")
+        
+        if not os.path.exists(output):
+            return
+        
+        import pandas as pd
+        
+        results = pd.read_csv(output, dtype={"id": str})
+        counts = results["status"].value_counts()
+        col_ok, col_missing, col_failed = st.columns(3)
+        with col_ok:
+            st.metric("Routed", int(counts.get("ok", 0)))
+        with col_missing:
+            st.metric("Not Found", int(counts.get("not_found", 0) + counts.get("invalid", 0)))
+        with col_failed:
+            st.metric("Failed", int(counts.get("error", 0)))
+        
+        st.dataframe(results.drop(columns=["polyline"], errors="ignore").head(1000), hide_index=True)
+        with open(output, "rb") as f:
+            st.download_button(
+                label="💾 Download Results",
+                data=f.read(),
+                file_name=f"{os.path.splitext(uploaded.name)[0]}_routes.csv",
+                mime="text/csv"
+            )
+    
+    @staticmethod
+    def route_hash(route_info: Dict) -> str:
+        """Hash everything the rendered route depends on"""
+        key_data = {
+            "route": route_info["route"].digest(),
+            "active": route_info.get("active", 0),
+            "start_place": route_info["start_place"],
+            "end_place": route_info["end_place"],
+            "stops": route_info.get("stops")
+        }
+        raw = json.dumps(key_data, sort_keys=True, separators=(",", ":"))
+        return hashlib.sha1(raw.encode()).hexdigest()
+    
+    @staticmethod
+    def route_label(row: Dict) -> str:
+        """Short description of a route from its comparison row"""
+        label = f"Route {row['index'] + 1}: {row['distance_km']:.1f} km • {row['duration_min']:.0f} min"
+        if row["toll_share"]:
+            label += f" • {row['toll_share']:.0%} tolled"
+        return label
+    
+    def get_route_artifacts(self) -> Dict:
+        """Build the map, directions, export and summary once per route and reuse them"""
+        route_info = st.session_state.route_info
+        artifacts = st.session_state.route_artifacts
+        if artifacts and artifacts["route_id"] == route_info["route_id"]:
+            return artifacts
+        
+        # The chosen alternative is drawn, described and exported as the main route
+        active = route_info.get("active", 0)
+        route_data = route_info["route"].with_main(active)
+        with metrics.span("route_compare"):
+            comparison = compare_routes(route_info["route"])
+        shown = [active, *(i for i in range(len(comparison)) if i != active)]
+        # Summary covers all legs of a multi-stop route
+        main_route = route_data.main
+        
+        with metrics.span("map_build"):
+            enhanced_map = self.create_enhanced_map(
+                route_info["start_coords"],
+                route_info["end_coords"],
+                route_data,
+                route_info.get("stops"),
+                route_labels=[self.route_label(comparison[i]) for i in shown]
+            )
+        with metrics.span("map_render"):
+            map_html = enhanced_map.get_root().render()
+        leg_names = [
+            route_info["start_place"],
+            *(stop["name"] for stop in route_info.get("stops") or []),
+            route_info["end_place"]
+        ]
+        with metrics.span("directions_build"):
+            directions = main_route.directions(leg_names)
+        
+        artifacts = {
+            "route_id": route_info["route_id"],
+            "created_at": datetime.now(),
+            "summary": {
+                "distance_km": main_route.distance / 1000,
+                "duration_min": main_route.duration / 60
+            },
+            "map_html": map_html,
+            "route": route_data,
+            "comparison": comparison,
+            "directions": directions,
+            "leg_names": leg_names,
+            # Sampled the first time the route's weather is shown
+            "weather": None,
+            # Filled in per format as exports are requested
+            "exports": {}
+        }
+        st.session_state.route_artifacts = artifacts
+        return artifacts
+    
     def render_smart_assistant(self):
         """Render the enhanced AI travel assistant"""
         st.markdown('<div class="main-header"><h1>🧠 AI Travel Assistant</h1></div>', 
@@ -514,8 +1183,56 @@ class TravelApp:
             value=st.session_state.get('user_query', '')
         )
         
-        if st.button("🚀 Get Answer", type="primary"):
-            if not user_query:
+        col_stream, col_route, col_clear = st.columns(3)
+        with col_stream:
+            stream_response = st.checkbox(
+                "Stream response",
+                value=True,
+                help="Show the answer as it is generated"
+            )
+        with col_route:
+            include_route = st.checkbox(
+                "Include my current route",
+                value=st.session_state.route_info is not None,
+                disabled=st.session_state.route_info is None,
+                help="Let the assistant know about the route you last planned"
+            )
+        with col_clear:
+            if st.button("🧹 Clear Conversation"):
+                st.session_state.chat_history = []
+        
+        get_answer = st.button("🚀 Get Answer", type="primary")
+        
+        # Earlier turns of this conversation
+        if st.session_state.chat_history:
+            with st.expander(f"💬 Conversation so far ({len(st.session_state.chat_history) // 2} questions)"):
+                for turn in st.session_state.chat_history:
+                    speaker = "🧑 You" if turn["role"] == "USER" else "🤖 Assistant"
+                    st.markdown(f"**{speaker}:** {turn['message']}")
+        
+        # The answer is drawn above the follow-up buttons rendered below it
+        response_area = st.container()
+        
+        follow_up_query = None
+        if st.session_state.chat_history or get_answer:
+            st.markdown("### 🔄 Follow-up Questions:")
+            follow_ups = [
+                "Tell me more about local transportation",
+                "What's the best time to visit?",
+                "Any budget-friendly options?",
+                "Safety tips for this location?"
+            ]
+            
+            for follow_up in follow_ups:
+                if st.button(f"➡️ {follow_up}", key=f"followup_{follow_up}"):
+                    follow_up_query = follow_up
+        
+        query = follow_up_query or (user_query if get_answer else None)
+        if not get_answer and not follow_up_query:
+            return
+        
+        with response_area:
+            if not query:
                 st.warning("Please enter a question first!")
                 return
             
@@ -523,106 +1240,235 @@ class TravelApp:
                 st.error("AI Assistant not available. Please check API configuration.")
                 return
             
-            with st.spinner("🤔 Thinking..."):
-                try:
-                    # Enhanced prompt for better travel responses
-                    enhanced_prompt = f"""
-                    You are a knowledgeable travel assistant. Provide helpful, accurate, and engaging travel advice.
-                    Focus on practical information, local insights, and actionable recommendations.
-                    
-                    User Question: {user_query}
-                    
-                    Please provide a comprehensive response covering:
-                    - Direct answer to the question
-                    - Practical tips and recommendations
-                    - Local insights if applicable
-                    - Safety considerations if relevant
-                    """
-                    
-                    response = st.session_state.cohere_client.chat(
-                        message=enhanced_prompt,
-                        model="command-r",
-                        temperature=0.7,
-                        max_tokens=1000
-                    )
-                    
-                    # Display response with better formatting
-                    st.markdown("### 🤖 AI Assistant Response:")
-                    st.markdown(f"""
-                    <div style="background-color: #f8f9fa; padding: 1rem; border-radius: 8px; border-left: 4px solid #28a745;">
-                        {response.text}
-                    </div>
-                    """, unsafe_allow_html=True)
-                    
-                    # Follow-up questions
-                    st.markdown("### 🔄 Follow-up Questions:")
-                    follow_ups = [
-                        "Tell me more about local transportation",
-                        "What's the best time to visit?",
-                        "Any budget-friendly options?",
-                        "Safety tips for this location?"
-                    ]
-                    
-                    for follow_up in follow_ups:
-                        if st.button(f"➡️ {follow_up}", key=f"followup_{follow_up}"):
-                            st.session_state.user_query = follow_up
-                            st.experimental_rerun()
-                
-                except Exception as e:
-                    st.error(f"❌ Error getting response: {str(e)}")
+            self.answer_question(query, stream_response, include_route)
+    
+    def describe_current_route(self) -> Optional[str]:
+        """Summarize the current route in one line for the assistant"""
+        route_info = st.session_state.route_info
+        if not route_info:
+            return None
+        
+        places = [
+            route_info["start_place"],
+            *(stop["name"] for stop in route_info.get("stops") or []),
+            route_info["end_place"]
+        ]
+        summary = self.get_route_artifacts()["summary"]
+        return (f"The user's planned route: {' → '.join(places)}, "
+                f"{summary['distance_km']:.1f} km, about {summary['duration_min']:.0f} min "
+                f"by {route_info['vehicle_type'].lower()}.")
+    
+    def answer_question(self, user_query: str, stream_response: bool = True,
+                        include_route: bool = False):
+        """Answer a question in the context of the conversation so far"""
+        try:
+            memory = ConversationMemory()
+            context = []
+            if include_route:
+                route_context = self.describe_current_route()
+                if route_context:
+                    context.append(route_context)
+            
+            request = self.service.prepare_chat(
+                user_query, st.session_state.chat_history, context, memory
+            )
+            
+            # Display response with better formatting
+            st.markdown("### 🤖 AI Assistant Response:")
+            response_container = st.empty()
+            
+            # Serve repeated or paraphrased questions without calling Cohere
+            cached_text = self.service.cached_answer(request)
+            
+            if cached_text is not None:
+                text = cached_text
+                st.session_state.assistant_timings = {
+                    "time_to_first_token": 0.0,
+                    "total_time": 0.0,
+                    "cached": True
+                }
+                self.render_assistant_text(response_container, text)
+            elif stream_response:
+                text = self.stream_assistant_response(request, response_container)
+            else:
+                with st.spinner("🤔 Thinking..."):
+                    started = time.perf_counter()
+                    text = self.service.complete(request)
+                    elapsed = time.perf_counter() - started
+                st.session_state.assistant_timings = {
+                    "time_to_first_token": elapsed,
+                    "total_time": elapsed
+                }
+                self.render_assistant_text(response_container, text)
+            
+            st.session_state.chat_history = memory.append(
+                st.session_state.chat_history, user_query, text
+            )
+            
+            timings = st.session_state.assistant_timings
+            if timings.get("cached"):
+                st.caption("⚡ Served from cache")
+            else:
+                st.caption(
+                    f"⏱️ First token after {timings['time_to_first_token']:.2f}s • "
+                    f"completed in {timings['total_time']:.2f}s"
+                )
+        
+        except Exception as e:
+            st.error(f"❌ Error getting response: {str(e)}")
+    
+    def render_assistant_text(self, container, text: str, cursor: bool = False):
+        """Render assistant text into its response container"""
+        cursor_mark = "▌" if cursor else ""
+        container.markdown(f"""
+                <div style="background-color: #f8f9fa; padding: 1rem; border-radius: 8px; border-left: 4px solid #28a745;">
+                    {text}{cursor_mark}
+                </div>
+                """, unsafe_allow_html=True)
+    
+    def stream_assistant_response(self, request: ChatRequest, container) -> str:
+        """Stream a chat completion into the container and record its timings"""
+        self.render_assistant_text(container, "🤔 Thinking...")
+        started = time.perf_counter()
+        first_token = None
+        text = ""
+        
+        for chunk in self.service.stream_answer(request):
+            if first_token is None:
+                first_token = time.perf_counter() - started
+            text += chunk
+            self.render_assistant_text(container, text, cursor=True)
+        
+        total = time.perf_counter() - started
+        self.render_assistant_text(container, text)
+        st.session_state.assistant_timings = {
+            "time_to_first_token": first_token if first_token is not None else total,
+            "total_time": total
+        }
+        return text
     
     def render_analytics_dashboard(self):
         """Render travel analytics dashboard"""
+        import pandas as pd
+        
         st.markdown('<div class="main-header"><h1>📈 Travel Analytics</h1></div>', 
                    unsafe_allow_html=True)
         
-        if not st.session_state.search_history:
+        # Totals and destination counts are pre-aggregated as searches are recorded
+        store = get_history_store()
+        totals = store.totals(st.session_state.user_id)
+        if not totals['searches']:
             st.info("🔍 Start searching for routes to see your travel analytics!")
             return
         
-        # Convert history to DataFrame
-        df = pd.DataFrame(st.session_state.search_history)
-        df['timestamp'] = pd.to_datetime(df['timestamp'])
-        
         # Metrics
         col1, col2, col3, col4 = st.columns(4)
         
         with col1:
-            st.metric("Total Searches", len(df))
+            st.metric("Total Searches", totals['searches'])
         with col2:
-            st.metric("Total Distance", f"{df['distance'].sum():.1f} km")
+            st.metric("Total Distance", f"{totals['distance']:.1f} km")
         with col3:
-            st.metric("Total Time", f"{df['duration'].sum():.1f} min")
+            st.metric("Total Time", f"{totals['duration']:.1f} min")
         with col4:
-            st.metric("Avg Distance", f"{df['distance'].mean():.1f} km")
+            st.metric("Avg Distance", f"{totals['mean_distance']:.1f} km")
         
         # Charts
         st.subheader("📊 Search History")
+        df = pd.DataFrame(store.recent(st.session_state.user_id, ANALYTICS_TABLE_ROWS))
+        df['timestamp'] = pd.to_datetime(df['timestamp'])
         st.dataframe(df[['timestamp', 'start', 'end', 'distance', 'duration']])
         
         # Most searched locations
         st.subheader("🎯 Popular Destinations")
-        destinations = df['end'].value_counts().head(10)
+        destinations = pd.Series(dict(store.top_destinations(st.session_state.user_id, 10)))
         st.bar_chart(destinations)
+    
+    def render_admin_page(self):
+        """Render latency percentiles and cache/upstream counters for this server process"""
+        import pandas as pd
+        
+        st.markdown('<div class="main-header"><h1>🛠️ Performance Metrics</h1></div>', 
+                   unsafe_allow_html=True)
+        snapshot = metrics.snapshot()
+        
+        st.subheader("⏱️ Stage Latency")
+        stages = [h for h in snapshot["histograms"] if h["name"] == "travel_stage_seconds"]
+        if stages:
+            st.dataframe(pd.DataFrame([
+                {
+                    "Stage": h["labels"]["stage"],
+                    "Count": h["count"],
+                    "p50 (ms)": h["p50"] * 1000,
+                    "p95 (ms)": h["p95"] * 1000,
+                    "p99 (ms)": h["p99"] * 1000,
+                    "Total (s)": h["sum"]
+                }
+                for h in stages
+            ]).round(2), hide_index=True)
+        else:
+            st.info("No timings recorded yet")
+        
+        st.subheader("🎯 Caches")
+        caches = {}
+        for c in snapshot["counters"]:
+            if c["name"] == "travel_cache_requests_total":
+                caches.setdefault(c["labels"]["cache"], {})[c["labels"]["result"]] = c["value"]
+        if caches:
+            st.dataframe(pd.DataFrame([
+                {
+                    "Cache": cache,
+                    "Hits": counts.get("hit", 0),
+                    "Misses": counts.get("miss", 0),
+                    "Hit rate": f"{counts.get('hit', 0) / max(1, counts.get('hit', 0) + counts.get('miss', 0)):.0%}"
+                }
+                for cache, counts in sorted(caches.items())
+            ]), hide_index=True)
+        
+        st.subheader("⚠️ Upstream Errors")
+        errors = [c for c in snapshot["counters"] if c["name"] == "travel_upstream_errors_total"]
+        if errors:
+            st.dataframe(pd.DataFrame([
+                {"Provider": c["labels"]["provider"], "Kind": c["labels"]["kind"], "Count": c["value"]}
+                for c in errors
+            ]), hide_index=True)
+        else:
+            st.success("No upstream errors")
+        
+        col_json, col_prom = st.columns(2)
+        with col_json:
+            st.download_button("Download JSON", json.dumps(snapshot).encode(),
+                               file_name="metrics.json", mime="application/json")
+        with col_prom:
+            st.download_button("Download Prometheus", metrics.prometheus().encode(),
+                               file_name="metrics.prom", mime="text/plain")
 
 def main():
     """Main application function"""
-    app = TravelApp()
-    
-    # Navigation
+    # Navigation, starting on the page named in the URL
     st.sidebar.title("🧭 Navigation")
-    page = st.sidebar.selectbox(
-        "Choose a page:",
-        ["🗺️ Route Finder", "🧠 AI Assistant", "📈 Analytics"]
-    )
-    
-    # Page routing
-    if page == "🗺️ Route Finder":
-        app.render_route_finder()
-    elif page == "🧠 AI Assistant":
-        app.render_smart_assistant()
-    elif page == "📈 Analytics":
-        app.render_analytics_dashboard()
+    pages = {label: key for key, label in PAGES.items() if key != "admin" or ADMIN_PAGE}
+    if "page" not in st.session_state:
+        requested = PAGES.get(st.query_params.get("page"))
+        st.session_state.page = requested if requested in pages else PAGES["route"]
+    page = pages[st.sidebar.selectbox("Choose a page:", list(pages), key="page")]
+    st.query_params["page"] = page
+    
+    app = TravelApp(page)
+    app.keep_history_link()
+    
+    # Page routing, timing each full page render
+    if page == "route":
+        with metrics.span("page_route_finder"):
+            app.render_route_finder()
+    elif page == "assistant":
+        with metrics.span("page_assistant"):
+            app.render_smart_assistant()
+    elif page == "analytics":
+        with metrics.span("page_analytics"):
+            app.render_analytics_dashboard()
+    elif page == "admin":
+        app.render_admin_page()
     
     # Footer
     st.sidebar.markdown("---")
@@ -0,0 +1,98 @@
+"""Shared fixtures: the suite runs against local fake ORS, Nominatim and Cohere servers
+
+travel_core reads its configuration from the environment at import time, so
+the fakes are started and the environment pointed at them before any test
+module imports it.
+"""
+
+import os
+import sys
+import tempfile
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.fake_upstreams import FakeUpstreams
+from benchmarks.run import configure_environment
+
+_upstreams = FakeUpstreams(points_per_leg=100, steps_per_leg=5).start()
+configure_environment(_upstreams, tempfile.mkdtemp(prefix="travel-tests-"))
+
+from travel_core.cache import open_geocode_store, open_isochrone_cache, open_response_cache, open_route_cache
+from travel_core.clients import create_cohere_client, create_ors_client
+from travel_core.config import NOMINATIM_URL
+from travel_core.providers import NominatimGeocoder
+from travel_core.service import TravelService
+from travel_core.singleflight import SingleFlight
+from travel_core.weather import StubWeather, WeatherService
+
+
+def pytest_sessionfinish(session, exitstatus):
+    _upstreams.stop()
+
+
+@pytest.fixture(scope="session")
+def upstreams() -> FakeUpstreams:
+    """The running fake upstream servers"""
+    return _upstreams
+
+
+class DownRouter:
+    """A router whose every request fails, like ORS during an outage"""
+    
+    def directions(self, **kwargs):
+        raise ConnectionError("ORS unavailable\nretry later")
+    
+    isochrones = distance_matrix = directions
+
+
+@pytest.fixture
+def down_router() -> DownRouter:
+    """A routing client for an unreachable ORS"""
+    return DownRouter()
+
+
+@pytest.fixture
+def make_service():
+    """Build a service on the fake upstreams with empty caches in cache_dir"""
+    def make(cache_dir: str, router=None) -> TravelService:
+        return TravelService(
+            geocoder=NominatimGeocoder(url=NOMINATIM_URL),
+            router=router or create_ors_client("test"),
+            chat_client=create_cohere_client("test"),
+            geocode_store=open_geocode_store(cache_dir),
+            route_cache=open_route_cache(cache_dir),
+            response_cache=open_response_cache(cache_dir),
+            flights=SingleFlight(),
+            weather=WeatherService(StubWeather()),
+            isochrone_cache=open_isochrone_cache(cache_dir)
+        )
+    return make
+
+
+@pytest.fixture
+def service(make_service, tmp_path) -> TravelService:
+    """A service on the fake upstreams with caches of its own"""
+    return make_service(str(tmp_path))
+
+
+class Clock:
+    """Stand-in for time.time that only moves when told to"""
+    
+    def __init__(self, now: float = 1_000_000.0):
+        self.now = now
+    
+    def __call__(self) -> float:
+        return self.now
+    
+    def advance(self, seconds: float):
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch) -> Clock:
+    """Freeze time.time, advancing it by hand"""
+    clock = Clock()
+    monkeypatch.setattr("time.time", clock)
+    return clock
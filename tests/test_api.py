@@ -0,0 +1,173 @@
+import gzip
+import json
+
+import pytest
+from starlette.testclient import TestClient
+
+from travel_core.api import create_app
+
+MUMBAI, PUNE = [19.0760, 72.8777], [18.5204, 73.8567]
+
+
+@pytest.fixture
+def client(service) -> TestClient:
+    return TestClient(create_app(service))
+
+
+@pytest.fixture
+def down_client(make_service, down_router, tmp_path) -> TestClient:
+    return TestClient(create_app(make_service(str(tmp_path / "down"), down_router)))
+
+
+def test_health(client):
+    assert client.get("/health").json() == {"status": "ok"}
+
+
+def test_geocode(client):
+    assert client.get("/geocode", params={"q": "Pune"}).json()["coords"] is not None
+    assert client.get("/geocode", params={"q": "Nowhere Land"}).json()["coords"] is None
+    assert client.get("/geocode").status_code == 400
+
+
+def test_route_by_name_and_coordinates(client):
+    response = client.post("/route", json={"start": "Mumbai", "end": PUNE})
+    
+    assert response.status_code == 200
+    body = response.json()
+    assert len(body["route"]["features"]) == len(body["comparison"]) == 2
+    assert body["comparison"][0]["overlap"] == 1.0
+    assert not body["cached"]
+    assert client.post("/route", json={"start": "Mumbai", "end": PUNE}).json()["cached"]
+
+
+def test_route_with_stops(client):
+    response = client.post("/route", json={"start": MUMBAI, "end": PUNE, "stops": ["Lonavala", [18.9, 73.3]]})
+    
+    assert response.status_code == 200
+    assert sorted(response.json()["stop_order"]) == [0, 1]
+    assert len(response.json()["route"]["features"][0]["properties"]["segments"]) == 3
+
+
+@pytest.mark.parametrize("fmt, check", [
+    ("gpx", lambda content: content.startswith(b"<?xml")),
+    ("geojson.gz", lambda content: json.loads(gzip.decompress(content))["type"] == "FeatureCollection"),
+    ("polyline", lambda content: len(content) > 10),
+])
+def test_route_export(client, fmt, check):
+    response = client.post("/route", json={"start": "Mumbai", "end": "Pune", "format": fmt})
+    
+    assert response.status_code == 200
+    assert "attachment" in response.headers["content-disposition"]
+    assert check(response.content)
+
+
+@pytest.mark.parametrize("body", [
+    [1, 2],
+    "hi",
+    {"start": "Mumbai"},
+    {"start": "Mumbai", "end": "Pune", "stops": "Goa"},
+    {"start": "Mumbai", "end": "Pune", "stops": [["a", "b"]]},
+    {"start": "Mumbai", "end": "Pune", "stops": [[19.0, 72.8, 5]]},
+    {"start": {"name": "Mumbai"}, "end": "Pune"},
+    {"start": "Mumbai", "end": ""},
+    {"start": "Mumbai", "end": "Pune", "avoid_features": "tollways"},
+    {"start": "Mumbai", "end": "Pune", "format": "kml"},
+    {"start": "Mumbai", "end": "Pune", "format": ["gpx"]},
+    {"start": "Mumbai", "end": "Pune", "profile": 3},
+])
+def test_route_rejects_malformed_bodies(client, upstreams, body):
+    before = dict(upstreams.requests)
+    
+    response = client.post("/route", json=body)
+    
+    assert response.status_code == 400, response.json()
+    assert "error" in response.json()
+    assert upstreams.requests == before
+
+
+def test_route_rejects_invalid_json(client):
+    assert client.post("/route", content=b"{not json").status_code == 400
+
+
+def test_route_unknown_place_is_a_client_error(client):
+    response = client.post("/route", json={"start": "Mumbai", "end": "Nowhere Land"})
+    
+    assert response.status_code == 400
+    assert "Nowhere Land" in response.json()["error"]
+
+
+def test_route_upstream_failure_is_502(down_client):
+    response = down_client.post("/route", json={"start": MUMBAI, "end": PUNE})
+    
+    assert response.status_code == 502
+    assert "ORS unavailable" in response.json()["error"]
+
+
+def test_isochrones(client):
+    response = client.post("/isochrones", json={"centers": ["Mumbai", PUNE], "minutes": [10, 20]})
+    
+    assert response.status_code == 200
+    features = response.json()["features"]
+    assert [(f["properties"]["center_index"], f["properties"]["minutes"]) for f in features] == \
+        [(0, 10), (0, 20), (1, 10), (1, 20)]
+
+
+@pytest.mark.parametrize("body", [
+    [1, 2],
+    {"centers": ["Mumbai"]},
+    {"centers": "Mumbai", "minutes": [10]},
+    {"centers": [[19.0]], "minutes": [10]},
+    {"centers": ["Mumbai"], "minutes": 10},
+    {"centers": ["Mumbai"], "minutes": [-5]},
+    {"centers": ["Mumbai"], "minutes": ["10"]},
+    {"centers": ["Mumbai"], "minutes": [True]},
+])
+def test_isochrones_rejects_malformed_bodies(client, upstreams, body):
+    before = dict(upstreams.requests)
+    
+    response = client.post("/isochrones", json=body)
+    
+    assert response.status_code == 400, response.json()
+    assert upstreams.requests == before
+
+
+def test_isochrones_upstream_failure_is_502(down_client):
+    response = down_client.post("/isochrones", json={"centers": [MUMBAI], "minutes": [10]})
+    
+    assert response.status_code == 502
+
+
+def test_ask(client):
+    history = [{"role": "USER", "content": "Is Goa nice?"}, {"role": "CHATBOT", "content": "Yes."}]
+    response = client.post("/ask", json={"question": "When should I go?", "history": history,
+                                         "context": ["Route: Mumbai to Goa"]})
+    
+    assert response.status_code == 200
+    assert response.json()["text"] and response.json()["cached"] is False
+
+
+@pytest.mark.parametrize("body", [
+    [1, 2],
+    "hi",
+    {},
+    {"question": 5},
+    {"question": "Hi", "history": "earlier"},
+    {"question": "Hi", "history": ["earlier"]},
+    {"question": "Hi", "history": [{"role": "USER"}]},
+    {"question": "Hi", "history": [{"role": "SYSTEM", "content": "x"}]},
+    {"question": "Hi", "context": "Route: Mumbai to Goa"},
+])
+def test_ask_rejects_malformed_bodies(client, upstreams, body):
+    before = dict(upstreams.requests)
+    
+    response = client.post("/ask", json=body)
+    
+    assert response.status_code == 400, response.json()
+    assert upstreams.requests == before
+
+
+def test_metrics(client):
+    client.get("/geocode", params={"q": "Pune"})
+    
+    assert "# TYPE" in client.get("/metrics").text
+    assert isinstance(client.get("/metrics.json").json(), dict)
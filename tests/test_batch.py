@@ -0,0 +1,101 @@
+import csv
+import json
+
+import pytest
+
+from travel_core.batch import BatchRouter, ResultWriter, read_trips, run_batch
+
+TRIPS = [
+    ("t1", "Mumbai", "Pune"),
+    ("t2", "Pune", "Goa"),
+    ("t3", "Mumbai", "Pune"),
+    ("t4", "Nowhere Land", "Goa"),
+    ("t5", "Nashik", ""),
+    ("t6", "Goa", "Surat"),
+    ("t7", "Surat", "Nagpur"),
+]
+
+
+@pytest.fixture
+def trips_csv(tmp_path) -> str:
+    path = str(tmp_path / "trips.csv")
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["trip", "from", "to"])
+        writer.writerows(TRIPS)
+    return path
+
+
+def trips(path: str):
+    return read_trips(path, "from", "to", "trip")
+
+
+def read_results(path: str):
+    with open(path, newline="", encoding="utf-8") as f:
+        if path.endswith(".jsonl"):
+            return [json.loads(line) for line in f]
+        return list(csv.DictReader(f))
+
+
+def test_read_trips_numbers_rows_without_ids(trips_csv):
+    assert [trip["id"] for trip in read_trips(trips_csv, "from", "to")] == [str(i) for i in range(1, 8)]
+    with pytest.raises(ValueError, match="Missing column"):
+        list(read_trips(trips_csv))
+
+
+@pytest.mark.parametrize("suffix", [".csv", ".jsonl"])
+def test_every_trip_gets_one_row(tmp_path, trips_csv, upstreams, make_service, suffix):
+    output = str(tmp_path / f"results{suffix}")
+    before = upstreams.requests.get("directions", 0)
+    router = BatchRouter(make_service(str(tmp_path)), geometry=True, chunk_size=3)
+    
+    list(run_batch(router, trips(trips_csv), output))
+    
+    rows = read_results(output)
+    assert [row["id"] for row in rows] == [trip_id for trip_id, _, _ in TRIPS]
+    assert [row["status"] for row in rows] == ["ok", "ok", "ok", "not_found", "invalid", "ok", "ok"]
+    assert all(float(row["distance_km"]) > 0 and row["polyline"] for row in rows if row["status"] == "ok")
+    # t1 and t3 are the same pair within one chunk, routed once
+    assert upstreams.requests.get("directions", 0) - before == 4
+
+
+def test_resume_after_interruption(tmp_path, trips_csv, make_service):
+    output = str(tmp_path / "results.csv")
+    router = BatchRouter(make_service(str(tmp_path)), chunk_size=3)
+    
+    # Stop after the first chunk, leaving half a row behind
+    batches = run_batch(router, trips(trips_csv), output)
+    next(batches)
+    batches.close()
+    with open(output, "a", encoding="utf-8") as f:
+        f.write("t4,Nowhere La")
+    
+    resumed = [row["id"] for rows in run_batch(router, trips(trips_csv), output) for row in rows]
+    
+    assert resumed == ["t4", "t5", "t6", "t7"]
+    assert [row["id"] for row in read_results(output)] == [trip_id for trip_id, _, _ in TRIPS]
+
+
+@pytest.mark.parametrize("suffix", [".csv", ".jsonl"])
+def test_resume_retries_failed_trips(tmp_path, trips_csv, make_service, down_router, suffix):
+    output = str(tmp_path / f"results{suffix}")
+    
+    down = BatchRouter(make_service(str(tmp_path / "down"), down_router), chunk_size=3)
+    list(run_batch(down, trips(trips_csv), output))
+    failed = read_results(output)
+    assert [row["status"] for row in failed] == ["error", "error", "error", "not_found", "invalid", "error", "error"]
+    assert all("\n" not in row["error"] for row in failed)
+    
+    up = BatchRouter(make_service(str(tmp_path / "up")), chunk_size=3)
+    retried = [row["id"] for rows in run_batch(up, trips(trips_csv), output) for row in rows]
+    
+    assert retried == ["t1", "t2", "t3", "t6", "t7"]
+    rows = read_results(output)
+    assert sorted(row["id"] for row in rows) == sorted(trip_id for trip_id, _, _ in TRIPS)
+    assert {row["id"]: row["status"] for row in rows} == {
+        "t1": "ok", "t2": "ok", "t3": "ok", "t4": "not_found", "t5": "invalid", "t6": "ok", "t7": "ok"
+    }
+
+
+def test_completed_ids_of_a_missing_file(tmp_path):
+    assert ResultWriter(str(tmp_path / "none.csv"), ["id"]).completed_ids() == set()
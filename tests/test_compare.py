@@ -0,0 +1,92 @@
+import copy
+import math
+
+import pytest
+
+from benchmarks.fake_upstreams import make_route
+from travel_core.compare import compare_routes
+from travel_core.route import CompactRoute
+
+MUMBAI_LONAVALA_PUNE = [[72.8777, 19.0760], [73.4070, 18.7546], [73.8567, 18.5204]]
+
+
+def fake_route(alternatives: int = 3, elevation: bool = True,
+               extra_info=("tollways", "waycategory")) -> dict:
+    return make_route(MUMBAI_LONAVALA_PUNE, 300, 5, alternatives, elevation, list(extra_info))
+
+
+def share(feature: dict, kind: str, match) -> float:
+    """Share of a feature's length whose extra info matches, point by point"""
+    points = feature["geometry"]["coordinates"]
+    lengths = [math.hypot(b[1] - a[1], (b[0] - a[0]) * math.cos(math.radians((a[1] + b[1]) / 2)))
+               for a, b in zip(points, points[1:])]
+    covered = sum(sum(lengths[start:end])
+                  for start, end, value in feature["properties"]["extras"][kind]["values"] if match(value))
+    return covered / sum(lengths)
+
+
+def test_metrics_of_each_alternative():
+    route = fake_route()
+    rows = compare_routes(CompactRoute.from_geojson(route))
+    
+    assert [row["index"] for row in rows] == [0, 1, 2]
+    for row, feature in zip(rows, route["features"]):
+        summary = feature["properties"]["summary"]
+        assert row["distance_km"] == pytest.approx(summary["distance"] / 1000)
+        assert row["duration_min"] == pytest.approx(summary["duration"] / 60)
+        assert row["toll_share"] == pytest.approx(share(feature, "tollways", lambda v: v > 0), abs=1e-3)
+        assert row["highway_share"] == pytest.approx(share(feature, "waycategory", lambda v: v & 1), abs=1e-3)
+    # The fakes toll 40% of the main route's points, fewer of the alternatives' and none of the last
+    assert rows[0]["toll_share"] == pytest.approx(0.4, abs=0.02)
+    assert rows[0]["toll_share"] > rows[1]["toll_share"] > rows[2]["toll_share"] == 0
+    assert rows[0]["overlap"] == 1.0
+    # Alternatives bend away from the main route, meeting it only near the ends
+    assert all(row["overlap"] < 0.1 for row in rows[1:])
+
+
+def test_elevation_gain_sums_the_climbs():
+    route = fake_route()
+    rows = compare_routes(CompactRoute.from_geojson(route))
+    
+    for row, feature in zip(rows, route["features"]):
+        heights = [point[2] for point in feature["geometry"]["coordinates"]]
+        climb = sum(max(b - a, 0) for a, b in zip(heights, heights[1:]))
+        assert row["elevation_gain_m"] == pytest.approx(climb, rel=1e-4)
+    assert rows[2]["elevation_gain_m"] > rows[1]["elevation_gain_m"] > rows[0]["elevation_gain_m"]
+
+
+def test_unknown_metrics_are_none():
+    rows = compare_routes(CompactRoute.from_geojson(fake_route(2, elevation=False, extra_info=())))
+    
+    for row in rows:
+        assert row["toll_share"] is None
+        assert row["highway_share"] is None
+        assert row["elevation_gain_m"] is None
+
+
+def test_overlap_of_a_duplicate_route_is_complete():
+    route = fake_route(1)
+    route["features"].append(copy.deepcopy(route["features"][0]))
+    rows = compare_routes(CompactRoute.from_geojson(route))
+    
+    assert [row["overlap"] for row in rows] == [1.0, 1.0]
+
+
+def test_overlap_within_tolerance():
+    route = fake_route(1)
+    shifted = copy.deepcopy(route["features"][0])
+    # About 11 m north of the main route
+    for point in shifted["geometry"]["coordinates"]:
+        point[1] += 0.0001
+    route["features"].append(shifted)
+    compact = CompactRoute.from_geojson(route)
+    
+    assert compare_routes(compact, tolerance_m=30)[1]["overlap"] == 1.0
+    assert compare_routes(compact, tolerance_m=3)[1]["overlap"] < 0.5
+
+
+def test_single_route():
+    rows = compare_routes(CompactRoute.from_geojson(fake_route(1)))
+    
+    assert len(rows) == 1
+    assert rows[0]["overlap"] == 1.0
@@ -0,0 +1,62 @@
+from travel_core.directions import build_directions, format_directions
+
+
+def step(instruction, distance, duration):
+    return {"instruction": instruction, "distance": distance, "duration": duration}
+
+
+SEGMENTS = [
+    {"steps": [step("Head north", 800, 45), step("Turn left", 12300, 420)]},
+    {"steps": [step("Turn right", 2000, 3000), {"distance": 0, "duration": 0}]},
+]
+
+
+def test_labels_switch_units():
+    view = build_directions(SEGMENTS)
+    assert list(view.distances) == ["800 m", "12.3 km", "2.0 km", "0 m"]
+    assert list(view.durations) == ["45 sec", "7 min", "50 min", "0 sec"]
+
+
+def test_cumulative_distance_and_elapsed_time():
+    view = build_directions(SEGMENTS)
+    assert list(view.cumulative_distances) == ["0.8 km", "13.1 km", "15.1 km", "15.1 km"]
+    assert list(view.elapsed) == ["1 min", "8 min", "58 min", "58 min"]
+    
+    long_leg = build_directions([{"steps": [step("Drive", 100000, 7500)]}])
+    assert list(long_leg.elapsed) == ["2 h 05 min"]
+
+
+def test_missing_instruction_continues():
+    view = build_directions(SEGMENTS)
+    assert view.instructions[-1] == "Continue"
+    assert list(view.legs) == [0, 0, 1, 1]
+
+
+def test_leg_titles_only_with_several_legs():
+    assert build_directions(SEGMENTS[:1], ["A", "B"]).leg_titles == []
+    assert build_directions(SEGMENTS, ["A", "B", "C"]).leg_titles == ["Leg 1: A → B", "Leg 2: B → C"]
+    assert build_directions(SEGMENTS).leg_titles == ["Leg 1", "Leg 2"]
+
+
+def test_pages_repeat_the_leg_heading():
+    view = build_directions(SEGMENTS, ["A", "B", "C"])
+    assert len(view) == 4
+    assert view.page_count(3) == 2
+    assert view.page_count(10) == 1
+    assert build_directions([]).page_count(10) == 1
+    
+    first = view.render_page(0, 3)
+    assert first.count("<h4>") == 2
+    assert "Leg 1: A → B</h4>" in first and "Leg 2: B → C</h4>" in first
+    assert "Step 3" in first and "Step 4" not in first
+    
+    second = view.render_page(1, 3)
+    assert "<h4>🛣️ Leg 2: B → C (continued)</h4>" in second
+    assert "Step 4" in second and "Step 3" not in second
+
+
+def test_format_directions_renders_every_step():
+    html = format_directions(SEGMENTS)
+    assert all(f"Step {i}" in html for i in range(1, 5))
+    assert "📍 Turn right" in html
+    assert "15.1 km · 58 min from start" in html
@@ -0,0 +1,117 @@
+import csv
+import gzip
+import io
+import json
+import xml.etree.ElementTree as ET
+
+import numpy as np
+import pytest
+
+from benchmarks.fake_upstreams import make_route
+from travel_core import export
+from travel_core.export import encode_polyline, export_route
+from travel_core.route import CompactRoute
+
+GPX_NS = {"gpx": "http://www.topografix.com/GPX/1/1"}
+LEG_NAMES = ["Mumbai", "Lonavala", "Pune"]
+
+
+def decode_polyline(text: str, precision: int = 5) -> np.ndarray:
+    values, value, shift = [], 0, 0
+    for char in text.encode("ascii"):
+        byte = char - 63
+        value |= (byte & 0x1F) << shift
+        shift += 5
+        if byte < 0x20:
+            values.append(~(value >> 1) if value & 1 else value >> 1)
+            value, shift = 0, 0
+    return np.cumsum(np.array(values).reshape(-1, 2), axis=0) / 10 ** precision
+
+
+@pytest.fixture
+def route():
+    # Mumbai -> Lonavala -> Pune, as [lon, lat]
+    return make_route([[72.8777, 19.0760], [73.4070, 18.7546], [73.8567, 18.5204]], 40, 4)
+
+
+def collect(route, fmt, leg_names=None) -> bytes:
+    return b"".join(export_route(route, fmt, leg_names))
+
+
+def test_polyline_matches_reference_example():
+    # The worked example from Google's encoded polyline algorithm documentation
+    points = np.array([[38.5, -120.2], [40.7, -120.95], [43.252, -126.453]])
+    
+    assert encode_polyline(points) == "_p~iF~ps|U_ulLnnqC_mqNvxq`@"
+
+
+def test_polyline_edge_cases():
+    assert encode_polyline(np.empty((0, 2))) == ""
+    assert encode_polyline(np.array([[0.0, 0.0]])) == "??"
+    assert encode_polyline(np.array([[0.00001, -0.00001]])) == "A@"
+
+
+def test_polyline_round_trip(route):
+    text = collect(route, "polyline").decode()
+    expected = np.array([[lat, lon] for lon, lat in route["features"][0]["geometry"]["coordinates"]])
+    
+    np.testing.assert_allclose(decode_polyline(text), expected, atol=5e-6)
+
+
+def test_gpx_round_trip(route, monkeypatch):
+    # Small blocks, so the track is written over several chunks
+    monkeypatch.setattr(export, "CHUNK_POINTS", 7)
+    root = ET.fromstring(collect(route, "gpx", LEG_NAMES))
+    coordinates = route["features"][0]["geometry"]["coordinates"]
+    
+    track = [(float(p.get("lat")), float(p.get("lon"))) for p in root.iterfind(".//gpx:trkpt", GPX_NS)]
+    np.testing.assert_allclose(track, [(lat, lon) for lon, lat in coordinates], atol=5e-7)
+    
+    waypoints = root.findall("gpx:wpt", GPX_NS)
+    assert [w.findtext("gpx:name", namespaces=GPX_NS) for w in waypoints] == LEG_NAMES
+    way_points = [0, 40, 80]
+    np.testing.assert_allclose([(float(w.get("lat")), float(w.get("lon"))) for w in waypoints],
+                               [(coordinates[i][1], coordinates[i][0]) for i in way_points], atol=5e-7)
+    assert root.findtext("gpx:trk/gpx:name", namespaces=GPX_NS) == " → ".join(LEG_NAMES)
+
+
+def test_gpx_escapes_names(route):
+    root = ET.fromstring(collect(route, "gpx", ["A & B", "<C>", "D"]))
+    
+    assert [w.findtext("gpx:name", namespaces=GPX_NS) for w in root.findall("gpx:wpt", GPX_NS)] == \
+        ["A & B", "<C>", "D"]
+
+
+def test_geojson_round_trip(route):
+    assert json.loads(collect(route, "geojson")) == route
+    assert json.loads(gzip.decompress(collect(route, "geojson.gz"))) == route
+
+
+def test_steps_csv_round_trip(route):
+    rows = list(csv.DictReader(io.StringIO(collect(route, "csv", LEG_NAMES).decode())))
+    steps = [step for segment in route["features"][0]["properties"]["segments"] for step in segment["steps"]]
+    
+    assert len(rows) == len(steps)
+    assert [row["step"] for row in rows] == [str(i) for i in range(1, len(steps) + 1)]
+    assert [row["leg"] for row in rows] == ["Mumbai → Lonavala"] * 4 + ["Lonavala → Pune"] * 4
+    for row, step in zip(rows, steps):
+        assert row["instruction"] == step["instruction"]
+        assert row["name"] == step["name"]
+        assert float(row["distance_m"]) == pytest.approx(step["distance"], abs=0.05)
+        assert float(row["duration_s"]) == pytest.approx(step["duration"], abs=0.05)
+
+
+def test_steps_csv_numbers_legs_without_names(route):
+    rows = list(csv.DictReader(io.StringIO(collect(route, "csv").decode())))
+    
+    assert [row["leg"] for row in rows] == ["1"] * 4 + ["2"] * 4
+
+
+@pytest.mark.parametrize("fmt", ["gpx", "polyline", "csv"])
+def test_compact_route_exports_identically(route, fmt):
+    assert collect(CompactRoute.from_geojson(route), fmt, LEG_NAMES) == collect(route, fmt, LEG_NAMES)
+
+
+def test_unknown_format_is_rejected(route):
+    with pytest.raises(ValueError, match="Unknown export format"):
+        export_route(route, "kml")
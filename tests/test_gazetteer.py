@@ -0,0 +1,131 @@
+import pytest
+
+from benchmarks.fake_upstreams import place_coords
+from travel_core.gazetteer import GazetteerIndex, LocalGeocoder, build_index, fold_name
+from travel_core.providers import FallbackGeocoder
+
+# geonameid, name, alternate names, lat, lon, country, admin1, population
+PLACES = [
+    (1277333, "Bengaluru", "Bangalore,Bengalooru,Bengaluru", 12.97194, 77.59369, "IN", "19", 8443675),
+    (1275339, "Mumbai", "Bombay,Mumbai", 19.07283, 72.88261, "IN", "16", 12691836),
+    (1259229, "Pune", "Poona,Puna", 18.51957, 73.85535, "IN", "16", 3124458),
+    (1269843, "Hyderabad", "", 17.38405, 78.45636, "IN", "40", 3597816),
+    (1176734, "Hyderabad", "", 25.39242, 68.37366, "PK", "05", 1386330),
+    (4250542, "Springfield", "", 39.80172, -89.64371, "US", "IL", 116250),
+    (4409896, "Springfield", "", 37.21533, -93.29824, "US", "MO", 166810),
+    (4951788, "Springfield", "", 42.10148, -72.58981, "US", "MA", 153606),
+    (4525353, "Springfield", "", 39.92423, -83.80882, "US", "OH", 58662),
+    (2643743, "London", "Londres", 51.50853, -0.12574, "GB", "ENG", 8961989),
+    (6058560, "London", "", 42.98339, -81.23304, "CA", "08", 346765),
+]
+ADMIN1 = {"IN.19": "Karnataka", "IN.16": "Maharashtra", "IN.40": "Telangana", "PK.05": "Sindh",
+          "US.IL": "Illinois", "US.MO": "Missouri", "US.MA": "Massachusetts", "US.OH": "Ohio",
+          "GB.ENG": "England", "CA.08": "Ontario"}
+COUNTRIES = {"IN": "India", "PK": "Pakistan", "US": "United States", "GB": "United Kingdom", "CA": "Canada"}
+
+
+def coords_of(name: str, country: str, admin1: str):
+    return next(pytest.approx((lat, lon), abs=1e-4) for _, place, _, lat, lon, cc, region, _ in PLACES
+                if place == name and cc == country and region == admin1)
+
+
+@pytest.fixture(scope="module")
+def index_dir(tmp_path_factory) -> str:
+    """A gazetteer index built from a few GeoNames-style rows"""
+    root = tmp_path_factory.mktemp("gazetteer")
+    with open(root / "places.txt", "w", encoding="utf-8") as f:
+        for geonameid, name, alternates, lat, lon, country, admin1, population in PLACES:
+            fields = [""] * 19
+            fields[0], fields[1], fields[2], fields[3] = str(geonameid), name, name, alternates
+            fields[4], fields[5], fields[8], fields[10], fields[14] = str(lat), str(lon), country, admin1, str(population)
+            f.write("\t".join(fields) + "\n")
+    with open(root / "admin1CodesASCII.txt", "w", encoding="utf-8") as f:
+        f.writelines(f"{code}\t{name}\t{name}\t0\n" for code, name in ADMIN1.items())
+    with open(root / "countryInfo.txt", "w", encoding="utf-8") as f:
+        f.write("#ISO\tISO3\tISO-Numeric\tfips\tCountry\n")
+        f.writelines(f"{code}\t\t\t\t{name}\n" for code, name in COUNTRIES.items())
+    
+    count = build_index(str(root / "places.txt"), str(root / "index"), 0,
+                        str(root / "admin1CodesASCII.txt"), str(root / "countryInfo.txt"))
+    assert count == len(PLACES)
+    return str(root / "index")
+
+
+@pytest.fixture
+def geocoder(index_dir) -> LocalGeocoder:
+    return LocalGeocoder(GazetteerIndex(index_dir))
+
+
+def test_fold_name():
+    assert fold_name("  São Paulo!  ") == "sao paulo"
+    assert fold_name("Bengaluru, KA") == "bengaluru ka"
+
+
+@pytest.mark.parametrize("query, place", [
+    ("Bengaluru", ("Bengaluru", "IN", "19")),
+    ("bangalore", ("Bengaluru", "IN", "19")),
+    ("Bengalooru", ("Bengaluru", "IN", "19")),
+    ("Bombay", ("Mumbai", "IN", "16")),
+    ("Mumbay", ("Mumbai", "IN", "16")),
+    ("Poona", ("Pune", "IN", "16")),
+    ("Bengaluuru", ("Bengaluru", "IN", "19")),
+    # The most populous of several places with the same name
+    ("Hyderabad", ("Hyderabad", "IN", "40")),
+    ("Springfield", ("Springfield", "US", "MO")),
+])
+def test_names_aliases_and_misspellings_resolve(geocoder, query, place):
+    assert geocoder.geocode(query) == coords_of(*place)
+
+
+def test_unknown_name_misses(geocoder):
+    assert geocoder.geocode("Timbuktu") is None
+
+
+@pytest.mark.parametrize("query, place", [
+    ("Springfield, OH", ("Springfield", "US", "OH")),
+    ("Springfield, Ohio", ("Springfield", "US", "OH")),
+    ("Springfield, Illinois, US", ("Springfield", "US", "IL")),
+    ("Springfield, MA, United States", ("Springfield", "US", "MA")),
+    ("Hyderabad, Pakistan", ("Hyderabad", "PK", "05")),
+    ("Hyderabad, Sindh", ("Hyderabad", "PK", "05")),
+    ("London, Ontario", ("London", "CA", "08")),
+    ("Bangalore, Karnataka, India", ("Bengaluru", "IN", "19")),
+    ("Poona, Maharashtra", ("Pune", "IN", "16")),
+])
+def test_qualifier_picks_the_matching_place(geocoder, query, place):
+    assert geocoder.geocode(query) == coords_of(*place)
+
+
+@pytest.mark.parametrize("query", [
+    "Springfield, Texas",
+    "Springfield, OH, Canada",
+    "Hyderabad, Karnataka",
+    # A landmark in a known city is not the city
+    "Gateway of India, Mumbai",
+])
+def test_unmatched_qualifier_misses(geocoder, query):
+    assert geocoder.geocode(query) is None
+
+
+def test_misses_fall_back_to_nominatim(geocoder, service, upstreams):
+    fallback = FallbackGeocoder(geocoder, service.geocoder)
+    before = upstreams.requests.get("nominatim", 0)
+    
+    assert fallback.geocode("Poona") == coords_of("Pune", "IN", "16")
+    assert upstreams.requests.get("nominatim", 0) == before
+    assert fallback.geocode("Gateway of India, Mumbai") == pytest.approx(place_coords("Gateway of India, Mumbai"))
+    assert upstreams.requests.get("nominatim", 0) == before + 1
+
+
+def test_index_without_region_names_matches_codes(tmp_path, index_dir):
+    source = tmp_path / "places.txt"
+    with open(source, "w", encoding="utf-8") as f:
+        fields = [""] * 19
+        fields[1] = fields[2] = "Springfield"
+        fields[4], fields[5], fields[8], fields[10], fields[14] = "39.92", "-83.81", "US", "OH", "58662"
+        f.write("\t".join(fields) + "\n")
+    build_index(str(source), str(tmp_path / "index"))
+    geocoder = LocalGeocoder(GazetteerIndex(str(tmp_path / "index")))
+    
+    assert geocoder.geocode("Springfield, OH, US") is not None
+    assert geocoder.geocode("Springfield, Ohio") is None
@@ -0,0 +1,64 @@
+import numpy as np
+
+from travel_core.geometry import simplification_tolerance, simplify_line
+
+
+def wiggly_line(n: int = 2000) -> np.ndarray:
+    """A lat/lon line heading east with small noise and one large detour"""
+    rng = np.random.default_rng(7)
+    lon = np.linspace(72.8, 73.9, n)
+    lat = 19.0 + rng.normal(scale=1e-5, size=n)
+    lat[n // 2] += 0.05
+    return np.column_stack([lat, lon])
+
+
+def test_simplify_keeps_endpoints_and_drops_points():
+    line = wiggly_line()
+    simplified = simplify_line(line, 1e-3)
+    assert len(simplified) < len(line) // 100
+    assert np.array_equal(simplified[0], line[0])
+    assert np.array_equal(simplified[-1], line[-1])
+    # The detour is far above the tolerance, so its peak survives
+    assert any(np.array_equal(point, line[len(line) // 2]) for point in simplified)
+
+
+def test_simplified_points_stay_within_tolerance():
+    line = wiggly_line()
+    tolerance = 1e-3
+    simplified = simplify_line(line, tolerance)
+    # Interpolate the simplified line at every original longitude
+    lat = np.interp(line[:, 1], simplified[:, 1], simplified[:, 0])
+    assert np.max(np.abs(lat - line[:, 0])) <= tolerance
+
+
+def test_smaller_tolerance_keeps_more_points():
+    line = wiggly_line()
+    counts = [len(simplify_line(line, tolerance)) for tolerance in (1e-2, 1e-4, 1e-6)]
+    assert counts[0] <= counts[1] <= counts[2] <= len(line)
+    assert counts[0] < counts[2]
+
+
+def test_short_lines_and_zero_tolerance_are_unchanged():
+    line = wiggly_line()
+    assert simplify_line(line, 0) is line
+    assert len(simplify_line(line[:2], 1.0)) == 2
+    
+    # A closed ring has a zero-length chord and still simplifies
+    ring = np.array([[0.0, 0.0], [0.0, 1.0], [1.0, 1.0], [1.0, 0.0], [0.0, 0.0]])
+    assert len(simplify_line(ring, 0.1)) == 5
+
+
+def test_tolerance_scales_with_map_span():
+    small = simplification_tolerance(np.array([[19.0, 72.8], [19.1, 72.9]]), 700, 500)
+    large = simplification_tolerance(np.array([[19.0, 72.8], [20.0, 73.9]]), 700, 500)
+    assert 0 < small < large
+
+
+def test_tolerance_keeps_detail_for_zooming_in():
+    bounds = np.array([[19.0, 72.8], [20.0, 73.9]])
+    fitted = simplification_tolerance(bounds, 700, 500, zoom_levels=0)
+    assert simplification_tolerance(bounds, 700, 500, zoom_levels=4) == fitted / 16
+    
+    # A few metres across, the fitted view is past the deepest zoom
+    tiny = np.array([[19.0, 72.8], [19.00001, 72.80001]])
+    assert simplification_tolerance(tiny, 700, 500) == simplification_tolerance(tiny, 700, 500, zoom_levels=0)
@@ -0,0 +1,66 @@
+import os
+
+import pytest
+
+from travel_core.history import HistoryStore, open_history_store
+from travel_core.service import make_history_entry
+
+
+@pytest.fixture
+def path(tmp_path) -> str:
+    return os.path.join(tmp_path, "data", "history.sqlite3")
+
+
+def record_trips(store: HistoryStore, user_id: str, trips):
+    entries = []
+    for start, end, distance, duration in trips:
+        entry = make_history_entry(start, end, distance, duration)
+        store.record(user_id, entry)
+        entries.append(entry)
+    return entries
+
+
+def test_round_trip_and_ordering(path):
+    store = HistoryStore(path)
+    entries = record_trips(store, "ana", [("Mumbai", "Pune", 150.0, 180.0), ("Pune", "Goa", 450.0, 540.0),
+                                          ("Goa", "Mumbai", 590.0, 660.0)])
+    
+    assert store.recent("ana") == entries[::-1]
+    assert store.recent("ana", 2) == entries[:0:-1]
+
+
+def test_users_are_isolated(path):
+    store = HistoryStore(path)
+    record_trips(store, "ana", [("Mumbai", "Pune", 150.0, 180.0), ("Pune", "Goa", 450.0, 540.0)])
+    record_trips(store, "ben", [("Delhi", "Agra", 230.0, 200.0)])
+    
+    assert [entry["end"] for entry in store.recent("ana")] == ["Goa", "Pune"]
+    assert [entry["end"] for entry in store.recent("ben")] == ["Agra"]
+    assert store.recent("cat") == []
+    assert store.totals("ben")["searches"] == 1
+    assert store.top_destinations("ben") == [("Agra", 1)]
+
+
+def test_totals_and_top_destinations(path):
+    store = HistoryStore(path)
+    record_trips(store, "ana", [("Mumbai", "Pune", 150.0, 180.0), ("Goa", "pune ", 440.0, 500.0),
+                                ("Pune", "Goa", 450.0, 520.0)])
+    
+    totals = store.totals("ana")
+    assert totals["searches"] == 3
+    assert totals["distance"] == pytest.approx(1040.0)
+    assert totals["mean_duration"] == pytest.approx(400.0)
+    # Destinations are counted by normalized name, shown as last typed
+    assert store.top_destinations("ana") == [("pune ", 2), ("Goa", 1)]
+    assert store.totals("nobody") == {"searches": 0, "distance": 0.0, "duration": 0.0,
+                                      "mean_distance": 0.0, "mean_duration": 0.0}
+
+
+def test_history_persists_across_reopening(path):
+    entries = record_trips(open_history_store(path), "ana", [("Mumbai", "Pune", 150.0, 180.0)])
+    
+    reopened = open_history_store(path)
+    
+    assert reopened.recent("ana") == entries
+    assert reopened.totals("ana")["searches"] == 1
+    assert os.path.isfile(path)
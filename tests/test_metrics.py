@@ -0,0 +1,89 @@
+import pytest
+
+from travel_core.metrics import BUCKETS, CACHE_REQUESTS, STAGE_SECONDS, UPSTREAM_ERRORS, Metrics
+
+
+class RateLimited(Exception):
+    status_code = 429
+
+
+def test_counters_accumulate_per_label_set():
+    registry = Metrics()
+    registry.cache_result("route", hit=True)
+    registry.cache_result("route", hit=True)
+    registry.cache_result("route", hit=False)
+    registry.inc("custom_total", 2.5)
+    
+    counters = {(c["name"], tuple(sorted(c["labels"].items()))): c["value"]
+                for c in registry.snapshot()["counters"]}
+    assert counters[(CACHE_REQUESTS, (("cache", "route"), ("result", "hit")))] == 2
+    assert counters[(CACHE_REQUESTS, (("cache", "route"), ("result", "miss")))] == 1
+    assert counters[("custom_total", ())] == 2.5
+
+
+def test_upstream_errors_tell_rate_limiting_apart():
+    registry = Metrics()
+    registry.upstream_error("ors", RateLimited())
+    registry.upstream_error("ors", ConnectionError())
+    
+    text = registry.prometheus()
+    assert f'{UPSTREAM_ERRORS}{{kind="rate_limited",provider="ors"}} 1\n' in text
+    assert f'{UPSTREAM_ERRORS}{{kind="error",provider="ors"}} 1\n' in text
+
+
+def test_span_times_failing_blocks():
+    registry = Metrics()
+    with pytest.raises(ValueError):
+        with registry.span("geocode"):
+            raise ValueError
+    
+    @registry.timed("route")
+    def route():
+        return "ok"
+    
+    assert route() == "ok"
+    stages = {h["labels"]["stage"]: h["count"] for h in registry.snapshot()["histograms"]}
+    assert stages == {"geocode": 1, "route": 1}
+
+
+def test_prometheus_text_format():
+    registry = Metrics()
+    registry.cache_result("geocode", hit=False)
+    for value in (0.003, 0.003, 0.2, 60.0):
+        registry.observe(STAGE_SECONDS, value, stage="route")
+    
+    lines = registry.prometheus().splitlines()
+    assert lines[0] == f"# TYPE {CACHE_REQUESTS} counter"
+    assert lines[1] == f'{CACHE_REQUESTS}{{cache="geocode",result="miss"}} 1'
+    assert lines[2] == f"# TYPE {STAGE_SECONDS} histogram"
+    
+    buckets = [line for line in lines if line.startswith(f"{STAGE_SECONDS}_bucket")]
+    assert len(buckets) == len(BUCKETS) + 1
+    assert f'{STAGE_SECONDS}_bucket{{stage="route",le="0.0025"}} 0' in buckets
+    assert f'{STAGE_SECONDS}_bucket{{stage="route",le="0.005"}} 2' in buckets
+    assert f'{STAGE_SECONDS}_bucket{{stage="route",le="0.25"}} 3' in buckets
+    assert f'{STAGE_SECONDS}_bucket{{stage="route",le="30.0"}} 3' in buckets
+    assert buckets[-1] == f'{STAGE_SECONDS}_bucket{{stage="route",le="+Inf"}} 4'
+    assert f'{STAGE_SECONDS}_sum{{stage="route"}} 60.206' in lines
+    assert lines[-1] == f'{STAGE_SECONDS}_count{{stage="route"}} 4'
+
+
+def test_percentiles_use_recent_samples():
+    registry = Metrics(reservoir=100)
+    for value in range(1, 201):
+        registry.observe(STAGE_SECONDS, value / 1000, stage="route")
+    
+    histogram, = registry.snapshot()["histograms"]
+    assert histogram["count"] == 200
+    # Only the last 100 samples (0.101..0.200 s) are kept for percentiles
+    assert histogram["p50"] == pytest.approx(0.1505)
+    assert histogram["p99"] == pytest.approx(0.19901)
+
+
+def test_reset_drops_everything():
+    registry = Metrics()
+    registry.inc("custom_total")
+    registry.observe(STAGE_SECONDS, 0.1, stage="route")
+    registry.reset()
+    assert registry.snapshot() == {"counters": [], "histograms": []}
+    assert registry.prometheus() == "\n"
@@ -0,0 +1,65 @@
+import numpy as np
+import pytest
+
+from travel_core.optimize import solve_stop_order
+
+
+def path_cost(cost: np.ndarray, order) -> float:
+    return float(sum(cost[a, b] for a, b in zip(order, order[1:])))
+
+
+def nearest_neighbour(cost: np.ndarray) -> list:
+    n = len(cost)
+    order, left = [0], set(range(1, n - 1))
+    while left:
+        current = min(left, key=lambda point: (cost[order[-1], point], point))
+        order.append(current)
+        left.remove(current)
+    return order + [n - 1]
+
+
+def euclidean(points: np.ndarray) -> np.ndarray:
+    return np.linalg.norm(points[:, None] - points[None, :], axis=2)
+
+
+@pytest.mark.parametrize("n", [0, 1, 2, 3])
+def test_short_trips_keep_their_order(n):
+    assert solve_stop_order(np.ones((n, n))) == list(range(n))
+
+
+@pytest.mark.parametrize("seed", range(20))
+@pytest.mark.parametrize("n", [4, 6, 10, 25])
+@pytest.mark.parametrize("symmetric", [True, False])
+def test_valid_order_never_worse_than_nearest_neighbour(seed, n, symmetric):
+    rng = np.random.default_rng(seed)
+    cost = euclidean(rng.random((n, 2)))
+    if not symmetric:
+        # One-way streets and hills: travel costs differ by direction
+        cost = cost * rng.uniform(0.5, 1.5, size=(n, n))
+    
+    order = solve_stop_order(cost)
+    
+    assert sorted(order) == list(range(n))
+    assert order[0] == 0 and order[-1] == n - 1
+    assert path_cost(cost, order) <= path_cost(cost, nearest_neighbour(cost)) + 1e-9
+
+
+def test_untangles_a_crossing_tour():
+    # Stops along a line, listed out of order: the best path visits them left to right
+    xs = np.array([0.0, 3.0, 1.0, 4.0, 2.0, 5.0])
+    cost = np.abs(xs[:, None] - xs[None, :])
+    
+    order = solve_stop_order(cost)
+    
+    assert [xs[i] for i in order] == sorted(xs)
+    assert path_cost(cost, order) == pytest.approx(5.0)
+
+
+def test_within_five_percent_of_optimum_on_small_trips():
+    from itertools import permutations
+    
+    rng = np.random.default_rng(7)
+    for _ in range(10):
+        cost = euclidean(rng.random((7, 2)))
+        best = min(path_cost(cost, (0, *middle, 6)) for middle in permutations(range(1, 6)))
+        assert path_cost(cost, solve_stop_order(cost)) == pytest.approx(best, rel=0.05)
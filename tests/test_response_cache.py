@@ -0,0 +1,102 @@
+import os
+
+import pytest
+
+from travel_core.cache import PersistentCache, ResponseCache
+
+QUESTION = "What are the best places to visit in Goa?"
+ANSWER = "Beaches in the north, churches in Old Goa."
+SCOPE = "command-r:0.7"
+
+
+def prompt_for(question: str) -> str:
+    return f"You are a travel assistant.\n\n{question}"
+
+
+@pytest.fixture
+def make_cache(tmp_path):
+    def make(**kwargs) -> ResponseCache:
+        store = PersistentCache(os.path.join(tmp_path, "responses.sqlite3"), table="responses",
+                                max_entries=kwargs.pop("max_entries", 100))
+        return ResponseCache(store, **kwargs)
+    return make
+
+
+def test_exact_hit(make_cache):
+    cache = make_cache()
+    cache.set(QUESTION, prompt_for(QUESTION), SCOPE, ANSWER)
+    
+    assert cache.get(QUESTION, prompt_for(QUESTION), SCOPE, semantic=False) == ANSWER
+    # Normalization: case and whitespace don't matter
+    prompt = prompt_for(QUESTION).upper().replace(" ", "  ")
+    assert cache.get(QUESTION, prompt, SCOPE, semantic=False) == ANSWER
+
+
+def test_exact_tier_survives_restart(make_cache):
+    make_cache().set(QUESTION, prompt_for(QUESTION), SCOPE, ANSWER)
+    
+    assert make_cache().get(QUESTION, prompt_for(QUESTION), SCOPE) == ANSWER
+
+
+def test_paraphrase_above_threshold_hits(make_cache):
+    cache = make_cache()
+    cache.set(QUESTION, prompt_for(QUESTION), SCOPE, ANSWER)
+    paraphrase = "Best places to visit in Goa, please?"
+    
+    assert cache.get(paraphrase, prompt_for(paraphrase), SCOPE, semantic=False) is None
+    assert cache.get(paraphrase, prompt_for(paraphrase), SCOPE) == ANSWER
+
+
+def test_different_question_below_threshold_misses(make_cache):
+    cache = make_cache()
+    cache.set(QUESTION, prompt_for(QUESTION), SCOPE, ANSWER)
+    
+    for question in ("What local food should I try in Pune?", "Best places to visit in Kerala?"):
+        assert cache.get(question, prompt_for(question), SCOPE) is None
+
+
+@pytest.mark.parametrize("similarity, hit", [(0.8, True), (0.9, False)])
+def test_similarity_threshold(make_cache, similarity, hit):
+    # Cosine similarity of these two is about 0.85
+    question = "What are the best beaches and places to visit in Goa during the December holidays?"
+    paraphrase = "best beaches and places to visit in Goa during the December holidays with family"
+    cache = make_cache(similarity=similarity)
+    cache.set(question, prompt_for(question), SCOPE, ANSWER)
+    
+    assert cache.get(paraphrase, prompt_for(paraphrase), SCOPE) == (ANSWER if hit else None)
+
+
+def test_paraphrase_only_matches_within_scope(make_cache):
+    cache = make_cache()
+    cache.set(QUESTION, prompt_for(QUESTION), SCOPE, ANSWER)
+    
+    assert cache.get(QUESTION, prompt_for(QUESTION), "command-r:0.3") is None
+
+
+def test_entries_expire_after_ttl(make_cache, clock):
+    cache = make_cache(ttl=60)
+    cache.set(QUESTION, prompt_for(QUESTION), SCOPE, ANSWER)
+    
+    clock.advance(59)
+    assert cache.get(QUESTION, prompt_for(QUESTION), SCOPE) == ANSWER
+    clock.advance(2)
+    assert cache.get(QUESTION, prompt_for(QUESTION), SCOPE) is None
+
+
+def test_least_recently_used_entry_is_evicted(make_cache, clock):
+    cache = make_cache(max_entries=2)
+    cache.cache.EVICT_EVERY = 1
+    questions = [f"What are the best places to visit in {place}?" for place in ("Goa", "Pune", "Agra")]
+    
+    cache.set(questions[0], prompt_for(questions[0]), SCOPE, "goa")
+    clock.advance(1)
+    cache.set(questions[1], prompt_for(questions[1]), SCOPE, "pune")
+    # Reading Goa's answer makes Pune's the least recently used
+    clock.advance(PersistentCache.TOUCH_INTERVAL + 1)
+    assert cache.get(questions[0], prompt_for(questions[0]), SCOPE, semantic=False) == "goa"
+    clock.advance(1)
+    cache.set(questions[2], prompt_for(questions[2]), SCOPE, "agra")
+    
+    assert cache.get(questions[0], prompt_for(questions[0]), SCOPE, semantic=False) == "goa"
+    assert cache.get(questions[1], prompt_for(questions[1]), SCOPE) is None
+    assert cache.get(questions[2], prompt_for(questions[2]), SCOPE, semantic=False) == "agra"
@@ -0,0 +1,87 @@
+import json
+import sys
+
+import numpy as np
+import pytest
+
+from benchmarks.fake_upstreams import make_route
+from travel_core.route import CompactRoute, compact_route, route_geojson
+
+
+def deep_sizeof(value) -> int:
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        size += sum(deep_sizeof(k) + deep_sizeof(v) for k, v in value.items())
+    elif isinstance(value, list):
+        size += sum(deep_sizeof(v) for v in value)
+    return size
+
+
+def ors_response(elevation: bool = False, extra_info=()) -> dict:
+    """A fake directions response with coordinates at the precision ORS reports"""
+    route = make_route([[72.8777, 19.0760], [73.4070, 18.7546], [73.8567, 18.5204]], 200, 6,
+                       alternatives=3, elevation=elevation, extra_info=list(extra_info))
+    for feature in route["features"]:
+        coordinates = [[round(lon, 6), round(lat, 6), *point[2:]] for lon, lat, *point in
+                       feature["geometry"]["coordinates"]]
+        feature["geometry"]["coordinates"] = coordinates
+        lons, lats = [c[0] for c in coordinates], [c[1] for c in coordinates]
+        feature["bbox"] = [min(lons), min(lats), max(lons), max(lats)]
+    boxes = np.array([feature["bbox"] for feature in route["features"]])
+    route["bbox"] = [*boxes[:, :2].min(axis=0).tolist(), *boxes[:, 2:].max(axis=0).tolist()]
+    route["metadata"] = {"service": "routing", "query": {"profile": "driving-car", "alternative_routes": True}}
+    return route
+
+
+@pytest.mark.parametrize("elevation, extra_info", [
+    (False, ()),
+    (True, ("tollways", "waycategory")),
+])
+def test_geojson_round_trip(elevation, extra_info):
+    route = ors_response(elevation, extra_info)
+    original = json.loads(json.dumps(route))
+    
+    assert CompactRoute.from_geojson(route).to_geojson() == original
+
+
+def test_round_trip_of_a_route_without_steps():
+    route = ors_response()
+    for feature in route["features"]:
+        for segment in feature["properties"]["segments"]:
+            segment["steps"] = []
+    
+    assert CompactRoute.from_geojson(route).to_geojson() == route
+
+
+def test_holds_a_fraction_of_the_geojson_memory():
+    route = ors_response(True, ("tollways",))
+    compact = CompactRoute.from_geojson(route)
+    
+    assert compact.nbytes < deep_sizeof(route) / 5
+
+
+def test_with_main_reorders_without_copying():
+    compact = CompactRoute.from_geojson(ors_response())
+    switched = compact.with_main(2)
+    
+    assert switched.main is compact.routes[2]
+    assert switched.routes[1:] == [compact.routes[0], compact.routes[1]]
+    assert switched.to_geojson()["features"][0] == compact.to_geojson()["features"][2]
+
+
+def test_digest_identifies_the_routes():
+    route = ors_response()
+    digest = CompactRoute.from_geojson(route).digest()
+    
+    assert CompactRoute.from_geojson(json.loads(json.dumps(route))).digest() == digest
+    route["features"][0]["geometry"]["coordinates"][10][1] += 0.001
+    assert CompactRoute.from_geojson(route).digest() != digest
+
+
+def test_route_like_helpers():
+    route = ors_response()
+    compact = compact_route(route)
+    
+    assert compact_route(compact) is compact
+    assert route_geojson(route) is route
+    assert route_geojson(compact) == route
@@ -0,0 +1,165 @@
+import threading
+import time
+
+import pytest
+
+from benchmarks.fake_upstreams import place_coords
+from travel_core.service import TravelService
+from travel_core.singleflight import SingleFlight
+
+MUMBAI, PUNE = (19.0760, 72.8777), (18.5204, 73.8567)
+
+
+def requests_to(upstreams, endpoint: str) -> int:
+    return upstreams.requests.get(endpoint, 0)
+
+
+def test_geocode_resolves_and_caches(service, upstreams):
+    before = requests_to(upstreams, "nominatim")
+    
+    assert service.geocode("Mumbai") == pytest.approx(place_coords("Mumbai"))
+    assert service.geocode("  mumbai ") == pytest.approx(place_coords("Mumbai"))
+    assert requests_to(upstreams, "nominatim") == before + 1
+
+
+def test_geocode_not_found_is_cached(service, upstreams):
+    before = requests_to(upstreams, "nominatim")
+    
+    assert service.geocode("Nowhere Land") is None
+    assert service.geocode("Nowhere Land") is None
+    assert requests_to(upstreams, "nominatim") == before + 1
+
+
+def test_geocode_many_queries_each_name_once(service, upstreams):
+    before = requests_to(upstreams, "nominatim")
+    names = ["Pune", "Goa", "pune", "Nashik", "Goa ", "Nowhere Land"]
+    
+    results, errors = service.geocode_many(names)
+    
+    assert errors == {}
+    assert set(results) == set(names)
+    assert results["pune"] == results["Pune"] == pytest.approx(place_coords("Pune"))
+    assert results["Nowhere Land"] is None
+    assert requests_to(upstreams, "nominatim") == before + 4
+
+
+def test_route_is_fetched_once_then_cached(service, upstreams):
+    before = requests_to(upstreams, "directions")
+    
+    first = service.route(MUMBAI, PUNE)
+    second = service.route(MUMBAI, PUNE)
+    
+    assert not first.cached and second.cached and not second.stale
+    assert second.route == first.route
+    # Two-point routes come with alternatives, heights and extra info
+    assert len(first.route["features"]) == 2
+    assert len(first.route["features"][0]["geometry"]["coordinates"][0]) == 3
+    assert "tollways" in first.route["features"][0]["properties"]["extras"]
+    assert requests_to(upstreams, "directions") == before + 1
+
+
+def test_route_through_waypoints(service):
+    stops = [(18.75, 73.40)]
+    route = service.route(MUMBAI, PUNE, waypoints=stops).route
+    
+    assert len(route["features"]) == 1
+    assert len(route["features"][0]["properties"]["segments"]) == 2
+
+
+def test_expired_route_served_stale_when_router_is_down(service, down_router):
+    fresh = service.route(MUMBAI, PUNE).route
+    outage = TravelService(router=down_router, route_cache=service.route_cache, flights=SingleFlight())
+    service.route_cache.ttl = 0
+    
+    result = outage.route(MUMBAI, PUNE)
+    
+    assert result.stale and result.cached
+    assert result.route == fresh
+    with pytest.raises(ConnectionError):
+        outage.route(MUMBAI, (18.9, 73.3))
+
+
+def test_isochrones_are_batched_and_cached(service, upstreams):
+    before = requests_to(upstreams, "isochrones")
+    
+    areas = service.isochrones([MUMBAI, PUNE], [10, 20])
+    
+    assert [(f["properties"]["center_index"], f["properties"]["minutes"]) for f in areas["features"]] == \
+        [(0, 10), (0, 20), (1, 10), (1, 20)]
+    sizes = [f["properties"]["area_km2"] for f in areas["features"]]
+    assert sizes[0] < sizes[1] and sizes[2] < sizes[3]
+    assert requests_to(upstreams, "isochrones") == before + 1
+    
+    # A centre a few metres away falls in the same cached cell
+    nearby = service.isochrones([(MUMBAI[0] + 0.0001, MUMBAI[1])], [20])
+    assert nearby["features"][0]["geometry"] == areas["features"][1]["geometry"]
+    assert requests_to(upstreams, "isochrones") == before + 1
+
+
+def test_route_weather_samples_the_main_route(service):
+    route = service.route(MUMBAI, PUNE).route
+    
+    weather = service.route_weather(route, samples=5)
+    
+    assert len(weather) == 5
+    distances = [point["distance_km"] for point in weather]
+    assert distances == sorted(distances) and distances[0] == 0
+    assert (weather[-1]["lat"], weather[-1]["lon"]) == pytest.approx(PUNE, abs=1e-3)
+    assert all("temperature_c" in point and "condition" in point for point in weather)
+
+
+def test_ask_caches_answers(service, upstreams):
+    before = requests_to(upstreams, "cohere")
+    
+    answer, cached = service.ask("What should I pack for Goa?")
+    again, cached_again = service.ask("What should I pack for Goa?")
+    
+    assert "suggestions" in answer and not cached
+    assert again == answer and cached_again
+    assert requests_to(upstreams, "cohere") == before + 1
+
+
+def wait_for_follower(service, request):
+    """Block until a second caller is waiting on the request's flight"""
+    deadline = time.monotonic() + 5
+    while time.monotonic() < deadline:
+        call = service.flights._calls.get(f"chat:{request.key}")
+        if call is not None and call.waiters:
+            return
+        time.sleep(0.005)
+    raise AssertionError("follower never joined")
+
+
+def test_identical_streams_are_coalesced(service, upstreams):
+    before = requests_to(upstreams, "cohere")
+    request = service.prepare_chat("Best time to visit Munnar?")
+    
+    leader = service.stream_answer(request)
+    first = next(leader)
+    followers = []
+    thread = threading.Thread(target=lambda: followers.append("".join(service.stream_answer(request))))
+    thread.start()
+    wait_for_follower(service, request)
+    text = first + "".join(leader)
+    thread.join(5)
+    
+    assert followers == [text]
+    assert requests_to(upstreams, "cohere") == before + 1
+    assert service.cached_answer(request) == text
+
+
+def test_follower_takes_over_an_abandoned_stream(service, upstreams):
+    before = requests_to(upstreams, "cohere")
+    request = service.prepare_chat("Best time to visit Hampi?")
+    
+    leader = service.stream_answer(request)
+    next(leader)
+    followers = []
+    thread = threading.Thread(target=lambda: followers.append("".join(service.stream_answer(request))))
+    thread.start()
+    wait_for_follower(service, request)
+    leader.close()
+    thread.join(5)
+    
+    assert len(followers) == 1 and followers[0].rstrip().endswith("cash for tolls.")
+    assert requests_to(upstreams, "cohere") == before + 2
@@ -0,0 +1,115 @@
+import threading
+import time
+
+import pytest
+
+from travel_core.singleflight import LeaderCancelled, SingleFlight
+
+
+def wait_until(condition, timeout: float = 5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.001)
+
+
+def test_concurrent_callers_share_one_call():
+    flights = SingleFlight()
+    release = threading.Event()
+    calls, results = [], []
+    
+    def fetch():
+        calls.append(1)
+        release.wait(5)
+        return "route"
+    
+    def caller():
+        results.append(flights.do("key", fetch))
+    
+    threads = [threading.Thread(target=caller) for _ in range(8)]
+    threads[0].start()
+    wait_until(lambda: flights._calls)
+    for thread in threads[1:]:
+        thread.start()
+    # Every follower must be waiting before the leader returns
+    wait_until(lambda: flights._calls["key"].waiters == 7)
+    release.set()
+    for thread in threads:
+        thread.join(5)
+    
+    assert len(calls) == 1
+    assert results == ["route"] * 8
+
+
+def test_exception_reaches_every_waiter():
+    flights = SingleFlight()
+    release = threading.Event()
+    errors = []
+    
+    def fetch():
+        release.wait(5)
+        raise ConnectionError("upstream down")
+    
+    def caller():
+        try:
+            flights.do("key", fetch)
+        except ConnectionError as e:
+            errors.append(e)
+    
+    threads = [threading.Thread(target=caller) for _ in range(4)]
+    threads[0].start()
+    wait_until(lambda: flights._calls)
+    for thread in threads[1:]:
+        thread.start()
+    wait_until(lambda: flights._calls["key"].waiters == 3)
+    release.set()
+    for thread in threads:
+        thread.join(5)
+    
+    assert len(errors) == 4
+    assert len({id(e) for e in errors}) == 1
+
+
+def test_key_is_forgotten_once_finished():
+    flights = SingleFlight()
+    calls = []
+    
+    def fetch():
+        calls.append(1)
+        return len(calls)
+    
+    assert flights.do("key", fetch) == 1
+    assert flights.do("key", fetch) == 2
+    assert flights._calls == {}
+
+
+def test_different_keys_do_not_coalesce():
+    flights = SingleFlight()
+    assert flights.do("a", lambda: "a") == "a"
+    assert flights.do("b", lambda: "b") == "b"
+
+
+def test_cancelled_leader_hands_waiters_leader_cancelled():
+    flights = SingleFlight()
+    call, leader = flights.join("key")
+    follower, follower_leads = flights.join("key")
+    assert leader and not follower_leads and follower is call
+    
+    flights.finish("key", call, error=GeneratorExit())
+    with pytest.raises(LeaderCancelled):
+        follower.wait()
+
+
+def test_waiter_takes_over_from_cancelled_leader():
+    flights = SingleFlight()
+    call, _ = flights.join("key")
+    results = []
+    
+    waiter = threading.Thread(target=lambda: results.append(flights.do("key", lambda: "retried")))
+    waiter.start()
+    wait_until(lambda: call.waiters == 1)
+    flights.finish("key", call, error=KeyboardInterrupt())
+    waiter.join(5)
+    
+    assert results == ["retried"]
+    assert flights._calls == {}
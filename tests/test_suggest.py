@@ -0,0 +1,91 @@
+import pytest
+
+from travel_core.cache import open_geocode_store
+from travel_core.suggest import PlaceSuggester, merge_suggestions
+
+PLACES = {
+    "Mumbai": (19.076, 72.878),
+    "Mumbai Central": (18.969, 72.819),
+    "Gateway of India, Mumbai": (18.922, 72.835),
+    "Navi Mumbai": (19.033, 73.030),
+    "Munnar": (10.089, 77.060),
+    "Pune": (18.520, 73.857),
+    "São Tomé": (0.336, 6.727),
+}
+
+
+@pytest.fixture
+def suggester() -> PlaceSuggester:
+    suggester = PlaceSuggester()
+    for name, coords in PLACES.items():
+        suggester.add(name, coords)
+    return suggester
+
+
+def names(suggestions):
+    return [place["name"] for place in suggestions]
+
+
+def test_prefix_of_any_word(suggester):
+    assert set(names(suggester.suggest("mum", limit=10))) == {
+        "Mumbai", "Mumbai Central", "Gateway of India, Mumbai", "Navi Mumbai"
+    }
+    assert names(suggester.suggest("gate")) == ["Gateway of India, Mumbai"]
+    assert names(suggester.suggest("Mun")) == ["Munnar"]
+    assert suggester.suggest("xyz") == []
+    assert suggester.suggest("  ") == []
+
+
+def test_folding_ignores_case_accents_and_punctuation(suggester):
+    assert names(suggester.suggest("SAO TO")) == ["São Tomé"]
+    assert names(suggester.suggest("india mum")) == ["Gateway of India, Mumbai"]
+
+
+def test_whole_name_matches_rank_first_then_weight(suggester):
+    # "Navi Mumbai" and "Gateway of India, Mumbai" only match on a later word
+    ranked = names(suggester.suggest("mumbai", limit=10))
+    assert set(ranked[:2]) == {"Mumbai", "Mumbai Central"}
+    
+    suggester.add("Mumbai Central", weight=5)
+    suggester.add("Navi Mumbai", weight=50)
+    ranked = names(suggester.suggest("mumbai", limit=10))
+    assert ranked[:3] == ["Mumbai Central", "Mumbai", "Navi Mumbai"]
+
+
+def test_limit_and_repeated_adds(suggester):
+    assert len(suggester.suggest("m", limit=2)) == 2
+    
+    suggester.add("  mumbai ", weight=2)
+    assert len(suggester) == len(PLACES)
+    assert suggester.suggest("mumbai", limit=1)[0] == {"name": "Mumbai", "coords": PLACES["Mumbai"], "weight": 3.0}
+    assert suggester.lookup("MUMBAI") == PLACES["Mumbai"]
+    assert suggester.lookup("Chennai") is None
+
+
+def test_merge_suggestions_drops_repeats():
+    own = [{"name": "Mumbai", "coords": None}]
+    others = [{"name": "mumbai", "coords": (19.0, 72.8)}, {"name": "Munnar", "coords": None}]
+    
+    assert names(merge_suggestions(own, others)) == ["Mumbai", "Munnar"]
+    assert names(merge_suggestions(own, others, limit=1)) == ["Mumbai"]
+
+
+def test_names_round_trip_through_the_geocode_store(tmp_path):
+    store = open_geocode_store(str(tmp_path))
+    store.save("Gateway of India,  Mumbai", PLACES["Gateway of India, Mumbai"])
+    store.save("Navi Mumbai", PLACES["Navi Mumbai"])
+    store.save("Nowhere Land", None)
+    
+    # A new process seeds its suggestions from the store
+    suggester = PlaceSuggester()
+    for name, coords in open_geocode_store(str(tmp_path)).known_places(100):
+        suggester.add(name, coords)
+    
+    assert len(suggester) == 2
+    assert suggester.suggest("gateway") == [
+        {"name": "Gateway of India, Mumbai", "coords": PLACES["Gateway of India, Mumbai"], "weight": 1.0}
+    ]
+    assert names(suggester.suggest("navi")) == ["Navi Mumbai"]
+    assert store.lookup("gateway of india, mumbai") == (True, PLACES["Gateway of India, Mumbai"])
+    assert store.lookup("Nowhere Land") == (True, None)
+    assert store.lookup("Chennai") == (False, None)
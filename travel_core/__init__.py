@@ -0,0 +1,101 @@
+"""UI-free core of the Smart Travel Companion
+
+Geocoding, routing, directions and the travel assistant, usable from the
+Streamlit app, the HTTP API in ``travel_core.api`` or any other caller.
+"""
+
+from .assistant import ConversationMemory, build_prompt, stream_chat_text
+from .batch import BatchRouter, ResultWriter, read_trips, run_batch, trip_columns
+from .cache import (
+    GeocodeStore,
+    IsochroneCache,
+    PersistentCache,
+    ResponseCache,
+    RouteCache,
+    open_geocode_store,
+    open_isochrone_cache,
+    open_response_cache,
+    open_route_cache,
+)
+from .clients import RateLimitedRouter, create_cohere_client, create_ors_client
+from .compare import compare_routes
+from .directions import DirectionsView, build_directions, directions_from_steps, format_directions
+from .export import EXPORT_FORMATS, encode_polyline, export_route
+from .gazetteer import GazetteerIndex, LocalGeocoder, build_index, fold_name, open_gazetteer
+from .geometry import geohash_cell, merge_route_legs, route_latlon, simplification_tolerance, simplify_line
+from .history import HistoryStore, open_history_store
+from .metrics import Metrics, metrics
+from .optimize import solve_stop_order
+from .providers import FallbackGeocoder, NominatimGeocoder, create_geocoder
+from .ratelimit import RateLimiter
+from .route import CompactRoute, RouteLine, compact_route, route_geojson
+from .service import ChatRequest, RouteResult, TravelService, make_history_entry
+from .singleflight import LeaderCancelled, SingleFlight
+from .suggest import PlaceSuggester, merge_suggestions
+from .weather import OpenMeteoWeather, StubWeather, WeatherService, open_weather_service
+
+__all__ = [
+    "EXPORT_FORMATS",
+    "BatchRouter",
+    "ChatRequest",
+    "CompactRoute",
+    "ConversationMemory",
+    "DirectionsView",
+    "FallbackGeocoder",
+    "GazetteerIndex",
+    "GeocodeStore",
+    "HistoryStore",
+    "IsochroneCache",
+    "LeaderCancelled",
+    "LocalGeocoder",
+    "Metrics",
+    "NominatimGeocoder",
+    "OpenMeteoWeather",
+    "PersistentCache",
+    "PlaceSuggester",
+    "RateLimitedRouter",
+    "RateLimiter",
+    "ResultWriter",
+    "ResponseCache",
+    "RouteCache",
+    "RouteLine",
+    "RouteResult",
+    "SingleFlight",
+    "StubWeather",
+    "TravelService",
+    "WeatherService",
+    "build_directions",
+    "build_index",
+    "build_prompt",
+    "compare_routes",
+    "compact_route",
+    "create_cohere_client",
+    "create_geocoder",
+    "create_ors_client",
+    "directions_from_steps",
+    "encode_polyline",
+    "export_route",
+    "fold_name",
+    "format_directions",
+    "geohash_cell",
+    "make_history_entry",
+    "merge_route_legs",
+    "merge_suggestions",
+    "metrics",
+    "open_gazetteer",
+    "open_geocode_store",
+    "open_history_store",
+    "open_isochrone_cache",
+    "open_response_cache",
+    "open_route_cache",
+    "open_weather_service",
+    "read_trips",
+    "route_geojson",
+    "route_latlon",
+    "run_batch",
+    "simplification_tolerance",
+    "simplify_line",
+    "solve_stop_order",
+    "stream_chat_text",
+    "trip_columns",
+]
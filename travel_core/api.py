@@ -0,0 +1,313 @@
+"""Async HTTP API over the travel service
+
+Run with ``python -m travel_core.api`` (needs ``starlette`` and ``uvicorn``).
+API keys are read from the ORS_API_KEY and COHERE_API_KEY environment
+variables. Blocking upstream calls run in the worker thread pool so the
+event loop keeps serving other requests.
+
+Endpoints:
+    GET  /health
+    GET  /geocode?q=<place>
+    POST /route  {"start", "end", "stops", "profile", "preference",
+                  "avoid_features", "optimize", "format"}
+    POST /isochrones  {"centers", "minutes", "profile"}
+    POST /ask    {"question", "history", "context"}
+    GET  /metrics       Prometheus text format
+    GET  /metrics.json  the same values as JSON, with p50/p95/p99 latencies
+
+Places may be given as names or as [lat, lon] pairs; "stops" and "centers"
+are lists of places. "history" is a list of {"role", "content"} turns with
+role USER or CHATBOT ("message" is accepted in place of "content"). Bodies
+that don't have this shape are answered with 400; 502 means an upstream
+service failed. With a "format" from
+``travel_core.export.EXPORT_FORMATS`` (gpx, geojson, geojson.gz, polyline,
+csv) /route streams the route in that format instead of returning JSON.
+/isochrones returns the areas reachable from every centre within each of
+the given minutes as a GeoJSON FeatureCollection, fetched in one batch.
+"""
+
+import argparse
+import os
+from typing import Optional, Tuple, List, Dict
+
+from starlette.applications import Starlette
+from starlette.concurrency import run_in_threadpool
+from starlette.requests import Request
+from starlette.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from starlette.routing import Route
+
+from .cache import open_geocode_store, open_isochrone_cache, open_response_cache, open_route_cache
+from .clients import create_cohere_client, create_ors_client
+from .compare import compare_routes
+from .export import EXPORT_FORMATS, export_route
+from .metrics import metrics
+from .providers import create_geocoder
+from .route import CompactRoute
+from .service import TravelService
+from .weather import open_weather_service
+
+
+def build_service_from_env() -> TravelService:
+    """Build a service with the default providers and the shared caches"""
+    router = None
+    if os.environ.get("ORS_API_KEY"):
+        router = create_ors_client(os.environ["ORS_API_KEY"])
+    
+    chat_client = None
+    if os.environ.get("COHERE_API_KEY"):
+        chat_client = create_cohere_client(os.environ["COHERE_API_KEY"])
+    
+    return TravelService(
+        geocoder=create_geocoder(),
+        router=router,
+        chat_client=chat_client,
+        geocode_store=open_geocode_store(),
+        route_cache=open_route_cache(),
+        response_cache=open_response_cache(),
+        weather=open_weather_service(),
+        isochrone_cache=open_isochrone_cache()
+    )
+
+
+class BadRequest(Exception):
+    """Raised for malformed or unresolvable request input"""
+
+
+CHAT_ROLES = ("USER", "CHATBOT")
+
+
+async def read_body(request: Request) -> Dict:
+    """The request's JSON body, which must be an object"""
+    try:
+        body = await request.json()
+    except ValueError as e:
+        raise BadRequest(f"Invalid JSON: {e}")
+    if not isinstance(body, dict):
+        raise BadRequest("The request body must be a JSON object")
+    return body
+
+
+def _is_number(value) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def check_place(place, field: str):
+    """A place name or a [lat, lon] pair"""
+    if isinstance(place, str) and place.strip():
+        return
+    if isinstance(place, (list, tuple)) and len(place) == 2 and all(_is_number(c) for c in place):
+        return
+    raise BadRequest(f"'{field}' must be a place name or a [lat, lon] pair, got {place!r}")
+
+
+def check_places(places, field: str):
+    """A list of places"""
+    if not isinstance(places, list):
+        raise BadRequest(f"'{field}' must be a list of place names or [lat, lon] pairs")
+    for place in places:
+        check_place(place, field)
+
+
+def check_strings(values, field: str):
+    """An optional list of strings"""
+    if values is not None and not (isinstance(values, list) and all(isinstance(v, str) for v in values)):
+        raise BadRequest(f"'{field}' must be a list of strings")
+
+
+def chat_history(history) -> List[Dict]:
+    """Validate chat turns and convert them to the {"role", "message"} form the service uses"""
+    if history is None:
+        return []
+    if not isinstance(history, list):
+        raise BadRequest("'history' must be a list of {\"role\", \"content\"} turns")
+    turns = []
+    for turn in history:
+        text = turn.get("content", turn.get("message")) if isinstance(turn, dict) else None
+        role = turn.get("role") if isinstance(turn, dict) else None
+        if not isinstance(role, str) or role.upper() not in CHAT_ROLES or not isinstance(text, str):
+            raise BadRequest(f"Invalid history turn {turn!r}; expected "
+                             f"{{\"role\": \"USER\" or \"CHATBOT\", \"content\": text}}")
+        turns.append({"role": role.upper(), "message": text})
+    return turns
+
+
+def create_app(service: Optional[TravelService] = None) -> Starlette:
+    """Create the HTTP application around a travel service"""
+    service = service or build_service_from_env()
+    
+    async def resolve_places(places: List) -> List[Tuple[float, float]]:
+        """Turn place names or [lat, lon] pairs into coordinates"""
+        names = [p for p in places if isinstance(p, str)]
+        results, errors = await run_in_threadpool(service.geocode_many, names) if names else ({}, {})
+        if errors:
+            name, error = next(iter(errors.items()))
+            raise RuntimeError(f"Geocoding '{name}' failed: {error}")
+        
+        coordinates = []
+        for place in places:
+            if isinstance(place, str):
+                if not results[place]:
+                    raise BadRequest(f"Could not find '{place}'")
+                coordinates.append(results[place])
+            elif isinstance(place, (list, tuple)) and len(place) == 2:
+                coordinates.append((float(place[0]), float(place[1])))
+            else:
+                raise BadRequest(f"Invalid place: {place!r}")
+        return coordinates
+    
+    async def health(request: Request) -> JSONResponse:
+        return JSONResponse({"status": "ok"})
+    
+    async def geocode(request: Request) -> JSONResponse:
+        query = request.query_params.get("q", "").strip()
+        if not query:
+            return JSONResponse({"error": "Missing query parameter 'q'"}, status_code=400)
+        try:
+            coords = await run_in_threadpool(service.geocode, query)
+        except Exception as e:
+            return JSONResponse({"error": str(e)}, status_code=502)
+        return JSONResponse({"query": query, "coords": list(coords) if coords else None})
+    
+    async def route(request: Request) -> JSONResponse:
+        try:
+            body = await read_body(request)
+            if "start" not in body or "end" not in body:
+                raise BadRequest("Both 'start' and 'end' are required")
+            check_place(body["start"], "start")
+            check_place(body["end"], "end")
+            stop_places = body.get("stops") or []
+            check_places(stop_places, "stops")
+            check_strings(body.get("avoid_features"), "avoid_features")
+            fmt = body.get("format")
+            if fmt is not None and (not isinstance(fmt, str) or fmt not in EXPORT_FORMATS):
+                raise BadRequest(f"Unknown format {fmt!r}; expected one of {', '.join(EXPORT_FORMATS)}")
+            profile = body.get("profile", "driving-car")
+            if not isinstance(profile, str) or not isinstance(body.get("preference", "fastest"), str):
+                raise BadRequest("'profile' and 'preference' must be strings")
+        except BadRequest as e:
+            return JSONResponse({"error": str(e)}, status_code=400)
+        
+        try:
+            start, end, *stops = await resolve_places([body["start"], body["end"], *stop_places])
+            
+            order = list(range(len(stops)))
+            if body.get("optimize", True) and len(stops) > 1:
+                order = await run_in_threadpool(service.optimize_stop_order, start, stops, end, profile)
+            stops = [stops[i] for i in order]
+            
+            result = await run_in_threadpool(
+                service.route, start, end, profile,
+                body.get("preference", "fastest"),
+                body.get("avoid_features"),
+                stops
+            )
+        except BadRequest as e:
+            return JSONResponse({"error": str(e)}, status_code=400)
+        except ValueError as e:
+            return JSONResponse({"error": f"Invalid request: {e}"}, status_code=400)
+        except Exception as e:
+            return JSONResponse({"error": str(e)}, status_code=502)
+        
+        if fmt is not None:
+            places = [body["start"], *(stop_places[i] for i in order), body["end"]]
+            leg_names = [str(place) for place in places]
+            export_format = EXPORT_FORMATS[fmt]
+            return StreamingResponse(
+                export_route(result.route, fmt, leg_names),
+                media_type=export_format.mime,
+                headers={"Content-Disposition": f'attachment; filename="route.{export_format.extension}"'}
+            )
+        
+        comparison = await run_in_threadpool(compare_routes, CompactRoute.from_geojson(result.route))
+        return JSONResponse({
+            "route": result.route,
+            "comparison": comparison,
+            "stop_order": order,
+            "cached": result.cached,
+            "stale": result.stale
+        })
+    
+    async def isochrones(request: Request) -> JSONResponse:
+        try:
+            body = await read_body(request)
+            centers, minutes = body.get("centers"), body.get("minutes")
+            if not centers or not minutes:
+                raise BadRequest("Both 'centers' and 'minutes' are required")
+            check_places(centers, "centers")
+            if not isinstance(minutes, list) or not all(_is_number(m) and m > 0 for m in minutes):
+                raise BadRequest("'minutes' must be a list of positive numbers")
+            if not isinstance(body.get("profile", "driving-car"), str):
+                raise BadRequest("'profile' must be a string")
+        except BadRequest as e:
+            return JSONResponse({"error": str(e)}, status_code=400)
+        
+        try:
+            coordinates = await resolve_places(centers)
+            result = await run_in_threadpool(
+                service.isochrones, coordinates, minutes, body.get("profile", "driving-car")
+            )
+        except BadRequest as e:
+            return JSONResponse({"error": str(e)}, status_code=400)
+        except ValueError as e:
+            return JSONResponse({"error": f"Invalid request: {e}"}, status_code=400)
+        except Exception as e:
+            return JSONResponse({"error": str(e)}, status_code=502)
+        return JSONResponse(result)
+    
+    async def ask(request: Request) -> JSONResponse:
+        try:
+            body = await read_body(request)
+            question = body.get("question")
+            if not isinstance(question, str) or not question.strip():
+                raise BadRequest("Missing 'question'")
+            history = chat_history(body.get("history"))
+            check_strings(body.get("context"), "context")
+        except BadRequest as e:
+            return JSONResponse({"error": str(e)}, status_code=400)
+        
+        try:
+            text, cached = await run_in_threadpool(
+                service.ask, question.strip(), history, body.get("context")
+            )
+        except Exception as e:
+            return JSONResponse({"error": str(e)}, status_code=502)
+        return JSONResponse({"text": text, "cached": cached})
+    
+    async def prometheus_metrics(request: Request) -> PlainTextResponse:
+        return PlainTextResponse(metrics.prometheus(), media_type="text/plain; version=0.0.4")
+    
+    async def json_metrics(request: Request) -> JSONResponse:
+        return JSONResponse(metrics.snapshot())
+    
+    return Starlette(routes=[
+        Route("/health", health),
+        Route("/geocode", geocode),
+        Route("/route", route, methods=["POST"]),
+        Route("/isochrones", isochrones, methods=["POST"]),
+        Route("/ask", ask, methods=["POST"]),
+        Route("/metrics", prometheus_metrics),
+        Route("/metrics.json", json_metrics),
+    ])
+
+
+def main():
+    """Serve the API with uvicorn"""
+    import uvicorn
+    
+    parser = argparse.ArgumentParser(description="Smart Travel Companion HTTP API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=1)
+    args = parser.parse_args()
+    
+    uvicorn.run(
+        "travel_core.api:create_app",
+        factory=True,
+        host=args.host,
+        port=args.port,
+        workers=args.workers
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""Travel assistant prompt building, conversation memory and streaming"""
+
+import re
+from typing import Optional, Tuple, List, Dict, Iterator
+
+from .config import ASSISTANT_CONTEXT_TOKENS, ASSISTANT_MAX_TURNS
+
+
+class ConversationMemory:
+    """Token-budgeted chat history for the assistant
+    
+    Token counts are estimated at four characters per token, which is close
+    enough for budgeting without loading a tokenizer.
+    """
+
+    def __init__(self, max_tokens: int = ASSISTANT_CONTEXT_TOKENS,
+                 summary_share: float = 0.15, max_turns: int = ASSISTANT_MAX_TURNS):
+        self.max_tokens = max_tokens
+        self.summary_tokens = int(max_tokens * summary_share)
+        self.max_turns = max_turns
+    
+    @staticmethod
+    def estimate_tokens(text: str) -> int:
+        """Rough token count of a piece of text"""
+        return len(text) // 4 + 1
+    
+    def append(self, history: List[Dict], question: str, answer: str) -> List[Dict]:
+        """Return the history with a new question/answer pair, bounded in length"""
+        history = history + [
+            {"role": "USER", "message": question},
+            {"role": "CHATBOT", "message": answer}
+        ]
+        return history[-self.max_turns:]
+    
+    def fit(self, history: List[Dict], reserved_tokens: int = 0) -> Tuple[List[Dict], Optional[str]]:
+        """Return the most recent turns that fit the budget and a summary of the rest"""
+        budget = self.max_tokens - reserved_tokens - self.summary_tokens
+        kept = []
+        used = 0
+        
+        # Walk back over whole question/answer pairs, newest first
+        for start in range(len(history) - 2, -1, -2):
+            pair = history[start:start + 2]
+            cost = sum(self.estimate_tokens(turn["message"]) for turn in pair)
+            if used + cost > budget:
+                break
+            kept[:0] = pair
+            used += cost
+        
+        dropped = history[:len(history) - len(kept)]
+        return kept, self.summarize(dropped)
+    
+    def summarize(self, turns: List[Dict]) -> Optional[str]:
+        """Compress dropped turns into the questions the user asked, newest kept first"""
+        questions = [turn["message"].strip() for turn in turns if turn["role"] == "USER"]
+        if not questions:
+            return None
+        
+        prefix = "Earlier in this conversation the user asked about: "
+        summary = []
+        used = self.estimate_tokens(prefix)
+        for question in reversed(questions):
+            # Keep just the first sentence of each earlier question
+            question = re.split(r"(?<=[.?!])\s", question, maxsplit=1)[0][:200]
+            cost = self.estimate_tokens(question) + 1
+            if used + cost > self.summary_tokens:
+                break
+            summary.insert(0, question)
+            used += cost
+        return prefix + "; ".join(summary) if summary else None
+
+
+def stream_chat_text(client, **chat_kwargs) -> Iterator[str]:
+    """Yield text chunks of a Cohere chat completion as they arrive
+    
+    Works with clients exposing ``chat_stream`` (Cohere SDK 5+) or
+    ``chat(stream=True)`` (SDK 4), and with any local fake that yields events
+    carrying ``event_type`` and ``text``.
+    """
+    if hasattr(client, "chat_stream"):
+        events = client.chat_stream(**chat_kwargs)
+    else:
+        events = client.chat(stream=True, **chat_kwargs)
+    
+    for event in events:
+        if getattr(event, "event_type", None) == "text-generation" and event.text:
+            yield event.text
+
+
+def build_prompt(user_query: str, context: Optional[List[str]] = None) -> str:
+    """Build the travel assistant prompt with optional context lines"""
+    context_block = "\n".join(f"                    {line}" for line in context or [])
+    if context_block:
+        context_block = f"\n                    Context:\n{context_block}\n"
+    
+    # Enhanced prompt for better travel responses
+    return f"""
+                    You are a knowledgeable travel assistant. Provide helpful, accurate, and engaging travel advice.
+                    Focus on practical information, local insights, and actionable recommendations.
+                    {context_block}
+                    User Question: {user_query}
+                    
+                    Please provide a comprehensive response covering:
+                    - Direct answer to the question
+                    - Practical tips and recommendations
+                    - Local insights if applicable
+                    - Safety considerations if relevant
+                    """
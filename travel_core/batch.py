@@ -0,0 +1,350 @@
+"""Batch routing of trip lists from CSV or Parquet files
+
+Trips are read as a stream and routed a chunk at a time: each chunk's
+distinct place names are geocoded once, its distinct origin/destination
+pairs are routed concurrently through the service (so the shared rate
+limiters, caches and request coalescing all apply), and its results are
+appended to the output before the next chunk is read. Memory stays
+bounded by the chunk size whatever the length of the list.
+
+The output file doubles as the checkpoint: rerunning a job skips every
+trip already settled in it, and routes again the trips that failed with an
+error, replacing their rows. From the command line::
+
+    ORS_API_KEY=... python -m travel_core.batch trips.csv results.csv --geometry
+
+Input needs ``start`` and ``end`` columns of place names and may have an
+``id`` column; rows are numbered from 1 otherwise. Output is CSV or JSON
+Lines, chosen by file extension, with one row per trip.
+"""
+
+import argparse
+import csv
+import io
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+from typing import BinaryIO, Optional, Set, Tuple, Union, List, Dict, Iterable, Iterator
+
+from .cache import open_geocode_store, open_route_cache
+from .clients import create_ors_client
+from .config import BATCH_CHUNK_SIZE, BATCH_ROUTE_WORKERS
+from .export import encode_polyline
+from .geometry import route_latlon
+from .metrics import metrics
+from .providers import create_geocoder
+from .service import TravelService
+
+Coords = Tuple[float, float]
+Source = Union[str, BinaryIO]
+
+RESULT_COLUMNS = [
+    "id", "start", "end", "start_lat", "start_lon", "end_lat", "end_lon",
+    "distance_km", "duration_min", "status", "error"
+]
+
+# Statuses that rerunning a trip would not change; "error" rows are retried
+FINAL_STATUSES = {"ok", "not_found", "invalid"}
+
+
+def _is_parquet(source: Source) -> bool:
+    name = source if isinstance(source, str) else getattr(source, "name", "")
+    return name.lower().endswith((".parquet", ".pq"))
+
+
+def _csv_reader(source: Source) -> csv.DictReader:
+    text = (open(source, newline="", encoding="utf-8-sig") if isinstance(source, str)
+            else io.TextIOWrapper(source, encoding="utf-8-sig", newline=""))
+    return csv.DictReader(text)
+
+
+def _one_line(text: str) -> str:
+    # Rows are whole lines, which is how an interrupted run's last row is found
+    return " ".join(text.split())
+
+
+def trip_columns(source: Source) -> List[str]:
+    """Column names of a trip list"""
+    if _is_parquet(source):
+        import pyarrow.parquet as pq
+        return pq.ParquetFile(source).schema_arrow.names
+    if isinstance(source, str):
+        return list(_csv_reader(source).fieldnames or [])
+    # Read just the header of an upload, leaving it readable from the start again
+    header = source.readline().decode("utf-8-sig")
+    source.seek(0)
+    columns = next(csv.reader([header]), [])
+    return list(columns)
+
+
+def read_trips(source: Source, start_column: str = "start", end_column: str = "end",
+               id_column: str = "id") -> Iterator[Dict]:
+    """Stream trips from a CSV or Parquet file as {"id", "start", "end"} dicts"""
+    if _is_parquet(source):
+        import pyarrow.parquet as pq
+        parquet = pq.ParquetFile(source)
+        columns = parquet.schema_arrow.names
+        rows = (row for batch in parquet.iter_batches(batch_size=BATCH_CHUNK_SIZE) for row in batch.to_pylist())
+    else:
+        reader = _csv_reader(source)
+        columns = reader.fieldnames or []
+        rows = reader
+    
+    missing = [column for column in (start_column, end_column) if column not in columns]
+    if missing:
+        raise ValueError(f"Missing column(s) {', '.join(missing)}; found {', '.join(columns) or 'none'}")
+    has_id = id_column in columns
+    for number, row in enumerate(rows, 1):
+        yield {
+            "id": str(row[id_column]) if has_id else str(number),
+            "start": str(row[start_column] or "").strip(),
+            "end": str(row[end_column] or "").strip()
+        }
+
+
+class ResultWriter:
+    """Appends result rows to a CSV or JSON Lines file that is also the job checkpoint"""
+    
+    def __init__(self, path: str, columns: List[str]):
+        self.path = path
+        self.columns = columns
+        self.jsonl = path.lower().endswith((".jsonl", ".ndjson"))
+        self._file = None
+        self._writer = None
+    
+    def drop_partial_row(self):
+        """Cut off a row left half-written by an interrupted run"""
+        if os.path.exists(self.path):
+            with open(self.path, "rb+") as f:
+                # Scan back from the end for the last complete line
+                end = f.seek(0, os.SEEK_END)
+                while end > 0:
+                    start = max(0, end - 65536)
+                    f.seek(start)
+                    newline = f.read(end - start).rfind(b"\n")
+                    if newline >= 0:
+                        f.truncate(start + newline + 1)
+                        return
+                    end = start
+                f.truncate(0)
+    
+    def completed_ids(self) -> Set[str]:
+        """Ids of trips settled by an earlier run of the job
+        
+        Rows of trips that failed with an error are dropped from the file, so
+        the retried trips' new rows replace them rather than add to them.
+        """
+        self.drop_partial_row()
+        if not os.path.exists(self.path):
+            return set()
+        done = set()
+        retried = False
+        partial = f"{self.path}.partial"
+        with open(self.path, newline="", encoding="utf-8") as f, \
+                open(partial, "w", newline="", encoding="utf-8") as kept:
+            if self.jsonl:
+                for line in f:
+                    row = json.loads(line)
+                    if row.get("status") in FINAL_STATUSES:
+                        done.add(row["id"])
+                        kept.write(line)
+                    else:
+                        retried = True
+            else:
+                reader = csv.DictReader(f)
+                writer = csv.DictWriter(kept, fieldnames=reader.fieldnames or self.columns)
+                writer.writeheader()
+                for row in reader:
+                    if row.get("status") in FINAL_STATUSES:
+                        done.add(row["id"])
+                        writer.writerow(row)
+                    else:
+                        retried = True
+        if retried:
+            os.replace(partial, self.path)
+        else:
+            os.remove(partial)
+        return done
+    
+    def open(self) -> "ResultWriter":
+        """Open for appending, writing the CSV header only for a new file"""
+        self.drop_partial_row()
+        resuming = os.path.exists(self.path) and os.path.getsize(self.path) > 0
+        self._file = open(self.path, "a", newline="", encoding="utf-8")
+        if not self.jsonl:
+            self._writer = csv.DictWriter(self._file, fieldnames=self.columns)
+            if not resuming:
+                self._writer.writeheader()
+        return self
+    
+    def write(self, rows: List[Dict]):
+        """Append rows and flush them to disk"""
+        if self.jsonl:
+            self._file.write("".join(json.dumps(row) + "\n" for row in rows))
+        else:
+            self._writer.writerows(rows)
+        self._file.flush()
+    
+    def close(self):
+        if self._file:
+            self._file.close()
+    
+    def __enter__(self) -> "ResultWriter":
+        return self.open()
+    
+    def __exit__(self, *exc):
+        self.close()
+
+
+class BatchRouter:
+    """Geocodes and routes trip lists through a travel service, a chunk at a time"""
+    
+    def __init__(self, service: TravelService, profile: str = 'driving-car',
+                 preference: str = 'fastest', avoid_features: Optional[List[str]] = None,
+                 geometry: bool = False, workers: int = BATCH_ROUTE_WORKERS,
+                 chunk_size: int = BATCH_CHUNK_SIZE):
+        self.service = service
+        self.profile = profile
+        self.preference = preference
+        self.avoid_features = avoid_features
+        self.geometry = geometry
+        self.workers = workers
+        self.chunk_size = chunk_size
+    
+    @property
+    def columns(self) -> List[str]:
+        """Output columns, with the encoded route geometry when requested"""
+        return RESULT_COLUMNS + (["polyline"] if self.geometry else [])
+    
+    def run(self, trips: Iterable[Dict], skip: Iterable[str] = ()) -> Iterator[List[Dict]]:
+        """Route trips, yielding each chunk's results in input order; trips whose id is in skip are left out"""
+        skip = set(skip)
+        pending = (trip for trip in trips if trip["id"] not in skip)
+        while True:
+            chunk = list(islice(pending, self.chunk_size))
+            if not chunk:
+                return
+            with metrics.span("batch_chunk"):
+                yield self._route_chunk(chunk)
+    
+    def _route_chunk(self, trips: List[Dict]) -> List[Dict]:
+        """Geocode each distinct place and route each distinct pair of a chunk once"""
+        names = [name for trip in trips for name in (trip["start"], trip["end"]) if name]
+        locations, geocode_errors = self.service.geocode_many(names) if names else ({}, {})
+        
+        pairs = {}
+        for trip in trips:
+            start, end = locations.get(trip["start"]), locations.get(trip["end"])
+            if start and end:
+                pairs[(start, end)] = None
+        with ThreadPoolExecutor(max_workers=max(1, min(self.workers, len(pairs)))) as pool:
+            futures = {pair: pool.submit(self._route_pair, *pair) for pair in pairs}
+        
+        rows = []
+        for trip in trips:
+            start, end = locations.get(trip["start"]), locations.get(trip["end"])
+            row = {
+                "id": trip["id"],
+                "start": trip["start"],
+                "end": trip["end"],
+                "start_lat": round(start[0], 6) if start else None,
+                "start_lon": round(start[1], 6) if start else None,
+                "end_lat": round(end[0], 6) if end else None,
+                "end_lon": round(end[1], 6) if end else None,
+                "distance_km": None,
+                "duration_min": None,
+                "status": "ok",
+                "error": None
+            }
+            if self.geometry:
+                row["polyline"] = None
+            
+            if not trip["start"] or not trip["end"]:
+                row.update(status="invalid", error="Missing start or destination")
+            elif trip["start"] in geocode_errors or trip["end"] in geocode_errors:
+                name = trip["start"] if trip["start"] in geocode_errors else trip["end"]
+                row.update(status="error", error=_one_line(f"Geocoding '{name}' failed: {geocode_errors[name]}"))
+            elif not start or not end:
+                name = trip["start"] if not start else trip["end"]
+                row.update(status="not_found", error=f"Could not find '{name}'")
+            else:
+                try:
+                    row.update(futures[(start, end)].result())
+                except Exception as e:
+                    row.update(status="error", error=_one_line(f"Route calculation error: {e}"))
+            rows.append(row)
+        return rows
+    
+    def _route_pair(self, start: Coords, end: Coords) -> Dict:
+        """Distance, duration and optionally geometry of the main route between two points"""
+        result = self.service.route(start, end, self.profile, self.preference, self.avoid_features)
+        feature = result.route['features'][0]
+        summary = feature['properties'].get('summary', {})
+        values = {
+            "distance_km": round(summary.get('distance', 0) / 1000, 3),
+            "duration_min": round(summary.get('duration', 0) / 60, 2)
+        }
+        if self.geometry:
+            values["polyline"] = encode_polyline(route_latlon(feature))
+        return values
+
+
+def run_batch(router: BatchRouter, trips: Iterable[Dict], output: str) -> Iterator[List[Dict]]:
+    """Route trips into an output file, resuming after the trips it already holds"""
+    writer = ResultWriter(output, router.columns)
+    done = writer.completed_ids()
+    with writer:
+        for rows in router.run(trips, skip=done):
+            writer.write(rows)
+            yield rows
+
+
+def main():
+    """Route a trip list from the command line"""
+    parser = argparse.ArgumentParser(description="Route every trip in a CSV or Parquet file")
+    parser.add_argument("trips", help="CSV or Parquet file of trips")
+    parser.add_argument("output", help="Results file (.csv, or .jsonl for JSON Lines); rerun to resume")
+    parser.add_argument("--start-column", default="start")
+    parser.add_argument("--end-column", default="end")
+    parser.add_argument("--id-column", default="id")
+    parser.add_argument("--profile", default="driving-car")
+    parser.add_argument("--preference", default="fastest", choices=["fastest", "shortest", "recommended"])
+    parser.add_argument("--avoid", nargs="*", default=[], help="Features to avoid, e.g. tollways highways ferries")
+    parser.add_argument("--geometry", action="store_true", help="Include each route as an encoded polyline")
+    parser.add_argument("--workers", type=int, default=BATCH_ROUTE_WORKERS)
+    parser.add_argument("--chunk-size", type=int, default=BATCH_CHUNK_SIZE)
+    parser.add_argument("--restart", action="store_true", help="Discard earlier results instead of resuming")
+    args = parser.parse_args()
+    
+    if not os.environ.get("ORS_API_KEY"):
+        parser.error("Set ORS_API_KEY to route trips")
+    if args.restart and os.path.exists(args.output):
+        os.remove(args.output)
+    
+    service = TravelService(
+        geocoder=create_geocoder(),
+        router=create_ors_client(os.environ["ORS_API_KEY"]),
+        geocode_store=open_geocode_store(),
+        route_cache=open_route_cache()
+    )
+    router = BatchRouter(service, args.profile, args.preference, args.avoid, args.geometry,
+                         args.workers, args.chunk_size)
+    trips = read_trips(args.trips, args.start_column, args.end_column, args.id_column)
+    
+    started = time.perf_counter()
+    counts: Dict[str, int] = {}
+    for rows in run_batch(router, trips, args.output):
+        for row in rows:
+            counts[row["status"]] = counts.get(row["status"], 0) + 1
+        total = sum(counts.values())
+        rate = total / (time.perf_counter() - started)
+        summary = ", ".join(f"{count} {status}" for status, count in sorted(counts.items()))
+        print(f"{total} trips routed ({summary}), {rate:.1f}/s", file=sys.stderr)
+    print(f"Results in {args.output}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
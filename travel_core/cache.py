@@ -0,0 +1,391 @@
+"""Persistent caches shared by all worker processes"""
+
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import struct
+import threading
+import time
+import unicodedata
+import zlib
+from typing import Optional, Tuple, List, Dict
+
+import numpy as np
+
+from .config import (
+    CACHE_DIR,
+    ISOCHRONE_CACHE_TTL,
+    RESPONSE_CACHE_SIMILARITY,
+    RESPONSE_CACHE_TTL,
+    ROUTE_CACHE_MAX_BYTES,
+    ROUTE_CACHE_PRECISION,
+    ROUTE_CACHE_STALE_TTL,
+    ROUTE_CACHE_TTL,
+)
+
+
+class PersistentCache:
+    """SQLite-backed key/value store shared by all worker processes"""
+
+    # Only refresh the LRU timestamp of a hit entry once per this many seconds
+    TOUCH_INTERVAL = 60
+    # Check size limits once per this many writes
+    EVICT_EVERY = 64
+
+    def __init__(self, path: str, table: str = "cache",
+                 max_entries: int = 50000, max_bytes: Optional[int] = None):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.table = table
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._writes = 0
+        
+        # WAL mode lets readers in other processes proceed while one writes
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False,
+                                     isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(f"""
+            CREATE TABLE IF NOT EXISTS {table} (
+                key TEXT PRIMARY KEY,
+                value BLOB NOT NULL,
+                size INTEGER NOT NULL,
+                expires_at REAL,
+                last_used REAL NOT NULL
+            )
+        """)
+        self._conn.execute(
+            f"CREATE INDEX IF NOT EXISTS {table}_last_used ON {table}(last_used)"
+        )
+    
+    def get(self, key: str) -> Optional[bytes]:
+        """Return the stored value, or None if missing or expired"""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT value, expires_at, last_used FROM {self.table} WHERE key = ?",
+                (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            
+            value, expires_at, last_used = row
+            if expires_at is not None and expires_at <= now:
+                self._conn.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+                return None
+            
+            if now - last_used > self.TOUCH_INTERVAL:
+                self._conn.execute(
+                    f"UPDATE {self.table} SET last_used = ? WHERE key = ?", (now, key)
+                )
+            return value
+    
+    def set(self, key: str, value: bytes, ttl: Optional[float] = None):
+        """Store a value, optionally expiring after ttl seconds"""
+        now = time.time()
+        expires_at = now + ttl if ttl is not None else None
+        with self._lock:
+            self._conn.execute(
+                f"INSERT OR REPLACE INTO {self.table} "
+                f"(key, value, size, expires_at, last_used) VALUES (?, ?, ?, ?, ?)",
+                (key, value, len(value), expires_at, now)
+            )
+            self._writes += 1
+            if self._writes % self.EVICT_EVERY == 0:
+                self._evict(now)
+    
+    def recent(self, limit: int) -> List[Tuple[str, bytes]]:
+        """Return up to limit unexpired (key, value) pairs, most recently used first"""
+        with self._lock:
+            return self._conn.execute(
+                f"SELECT key, value FROM {self.table} "
+                f"WHERE expires_at IS NULL OR expires_at > ? "
+                f"ORDER BY last_used DESC LIMIT ?",
+                (time.time(), limit)
+            ).fetchall()
+    
+    def _evict(self, now: float):
+        """Drop expired entries, then least recently used ones over the limits"""
+        self._conn.execute(
+            f"DELETE FROM {self.table} WHERE expires_at IS NOT NULL AND expires_at <= ?",
+            (now,)
+        )
+        count, total_size = self._conn.execute(
+            f"SELECT COUNT(*), COALESCE(SUM(size), 0) FROM {self.table}"
+        ).fetchone()
+        
+        excess_entries = max(0, count - self.max_entries)
+        excess_bytes = max(0, total_size - self.max_bytes) if self.max_bytes else 0
+        if not excess_entries and not excess_bytes:
+            return
+        
+        victims = []
+        freed = 0
+        for key, size in self._conn.execute(
+            f"SELECT key, size FROM {self.table} ORDER BY last_used"
+        ):
+            if len(victims) >= excess_entries and freed >= excess_bytes:
+                break
+            victims.append((key,))
+            freed += size
+        self._conn.executemany(f"DELETE FROM {self.table} WHERE key = ?", victims)
+
+
+class GeocodeStore:
+    """Persistent geocode results keyed by normalized place name"""
+
+    def __init__(self, cache: PersistentCache,
+                 ttl: Optional[float] = 90 * 24 * 3600,
+                 negative_ttl: float = 6 * 3600):
+        self.cache = cache
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+    
+    @staticmethod
+    def normalize(place_name: str) -> str:
+        """Normalize a query so trivially different spellings share an entry"""
+        name = unicodedata.normalize("NFKC", place_name).casefold()
+        name = re.sub(r"\s*,\s*", ", ", name)
+        name = re.sub(r"\s+", " ", name)
+        return name.strip(" ,.;")
+    
+    @staticmethod
+    def _decode(value: bytes) -> Tuple[str, Optional[Tuple[float, float]]]:
+        entry = json.loads(value)
+        coords = entry["coords"]
+        return entry["name"], tuple(coords) if coords else None
+    
+    def lookup(self, place_name: str) -> Tuple[bool, Optional[Tuple[float, float]]]:
+        """Return (hit, coords); coords is None for a cached negative result"""
+        value = self.cache.get(self.normalize(place_name))
+        if value is None:
+            return False, None
+        return True, self._decode(value)[1]
+    
+    def save(self, place_name: str, coords: Optional[Tuple[float, float]]):
+        """Store a geocode result under the name as typed; misses are kept for a shorter time"""
+        ttl = self.ttl if coords else self.negative_ttl
+        entry = {"name": " ".join(place_name.split()), "coords": coords}
+        self.cache.set(self.normalize(place_name), json.dumps(entry).encode(), ttl)
+    
+    def known_places(self, limit: int) -> List[Tuple[str, Tuple[float, float]]]:
+        """Recently used (display name, coords) pairs that resolved to a place"""
+        places = []
+        for _, value in self.cache.recent(limit):
+            name, coords = self._decode(value)
+            if coords:
+                places.append((name, coords))
+        return places
+
+
+class RouteCache:
+    """Persistent cache of ORS directions responses stored as compressed GeoJSON"""
+
+    _HEADER = struct.Struct("<d")
+
+    def __init__(self, cache: PersistentCache, ttl: float = ROUTE_CACHE_TTL,
+                 stale_ttl: float = ROUTE_CACHE_STALE_TTL,
+                 precision: int = ROUTE_CACHE_PRECISION):
+        self.cache = cache
+        self.ttl = ttl
+        self.stale_ttl = max(stale_ttl, ttl)
+        self.precision = precision
+    
+    def make_key(self, coordinates: List[Tuple[float, float]], profile: str,
+                 preference: str, avoid_features: List[str], **params) -> str:
+        """Build a cache key from snapped coordinates and routing options"""
+        key_data = {
+            "coordinates": [[round(c, self.precision) for c in point] for point in coordinates],
+            "profile": profile,
+            "preference": preference,
+            "avoid_features": sorted(avoid_features),
+            "params": params
+        }
+        raw = json.dumps(key_data, sort_keys=True, separators=(",", ":"))
+        return hashlib.sha1(raw.encode()).hexdigest()
+    
+    def get(self, key: str, allow_stale: bool = False) -> Optional[Dict]:
+        """Return a cached route; stale entries only when allow_stale is set"""
+        value = self.cache.get(key)
+        if value is None:
+            return None
+        
+        (created_at,) = self._HEADER.unpack_from(value)
+        if not allow_stale and time.time() - created_at > self.ttl:
+            return None
+        return json.loads(zlib.decompress(value[self._HEADER.size:]))
+    
+    def set(self, key: str, route: Dict):
+        """Store a route as compact, compressed GeoJSON"""
+        payload = json.dumps(route, separators=(",", ":")).encode()
+        value = self._HEADER.pack(time.time()) + zlib.compress(payload, 6)
+        self.cache.set(key, value, self.stale_ttl)
+
+
+class IsochroneCache:
+    """Persistent cache of reachable-area polygons per centre cell, profile and range"""
+    
+    def __init__(self, cache: PersistentCache, ttl: float = ISOCHRONE_CACHE_TTL):
+        self.cache = cache
+        self.ttl = ttl
+    
+    @staticmethod
+    def make_key(cell: str, profile: str, seconds: int) -> str:
+        """Key for the area reachable from a geohash cell's centre within seconds"""
+        return f"{profile}:{seconds}:{cell}"
+    
+    def get(self, key: str) -> Optional[Dict]:
+        """Return a cached isochrone feature"""
+        value = self.cache.get(key)
+        return json.loads(zlib.decompress(value)) if value is not None else None
+    
+    def set(self, key: str, feature: Dict):
+        """Store an isochrone feature as compact, compressed GeoJSON"""
+        payload = json.dumps(feature, separators=(",", ":")).encode()
+        self.cache.set(key, zlib.compress(payload, 6), self.ttl)
+
+
+class ResponseCache:
+    """Two-tier cache of assistant answers
+    
+    The exact tier is keyed on the normalized prompt, model and temperature
+    and persists in SQLite. The near-duplicate tier keeps hashed TF-IDF
+    vectors of recent questions in memory and maps a paraphrased question
+    to the exact-tier entry of its closest match.
+    """
+
+    STOPWORDS = frozenset(
+        "a an and are at be can could do does for from how i in is it me my "
+        "of on or please should tell the this to what when where which who "
+        "why will with would you your".split()
+    )
+
+    def __init__(self, cache: PersistentCache, ttl: float = RESPONSE_CACHE_TTL,
+                 similarity: float = RESPONSE_CACHE_SIMILARITY,
+                 max_index: int = 2000, dims: int = 2048):
+        self.cache = cache
+        self.ttl = ttl
+        self.similarity = similarity
+        self.max_index = max_index
+        self.dims = dims
+        self._lock = threading.Lock()
+        
+        # Ring buffer of term-frequency vectors and the entries they point to
+        self._tf = np.zeros((max_index, dims), dtype=np.float32)
+        self._df = np.zeros(dims, dtype=np.float32)
+        self._entries: List[Optional[Tuple[str, str]]] = [None] * max_index
+        self._next = 0
+        
+        # Rebuild the in-memory index from the persisted entries
+        for key, value in reversed(cache.recent(max_index)):
+            entry = json.loads(value)
+            self._index(entry["question"], entry["scope"], key)
+    
+    @staticmethod
+    def normalize(text: str) -> str:
+        """Normalize text so trivially different prompts share an entry"""
+        text = unicodedata.normalize("NFKC", text).casefold()
+        return re.sub(r"\s+", " ", text).strip()
+    
+    def exact_key(self, prompt: str, scope: str) -> str:
+        """Key for the exact-match tier"""
+        return hashlib.sha1(f"{scope}\x00{self.normalize(prompt)}".encode()).hexdigest()
+    
+    def _vectorize(self, question: str) -> np.ndarray:
+        """Hashed unigram and bigram term frequencies of a question"""
+        words = [w for w in re.findall(r"\w+", self.normalize(question))
+                 if w not in self.STOPWORDS]
+        terms = words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+        vector = np.zeros(self.dims, dtype=np.float32)
+        for term in terms:
+            # Stable across processes, unlike the built-in hash()
+            bucket = zlib.crc32(term.encode()) % self.dims
+            vector[bucket] += 1
+        return np.log1p(vector)
+    
+    def _index(self, question: str, scope: str, key: str):
+        """Add a question to the near-duplicate index, replacing the oldest entry"""
+        vector = self._vectorize(question)
+        with self._lock:
+            slot = self._next % self.max_index
+            if self._entries[slot] is not None:
+                self._df -= self._tf[slot] > 0
+            self._tf[slot] = vector
+            self._df += vector > 0
+            self._entries[slot] = (scope, key)
+            self._next += 1
+    
+    def _nearest(self, question: str, scope: str) -> Optional[str]:
+        """Exact-tier key of the most similar indexed question, if close enough"""
+        query = self._vectorize(question)
+        if not query.any():
+            return None
+        
+        with self._lock:
+            count = min(self._next, self.max_index)
+            if count == 0:
+                return None
+            idf = np.log((1 + count) / (1 + self._df)) + 1
+            weighted = self._tf[:count] * idf
+            query = query * idf
+            norms = np.linalg.norm(weighted, axis=1) * np.linalg.norm(query)
+            scores = np.divide(weighted @ query, norms, out=np.zeros(count, dtype=np.float32),
+                               where=norms > 0)
+            
+            for slot in np.argsort(scores)[::-1]:
+                if scores[slot] < self.similarity:
+                    break
+                if self._entries[slot][0] == scope:
+                    return self._entries[slot][1]
+        return None
+    
+    def get(self, question: str, prompt: str, scope: str,
+            semantic: bool = True) -> Optional[str]:
+        """Return a cached answer for the prompt or a near-duplicate question"""
+        value = self.cache.get(self.exact_key(prompt, scope))
+        if value is None and semantic:
+            key = self._nearest(question, scope)
+            value = self.cache.get(key) if key else None
+        return json.loads(value)["text"] if value is not None else None
+    
+    def set(self, question: str, prompt: str, scope: str, text: str):
+        """Store an answer in both tiers"""
+        key = self.exact_key(prompt, scope)
+        entry = {"question": question, "scope": scope, "text": text}
+        self.cache.set(key, json.dumps(entry).encode(), self.ttl)
+        self._index(question, scope, key)
+
+
+def open_geocode_store(cache_dir: str = CACHE_DIR) -> GeocodeStore:
+    """Geocode store backed by the shared cache directory"""
+    cache = PersistentCache(os.path.join(cache_dir, "geocode.sqlite3"), table="geocode")
+    return GeocodeStore(cache)
+
+
+def open_route_cache(cache_dir: str = CACHE_DIR) -> RouteCache:
+    """Route cache backed by the shared cache directory"""
+    cache = PersistentCache(
+        os.path.join(cache_dir, "routes.sqlite3"),
+        table="routes",
+        max_bytes=ROUTE_CACHE_MAX_BYTES
+    )
+    return RouteCache(cache)
+
+
+def open_isochrone_cache(cache_dir: str = CACHE_DIR) -> IsochroneCache:
+    """Isochrone cache backed by the shared cache directory"""
+    cache = PersistentCache(os.path.join(cache_dir, "isochrones.sqlite3"), table="isochrones")
+    return IsochroneCache(cache)
+
+
+def open_response_cache(cache_dir: str = CACHE_DIR) -> ResponseCache:
+    """Assistant response cache backed by the shared cache directory"""
+    cache = PersistentCache(
+        os.path.join(cache_dir, "responses.sqlite3"),
+        table="responses",
+        max_entries=20000
+    )
+    return ResponseCache(cache)
@@ -0,0 +1,100 @@
+"""Process-wide API clients with pooled keep-alive connections
+
+Build each client once per process and share it between sessions and
+threads, so concurrent requests reuse warm TCP/TLS connections instead of
+opening a new pool per session. HTTP libraries and SDKs are imported when
+a client is first built, so importing the package stays cheap.
+"""
+
+from typing import TYPE_CHECKING, Optional
+
+from .config import (
+    COHERE_BASE_URL,
+    HTTP_BACKOFF,
+    HTTP_POOL_SIZE,
+    HTTP_RETRIES,
+    HTTP_TIMEOUT,
+    ORS_BASE_URL,
+    ORS_BURST,
+    ORS_RATE,
+)
+from .ratelimit import RateLimiter
+
+if TYPE_CHECKING:
+    from requests.adapters import HTTPAdapter
+
+
+def pooled_adapter(pool_size: int = HTTP_POOL_SIZE, retries: int = HTTP_RETRIES) -> "HTTPAdapter":
+    """HTTP adapter with a larger keep-alive pool and connection retries with backoff"""
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
+    
+    retry = Retry(
+        total=retries,
+        connect=retries,
+        read=retries,
+        # Rate-limit and overload responses are retried by the API clients themselves
+        status=0,
+        backoff_factor=HTTP_BACKOFF,
+        # Directions and matrix requests are POSTs but have no side effects
+        allowed_methods=frozenset({"GET", "POST"})
+    )
+    return HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+
+
+class RateLimitedRouter:
+    """ORS client wrapper that passes every request through a shared rate limiter"""
+    
+    def __init__(self, client, limiter: RateLimiter):
+        self.client = client
+        self.limiter = limiter
+    
+    def directions(self, *args, **kwargs):
+        self.limiter.acquire()
+        return self.client.directions(*args, **kwargs)
+    
+    def distance_matrix(self, *args, **kwargs):
+        self.limiter.acquire()
+        return self.client.distance_matrix(*args, **kwargs)
+    
+    def isochrones(self, *args, **kwargs):
+        self.limiter.acquire()
+        return self.client.isochrones(*args, **kwargs)
+    
+    def __getattr__(self, name):
+        return getattr(self.client, name)
+
+
+def create_ors_client(key: str, limiter: Optional[RateLimiter] = None,
+                      base_url: str = ORS_BASE_URL) -> RateLimitedRouter:
+    """OpenRouteService client with a pooled session and a shared rate limiter"""
+    import openrouteservice
+    
+    client = openrouteservice.Client(key=key, base_url=base_url, timeout=HTTP_TIMEOUT)
+    # The client keeps a single requests.Session; widen its connection pool
+    session = client._session
+    adapter = pooled_adapter()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    
+    return RateLimitedRouter(client, limiter or RateLimiter(ORS_RATE, ORS_BURST, name="ors"))
+
+
+def create_cohere_client(key: str, base_url: Optional[str] = COHERE_BASE_URL):
+    """Cohere client with a pooled keep-alive HTTP connection pool"""
+    import cohere
+    
+    try:
+        import httpx
+        http_client = httpx.Client(
+            timeout=HTTP_TIMEOUT,
+            limits=httpx.Limits(
+                max_connections=HTTP_POOL_SIZE,
+                max_keepalive_connections=HTTP_POOL_SIZE
+            )
+        )
+        return cohere.Client(key, base_url=base_url, httpx_client=http_client, max_retries=HTTP_RETRIES)
+    except TypeError:
+        # Cohere SDK 4 manages its own session and has no httpx_client option
+        endpoint = {"api_url": base_url} if base_url else {}
+        return cohere.Client(key, max_retries=HTTP_RETRIES, timeout=HTTP_TIMEOUT, **endpoint)
@@ -0,0 +1,116 @@
+"""Side-by-side metrics for a route and its alternatives
+
+Every alternative is measured in the same array pass: the points of all
+routes are concatenated, segment lengths computed once, and per-route
+totals gathered with ``np.bincount``. Toll and highway shares come from
+ORS extra info, elevation gain from the route's heights, and overlap from
+resampling each route and testing its samples against a grid of cells
+around the main route.
+"""
+
+from typing import Optional, List, Dict
+
+import numpy as np
+
+from .config import ROUTE_OVERLAP_TOLERANCE_M
+from .route import CompactRoute
+
+EARTH_RADIUS_M = 6_371_000.0
+
+# ORS waycategory is a bit field; bit 0 marks highways
+WAYCATEGORY_HIGHWAY = 1
+
+
+def _cell_keys(points: np.ndarray, cell_m: float, cos_lat: float) -> np.ndarray:
+    """Grid cell of each lat/lon point as one int64, cells cell_m metres wide"""
+    y = np.floor(np.radians(points[:, 0]) * EARTH_RADIUS_M / cell_m).astype(np.int64)
+    x = np.floor(np.radians(points[:, 1]) * EARTH_RADIUS_M * cos_lat / cell_m).astype(np.int64)
+    return y * 4_000_000 + x
+
+
+def _share(extras: List[Optional[np.ndarray]], offsets: np.ndarray, sizes: np.ndarray,
+           cumulative: np.ndarray, lengths: np.ndarray, match) -> List[Optional[float]]:
+    """Share of each route's length whose extra info value satisfies match"""
+    routes = len(extras)
+    rows = [(index, values) for index, values in enumerate(extras) if values is not None and len(values)]
+    if not rows:
+        return [None] * routes
+    route_ids = np.concatenate([np.full(len(values), index) for index, values in rows])
+    values = np.concatenate([values for _, values in rows])
+    # Extra info ranges index the route's own points; shift them into the concatenated arrays
+    last = offsets[route_ids] + sizes[route_ids] - 1
+    start = np.minimum(offsets[route_ids] + values[:, 0], last)
+    end = np.minimum(offsets[route_ids] + values[:, 1], last)
+    covered = np.bincount(route_ids, weights=(cumulative[end] - cumulative[start]) * match(values[:, 2]),
+                          minlength=routes)
+    known = {index for index, _ in rows}
+    return [float(covered[i] / lengths[i]) if i in known and lengths[i] > 0 else None for i in range(routes)]
+
+
+def compare_routes(route: CompactRoute, tolerance_m: float = ROUTE_OVERLAP_TOLERANCE_M) -> List[Dict]:
+    """Distance, duration, toll and highway share, overlap with the main route and
+    elevation gain of every route, main route first
+    
+    Shares are fractions of the route's length, and None where ORS sent no
+    extra info; elevation gain is None without elevation data.
+    """
+    lines = route.routes
+    points = np.concatenate([line.latlon() for line in lines])
+    sizes = np.array([len(line) for line in lines])
+    offsets = np.concatenate([[0], np.cumsum(sizes)[:-1]])
+    route_of_point = np.repeat(np.arange(len(lines)), sizes)
+    
+    # Equirectangular segment lengths, with the jumps between routes zeroed
+    lat = np.radians(points[:, 0])
+    dlat = np.diff(lat)
+    dlon = np.diff(np.radians(points[:, 1])) * np.cos((lat[1:] + lat[:-1]) / 2)
+    segments = np.hypot(dlat, dlon) * EARTH_RADIUS_M
+    segments[route_of_point[1:] != route_of_point[:-1]] = 0
+    cumulative = np.concatenate([[0.0], np.cumsum(segments)])
+    lengths = np.bincount(route_of_point[1:], weights=segments, minlength=len(lines))
+    
+    tolls = _share([line.extras.get('tollways') for line in lines], offsets, sizes,
+                   cumulative, lengths, lambda value: value > 0)
+    highways = _share([line.extras.get('waycategory') for line in lines], offsets, sizes,
+                      cumulative, lengths, lambda value: (value & WAYCATEGORY_HIGHWAY) > 0)
+    
+    # Climb: positive height differences within each route
+    gains: List[Optional[float]] = [None] * len(lines)
+    if all(line.elevation is not None for line in lines):
+        heights = np.concatenate([line.elevation for line in lines]).astype(float)
+        rises = np.clip(np.diff(heights), 0, None)
+        rises[route_of_point[1:] != route_of_point[:-1]] = 0
+        gains = np.bincount(route_of_point[1:], weights=rises, minlength=len(lines)).tolist()
+    
+    # Overlap: resample every route at the tolerance, then look each sample
+    # up among the main route's cells and their neighbours
+    samples_per_route = np.maximum(2, np.ceil(lengths / tolerance_m).astype(int) + 1)
+    route_of_sample = np.repeat(np.arange(len(lines)), samples_per_route)
+    within = np.concatenate([np.linspace(0, 1, count) for count in samples_per_route])
+    targets = cumulative[offsets[route_of_sample]] + within * lengths[route_of_sample]
+    # Each route is shifted onto its own stretch of one increasing distance
+    # axis, so a single np.interp resamples them all
+    route_targets = targets + route_of_sample * (cumulative[-1] + 1)
+    point_axis = cumulative + route_of_point * (cumulative[-1] + 1)
+    samples = np.column_stack([np.interp(route_targets, point_axis, points[:, 0]),
+                               np.interp(route_targets, point_axis, points[:, 1])])
+    
+    cos_lat = float(np.cos(np.radians(points[:, 0].mean())))
+    keys = _cell_keys(samples, tolerance_m, cos_lat)
+    main_keys = keys[route_of_sample == 0]
+    neighbours = (np.arange(-1, 2)[:, None] * 4_000_000 + np.arange(-1, 2)[None, :]).ravel()
+    near_main = np.isin(keys, np.unique(main_keys[:, None] + neighbours))
+    overlaps = np.bincount(route_of_sample, weights=near_main, minlength=len(lines)) / samples_per_route
+    
+    return [
+        {
+            "index": i,
+            "distance_km": line.distance / 1000,
+            "duration_min": line.duration / 60,
+            "toll_share": tolls[i],
+            "highway_share": highways[i],
+            "overlap": float(overlaps[i]),
+            "elevation_gain_m": gains[i]
+        }
+        for i, line in enumerate(lines)
+    ]
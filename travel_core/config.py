@@ -0,0 +1,104 @@
+"""Configuration for the travel core, overridable through environment variables"""
+
+import os
+
+# Directory for caches that persist across sessions and server restarts
+CACHE_DIR = os.environ.get(
+    "TRAVEL_CACHE_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".cache")
+)
+# Directory for user data, kept apart from caches that are safe to delete
+DATA_DIR = os.environ.get(
+    "TRAVEL_DATA_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".data")
+)
+# Per-user search history database
+HISTORY_DB = os.environ.get("HISTORY_DB", os.path.join(DATA_DIR, "history.sqlite3"))
+
+# Optional offline gazetteer index (see travel_core.gazetteer); lookups fall
+# back to Nominatim only when it has no match
+GAZETTEER_INDEX = os.environ.get("GAZETTEER_INDEX", os.path.join(CACHE_DIR, "gazetteer"))
+# Minimum trigram similarity for a typo-tolerant gazetteer match
+GAZETTEER_FUZZY_THRESHOLD = float(os.environ.get("GAZETTEER_FUZZY_THRESHOLD", "0.45"))
+
+# Recently geocoded places loaded into the type-ahead index at startup
+SUGGEST_SEED_PLACES = int(os.environ.get("SUGGEST_SEED_PLACES", "5000"))
+
+# Upstream endpoints, overridable for self-hosted instances or local fakes
+ORS_BASE_URL = os.environ.get("ORS_BASE_URL", "https://api.openrouteservice.org")
+NOMINATIM_URL = os.environ.get("NOMINATIM_URL", "https://nominatim.openstreetmap.org")
+COHERE_BASE_URL = os.environ.get("COHERE_BASE_URL") or None
+
+# Nominatim usage policy allows at most one request per second
+NOMINATIM_RATE = float(os.environ.get("NOMINATIM_RATE", "1.0"))
+GEOCODE_WORKERS = 4
+
+# Routes are served from cache for ROUTE_CACHE_TTL seconds, and kept as an
+# outage fallback for ROUTE_CACHE_STALE_TTL seconds
+ROUTE_CACHE_TTL = float(os.environ.get("ROUTE_CACHE_TTL", str(24 * 3600)))
+ROUTE_CACHE_STALE_TTL = float(os.environ.get("ROUTE_CACHE_STALE_TTL", str(7 * 24 * 3600)))
+ROUTE_CACHE_MAX_BYTES = int(os.environ.get("ROUTE_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+# Coordinates are rounded to this many decimals (~11 m) before keying
+ROUTE_CACHE_PRECISION = 4
+
+# Batch routing works through trip lists this many rows at a time, with
+# this many routes in flight; the shared rate limiters still apply
+BATCH_CHUNK_SIZE = int(os.environ.get("BATCH_CHUNK_SIZE", "500"))
+BATCH_ROUTE_WORKERS = int(os.environ.get("BATCH_ROUTE_WORKERS", "8"))
+
+# Route alternatives are requested with elevation and these ORS extra info
+# kinds, so they can be compared without further requests; an alternative
+# counts as overlapping the main route where it runs within this distance
+ROUTE_EXTRA_INFO = ["tollways", "waycategory"]
+ROUTE_OVERLAP_TOLERANCE_M = 30.0
+
+# Public ORS directions requests accept at most this many waypoints
+ORS_MAX_WAYPOINTS = 50
+# Public ORS isochrone requests accept at most this many centres and ranges
+ORS_ISOCHRONE_MAX_LOCATIONS = 5
+ORS_ISOCHRONE_MAX_RANGES = 10
+
+# Reachable areas are shared per geohash cell of the centre (precision 7 is
+# roughly 150 m) and kept for ISOCHRONE_CACHE_TTL seconds
+ISOCHRONE_GEOHASH_PRECISION = 7
+ISOCHRONE_CACHE_TTL = float(os.environ.get("ISOCHRONE_CACHE_TTL", str(7 * 24 * 3600)))
+
+# Free ORS plans allow 40 directions/matrix requests per minute
+ORS_RATE = float(os.environ.get("ORS_RATE", str(40 / 60)))
+ORS_BURST = int(os.environ.get("ORS_BURST", "10"))
+
+# Keep-alive connection pool size and connection-level retries for upstream APIs
+HTTP_POOL_SIZE = int(os.environ.get("HTTP_POOL_SIZE", "32"))
+HTTP_RETRIES = int(os.environ.get("HTTP_RETRIES", "3"))
+HTTP_BACKOFF = 0.5
+HTTP_TIMEOUT = 30
+
+# Weather provider ("open-meteo" or the offline "stub"); observations are
+# shared per geohash cell (precision 5 is roughly 5 km) and time bucket
+WEATHER_PROVIDER = os.environ.get("WEATHER_PROVIDER", "open-meteo")
+WEATHER_GEOHASH_PRECISION = 5
+WEATHER_BUCKET_SECONDS = float(os.environ.get("WEATHER_BUCKET_SECONDS", "1800"))
+# Points per upstream weather request, and samples taken along a route
+WEATHER_BATCH_SIZE = 50
+WEATHER_ROUTE_SAMPLES = 8
+
+# Maximum deviation of a simplified route line, in screen pixels, for this
+# many zoom levels past the fitted view; each further level doubles it.
+# Geometry is never kept finer than MAP_MAX_ZOOM needs
+MAP_SIMPLIFY_PX = 0.5
+MAP_DETAIL_ZOOM_LEVELS = 4
+MAP_MAX_ZOOM = 18
+
+# Assistant answers are reused for this long; near-duplicate questions
+# above the similarity threshold share an answer
+RESPONSE_CACHE_TTL = float(os.environ.get("RESPONSE_CACHE_TTL", str(7 * 24 * 3600)))
+RESPONSE_CACHE_SIMILARITY = float(os.environ.get("RESPONSE_CACHE_SIMILARITY", "0.85"))
+RESPONSE_CACHE_SEMANTIC = os.environ.get("RESPONSE_CACHE_SEMANTIC", "1") != "0"
+
+# Show the metrics page in the Streamlit navigation
+ADMIN_PAGE = os.environ.get("ADMIN_PAGE", "1") != "0"
+
+# Token budget for the assistant's prompt plus conversation history
+ASSISTANT_CONTEXT_TOKENS = int(os.environ.get("ASSISTANT_CONTEXT_TOKENS", "3000"))
+# Turns kept in session state; older ones only survive as a summary
+ASSISTANT_MAX_TURNS = 40
@@ -0,0 +1,120 @@
+"""Turn-by-turn directions formatting"""
+
+from dataclasses import dataclass
+from typing import Optional, List, Dict
+
+import numpy as np
+
+
+def _distance_labels(meters: np.ndarray) -> np.ndarray:
+    """'850 m' below a kilometre, '12.3 km' above"""
+    return np.where(
+        meters >= 1000,
+        np.char.add(np.char.mod("%.1f", meters / 1000), " km"),
+        np.char.add(np.char.mod("%.0f", meters), " m")
+    )
+
+
+def _duration_labels(seconds: np.ndarray) -> np.ndarray:
+    """'45 sec' below a minute, '7 min' above"""
+    return np.where(
+        seconds >= 60,
+        np.char.add(np.char.mod("%.0f", seconds / 60), " min"),
+        np.char.add(np.char.mod("%.0f", seconds), " sec")
+    )
+
+
+def _elapsed_labels(seconds: np.ndarray) -> np.ndarray:
+    """Elapsed time since departure: '25 min' or '2 h 05 min'"""
+    minutes = np.rint(seconds / 60).astype(np.int64)
+    hours, rest = np.divmod(minutes, 60)
+    return np.where(
+        hours > 0,
+        np.char.add(np.char.add(np.char.mod("%d h ", hours), np.char.mod("%02d", rest)), " min"),
+        np.char.add(np.char.mod("%d", minutes), " min")
+    )
+
+
+@dataclass
+class DirectionsView:
+    """Turn-by-turn directions for one route as columns, rendered a page at a time"""
+    instructions: np.ndarray
+    legs: np.ndarray
+    distances: np.ndarray
+    durations: np.ndarray
+    cumulative_distances: np.ndarray
+    elapsed: np.ndarray
+    leg_titles: List[str]
+    
+    def __len__(self) -> int:
+        return len(self.instructions)
+    
+    def page_count(self, page_size: int) -> int:
+        """Number of pages of page_size steps"""
+        return max(1, -(-len(self) // page_size))
+    
+    def render(self, start: int = 0, stop: Optional[int] = None) -> str:
+        """HTML for steps start..stop, with a heading wherever a leg begins"""
+        stop = len(self) if stop is None else min(stop, len(self))
+        parts = []
+        for i in range(start, stop):
+            leg = self.legs[i]
+            # Head each leg, and repeat the heading when a page starts mid-leg
+            if self.leg_titles and (i == start or leg != self.legs[i - 1]):
+                continued = " (continued)" if i > 0 and leg == self.legs[i - 1] else ""
+                parts.append(f"<h4>🛣️ {self.leg_titles[leg]}{continued}</h4>")
+            parts.append(f"""
+            <div class="route-step">
+                <strong>Step {i + 1}</strong> • {self.distances[i]} • {self.durations[i]}<br>
+                📍 {self.instructions[i]}
+                <br><small>{self.cumulative_distances[i]} · {self.elapsed[i]} from start</small>
+            </div>
+            """)
+        return "".join(parts)
+    
+    def render_page(self, page: int, page_size: int) -> str:
+        """HTML for one page of steps, counting pages from 0"""
+        return self.render(page * page_size, (page + 1) * page_size)
+
+
+def build_directions(segments: List[Dict], leg_names: Optional[List[str]] = None) -> DirectionsView:
+    """Collect the steps of every leg into columns and format them in one pass"""
+    steps = [(leg, step) for leg, segment in enumerate(segments) for step in segment.get('steps', [])]
+    return directions_from_steps(
+        np.array([step.get('instruction', 'Continue') for _, step in steps], dtype=object),
+        np.array([leg for leg, _ in steps], dtype=np.int32),
+        np.array([step.get('distance', 0) for _, step in steps], dtype=float),
+        np.array([step.get('duration', 0) for _, step in steps], dtype=float),
+        len(segments),
+        leg_names
+    )
+
+
+def directions_from_steps(instructions: np.ndarray, legs: np.ndarray, distances: np.ndarray,
+                          durations: np.ndarray, leg_count: int,
+                          leg_names: Optional[List[str]] = None) -> DirectionsView:
+    """Format steps already held as columns, such as a compact route's"""
+    # Label legs when the route passes through intermediate stops
+    leg_titles = []
+    if leg_count > 1:
+        for leg in range(leg_count):
+            leg_title = f"Leg {leg + 1}"
+            if leg_names and len(leg_names) > leg + 1:
+                leg_title += f": {leg_names[leg]} → {leg_names[leg + 1]}"
+            leg_titles.append(leg_title)
+    
+    # Distance and time at the end of each step
+    return DirectionsView(
+        instructions=instructions,
+        legs=legs,
+        distances=_distance_labels(distances),
+        durations=_duration_labels(durations),
+        cumulative_distances=np.char.add(np.char.mod("%.1f", np.cumsum(distances) / 1000), " km"),
+        elapsed=_elapsed_labels(np.cumsum(durations)),
+        leg_titles=leg_titles
+    )
+
+
+def format_directions(segments: List[Dict], leg_names: Optional[List[str]] = None) -> str:
+    """Format turn-by-turn directions for every leg with better styling"""
+    return build_directions(segments, leg_names).render()
@@ -0,0 +1,142 @@
+"""Route export formats, produced as streams of byte chunks
+
+Every writer is a generator, so a long route can be sent to a client or
+written to disk without first building the whole document in memory.
+Writers accept a GeoJSON directions response or a ``CompactRoute``.
+"""
+
+import csv
+import io
+import json
+import zlib
+from dataclasses import dataclass
+from typing import Callable, Optional, List, Iterator
+from xml.sax.saxutils import escape
+
+import numpy as np
+
+from .route import RouteLike, compact_route, route_geojson
+
+# Track points per written chunk
+CHUNK_POINTS = 2000
+
+
+def encode_polyline(points: np.ndarray, precision: int = 5) -> str:
+    """Encode an (N, 2) lat/lon array in Google's encoded polyline format"""
+    if len(points) == 0:
+        return ""
+    scaled = np.rint(np.asarray(points, dtype=float) * 10 ** precision).astype(np.int64)
+    deltas = np.diff(scaled, axis=0, prepend=0).ravel()
+    
+    # Zig-zag sign encoding, then 5-bit groups least significant first
+    values = np.where(deltas < 0, ~(deltas << 1), deltas << 1)
+    groups = (values[:, None] >> (5 * np.arange(7))) & 0x1F
+    lengths = np.maximum(1, ((values[:, None] >> (5 * np.arange(7))) > 0).sum(axis=1))
+    used = np.arange(7) < lengths[:, None]
+    # Every group but the last of a value carries the continuation bit
+    more = np.arange(7) < (lengths - 1)[:, None]
+    chars = groups + 0x20 * more + 63
+    return chars[used].astype(np.uint8).tobytes().decode("ascii")
+
+
+def polyline_chunks(route: RouteLike, leg_names: Optional[List[str]] = None) -> Iterator[bytes]:
+    """Encoded polyline of the main route"""
+    yield encode_polyline(compact_route(route).main.latlon()).encode("ascii")
+
+
+def geojson_chunks(route: RouteLike, leg_names: Optional[List[str]] = None) -> Iterator[bytes]:
+    """Compact GeoJSON, encoded incrementally"""
+    encoder = json.JSONEncoder(separators=(",", ":"))
+    for chunk in encoder.iterencode(route_geojson(route)):
+        yield chunk.encode()
+
+
+def geojson_gzip_chunks(route: RouteLike, leg_names: Optional[List[str]] = None) -> Iterator[bytes]:
+    """Gzip-compressed compact GeoJSON"""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+    buffer = []
+    size = 0
+    for chunk in geojson_chunks(route):
+        buffer.append(chunk)
+        size += len(chunk)
+        # Compress in blocks; feeding zlib tiny pieces is slow
+        if size >= 64 * 1024:
+            compressed = compressor.compress(b"".join(buffer))
+            buffer, size = [], 0
+            if compressed:
+                yield compressed
+    yield compressor.compress(b"".join(buffer)) + compressor.flush()
+
+
+def gpx_chunks(route: RouteLike, leg_names: Optional[List[str]] = None) -> Iterator[bytes]:
+    """GPX 1.1 track of the main route, with the named places as waypoints"""
+    line = compact_route(route).main
+    points = line.latlon()
+    yield (
+        '<?xml version="1.0" encoding="UTF-8"?>\n'
+        '<gpx version="1.1" creator="Smart Travel Companion" '
+        'xmlns="http://www.topografix.com/GPX/1/1">\n'
+    ).encode()
+    
+    # The route passes through each named place at the start of a leg
+    way_points = line.leg_starts().tolist()
+    if len(points):
+        way_points.append(len(points) - 1)
+    for name, index in zip(leg_names or [], way_points):
+        lat, lon = points[index]
+        yield f'<wpt lat="{lat:.6f}" lon="{lon:.6f}"><name>{escape(name)}</name></wpt>\n'.encode()
+    
+    title = " → ".join(leg_names) if leg_names else "Route"
+    yield f"<trk><name>{escape(title)}</name><trkseg>\n".encode()
+    for start in range(0, len(points), CHUNK_POINTS):
+        block = points[start:start + CHUNK_POINTS]
+        yield "".join(f'<trkpt lat="{lat:.6f}" lon="{lon:.6f}"/>\n' for lat, lon in block).encode()
+    yield b"</trkseg></trk>\n</gpx>\n"
+
+
+def steps_csv_chunks(route: RouteLike, leg_names: Optional[List[str]] = None) -> Iterator[bytes]:
+    """CSV of turn-by-turn steps, one row per step"""
+    line = compact_route(route).main
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(["step", "leg", "instruction", "distance_m", "duration_s", "name"])
+    
+    bounds = line.leg_bounds()
+    for leg in range(len(line.leg_steps)):
+        leg_label = (f"{leg_names[leg]} → {leg_names[leg + 1]}"
+                     if leg_names and len(leg_names) > leg + 1 else leg + 1)
+        for i in range(bounds[leg], bounds[leg + 1]):
+            writer.writerow([
+                i + 1, leg_label, line.step_instruction[i],
+                f"{line.step_distance[i]:.1f}", f"{line.step_duration[i]:.1f}",
+                line.step_name[i]
+            ])
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+    yield buffer.getvalue().encode()
+
+
+@dataclass(frozen=True)
+class ExportFormat:
+    """A downloadable route format"""
+    label: str
+    extension: str
+    mime: str
+    writer: Callable[..., Iterator[bytes]]
+
+
+EXPORT_FORMATS = {
+    "gpx": ExportFormat("GPX track", "gpx", "application/gpx+xml", gpx_chunks),
+    "geojson": ExportFormat("GeoJSON", "geojson", "application/geo+json", geojson_chunks),
+    "geojson.gz": ExportFormat("GeoJSON (gzip)", "geojson.gz", "application/gzip", geojson_gzip_chunks),
+    "polyline": ExportFormat("Encoded polyline", "txt", "text/plain", polyline_chunks),
+    "csv": ExportFormat("Steps (CSV)", "csv", "text/csv", steps_csv_chunks),
+}
+
+
+def export_route(route: RouteLike, fmt: str, leg_names: Optional[List[str]] = None) -> Iterator[bytes]:
+    """Stream a directions response or compact route in one of EXPORT_FORMATS"""
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format {fmt!r}; expected one of {', '.join(EXPORT_FORMATS)}")
+    return EXPORT_FORMATS[fmt].writer(route, leg_names)
@@ -0,0 +1,340 @@
+"""Offline geocoding from a prebuilt, memory-mapped gazetteer index
+
+The index is built once from a GeoNames-style dump (``cities500.txt``,
+``IN.txt``, ``allCountries.txt`` or a regional extract)::
+
+    python -m travel_core.gazetteer build IN.txt .cache/gazetteer --min-population 1000
+    python -m travel_core.gazetteer query .cache/gazetteer "bengaluru"
+
+Adding GeoNames' ``admin1CodesASCII.txt`` and ``countryInfo.txt`` with
+``--admin1-names`` and ``--country-names`` lets qualified names such as
+"Bengaluru, Karnataka, India" be checked against the region and country.
+
+It is stored as a handful of ``.npy`` arrays that are memory-mapped on load,
+so every worker process shares the same pages and startup is instant:
+
+- every name and alternate name of a place, folded and sorted, for exact
+  and prefix lookups by binary search
+- a trigram inverted index over those names for typo-tolerant matching
+- per-place coordinates, population and display name
+- per-place qualifiers: country and first-level region, as codes and names
+
+Lookups rank candidates by match quality, then by population.
+"""
+
+import argparse
+import os
+import re
+import unicodedata
+import zlib
+from bisect import bisect_left
+from typing import Optional, Tuple, List, Dict, Iterator
+
+import numpy as np
+
+from .config import GAZETTEER_FUZZY_THRESHOLD, GAZETTEER_INDEX
+
+# Column positions in the GeoNames main table
+_NAME, _ASCIINAME, _ALTERNATES, _LAT, _LON, _COUNTRY, _ADMIN1, _POPULATION = 1, 2, 3, 4, 5, 8, 10, 14
+
+
+def fold_name(name: str) -> str:
+    """Fold a place name for matching: no accents, case or punctuation"""
+    name = unicodedata.normalize("NFKD", name)
+    name = "".join(c for c in name if not unicodedata.combining(c)).casefold()
+    name = re.sub(r"[^\w\s]", " ", name)
+    return re.sub(r"\s+", " ", name).strip()
+
+
+def trigrams(key: str) -> np.ndarray:
+    """Distinct hashed trigrams of a folded name, padded at both ends"""
+    padded = f"  {key} "
+    grams = {padded[i:i + 3] for i in range(len(padded) - 2)}
+    return np.array(sorted(zlib.crc32(g.encode()) for g in grams), dtype=np.uint32)
+
+
+def _read_code_names(path: Optional[str], name_column: int) -> Dict[str, str]:
+    """Code to name table from a GeoNames admin1CodesASCII.txt or countryInfo.txt"""
+    names = {}
+    if path:
+        with open(path, encoding="utf-8") as source:
+            for line in source:
+                if line.startswith("#"):
+                    continue
+                fields = line.rstrip("\n").split("\t")
+                if len(fields) > name_column:
+                    names[fields[0]] = fields[name_column]
+    return names
+
+
+def _read_geonames(path: str, min_population: int, admin1_names: Dict[str, str],
+                   country_names: Dict[str, str]) -> Iterator[Tuple[str, float, float, int, List[str], List[str]]]:
+    """Yield (display name, lat, lon, population, names, qualifiers) rows from a GeoNames dump"""
+    with open(path, encoding="utf-8") as source:
+        for line in source:
+            fields = line.rstrip("\n").split("\t")
+            if len(fields) <= _POPULATION:
+                continue
+            population = int(fields[_POPULATION] or 0)
+            if population < min_population:
+                continue
+            
+            names = [fields[_NAME], fields[_ASCIINAME]]
+            names.extend(n for n in fields[_ALTERNATES].split(",") if n)
+            display = f"{fields[_NAME]}, {fields[_COUNTRY]}" if fields[_COUNTRY] else fields[_NAME]
+            country, admin1 = fields[_COUNTRY], fields[_ADMIN1]
+            qualifiers = [country, country_names.get(country, ""), admin1,
+                          admin1_names.get(f"{country}.{admin1}", "")]
+            yield display, float(fields[_LAT]), float(fields[_LON]), population, names, qualifiers
+
+
+def _pack_strings(strings: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+    """Pack strings into one UTF-8 byte array plus offsets"""
+    encoded = [s.encode() for s in strings]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(b) for b in encoded], out=offsets[1:])
+    return np.frombuffer(b"".join(encoded), dtype=np.uint8), offsets
+
+
+def build_index(source_path: str, index_dir: str, min_population: int = 0,
+                admin1_path: Optional[str] = None, countries_path: Optional[str] = None) -> int:
+    """Build a gazetteer index from a GeoNames dump; returns the number of places
+    
+    admin1_path and countries_path are GeoNames' admin1CodesASCII.txt and
+    countryInfo.txt, for matching region and country names as well as codes.
+    """
+    displays, lats, lons, populations, qualifiers = [], [], [], [], []
+    entries = set()
+    admin1_names = _read_code_names(admin1_path, 1)
+    country_names = _read_code_names(countries_path, 4)
+    
+    for place_id, (display, lat, lon, population, names, place_qualifiers) in enumerate(
+        _read_geonames(source_path, min_population, admin1_names, country_names)
+    ):
+        displays.append(display)
+        # Folded and joined, e.g. "in|india|19|karnataka"
+        qualifiers.append("|".join(fold_name(q) for q in place_qualifiers if q and fold_name(q)))
+        lats.append(lat)
+        lons.append(lon)
+        populations.append(population)
+        for name in names:
+            key = fold_name(name)
+            if key:
+                entries.add((key, place_id))
+    
+    # Sorted keys make exact and prefix lookups a binary search
+    entries = sorted(entries)
+    keys = [key for key, _ in entries]
+    key_blob, key_offsets = _pack_strings(keys)
+    key_place = np.array([place for _, place in entries], dtype=np.int32)
+    
+    # Trigram inverted index in CSR form: sorted codes, offsets, key postings
+    key_grams = [trigrams(key) for key in keys]
+    gram_counts = np.array([len(g) for g in key_grams], dtype=np.uint16)
+    all_codes = np.concatenate(key_grams) if key_grams else np.empty(0, dtype=np.uint32)
+    all_keys = np.repeat(np.arange(len(keys), dtype=np.int32), gram_counts)
+    order = np.argsort(all_codes, kind="stable")
+    all_codes, postings = all_codes[order], all_keys[order]
+    tri_codes, tri_starts = np.unique(all_codes, return_index=True)
+    tri_offsets = np.append(tri_starts, len(postings)).astype(np.int64)
+    
+    name_blob, name_offsets = _pack_strings(displays)
+    qualifier_blob, qualifier_offsets = _pack_strings(qualifiers)
+    
+    os.makedirs(index_dir, exist_ok=True)
+    arrays = {
+        "keys": key_blob,
+        "key_offsets": key_offsets,
+        "key_place": key_place,
+        "key_trigram_counts": gram_counts,
+        "tri_codes": tri_codes,
+        "tri_offsets": tri_offsets,
+        "tri_postings": postings,
+        "place_lat": np.array(lats, dtype=np.float32),
+        "place_lon": np.array(lons, dtype=np.float32),
+        "place_population": np.array(populations, dtype=np.int64),
+        "place_names": name_blob,
+        "place_name_offsets": name_offsets,
+        "place_qualifiers": qualifier_blob,
+        "place_qualifier_offsets": qualifier_offsets,
+    }
+    for name, array in arrays.items():
+        np.save(os.path.join(index_dir, f"{name}.npy"), array)
+    return len(displays)
+
+
+class _SortedKeys:
+    """Sequence view over the packed, sorted key strings for bisect"""
+    
+    def __init__(self, blob: np.ndarray, offsets: np.ndarray):
+        self.blob = blob
+        self.offsets = offsets
+    
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+    
+    def __getitem__(self, i: int) -> str:
+        return self.blob[self.offsets[i]:self.offsets[i + 1]].tobytes().decode()
+
+
+class GazetteerIndex:
+    """Memory-mapped place index with exact, prefix and fuzzy lookups"""
+    
+    def __init__(self, index_dir: str, fuzzy_threshold: float = GAZETTEER_FUZZY_THRESHOLD):
+        def load(name):
+            return np.load(os.path.join(index_dir, f"{name}.npy"), mmap_mode="r")
+        
+        self.keys = _SortedKeys(load("keys"), load("key_offsets"))
+        self.key_place = load("key_place")
+        self.key_trigram_counts = load("key_trigram_counts")
+        self.tri_codes = load("tri_codes")
+        self.tri_offsets = load("tri_offsets")
+        self.tri_postings = load("tri_postings")
+        self.lat = load("place_lat")
+        self.lon = load("place_lon")
+        self.population = load("place_population")
+        self.names = _SortedKeys(load("place_names"), load("place_name_offsets"))
+        # Indexes built before qualifiers were stored have none
+        self.qualifiers = (_SortedKeys(load("place_qualifiers"), load("place_qualifier_offsets"))
+                           if os.path.isfile(os.path.join(index_dir, "place_qualifiers.npy")) else None)
+        self.fuzzy_threshold = fuzzy_threshold
+    
+    def _place(self, place_id: int, score: float) -> Dict:
+        qualifiers = self.qualifiers[place_id] if self.qualifiers is not None else ""
+        return {
+            "name": self.names[place_id],
+            "qualifiers": qualifiers.split("|") if qualifiers else [],
+            "lat": float(self.lat[place_id]),
+            "lon": float(self.lon[place_id]),
+            "population": int(self.population[place_id]),
+            "score": score
+        }
+    
+    def _rank(self, key_ids: np.ndarray, scores: np.ndarray, limit: int) -> List[Dict]:
+        """Best place per key set, by score then population, one result per place"""
+        if len(key_ids) == 0:
+            return []
+        places = np.asarray(self.key_place[key_ids])
+        order = np.lexsort((-np.asarray(self.population[places]), -scores))
+        results, seen = [], set()
+        for i in order:
+            place = int(places[i])
+            if place in seen:
+                continue
+            seen.add(place)
+            results.append(self._place(place, float(scores[i])))
+            if len(results) == limit:
+                break
+        return results
+    
+    def exact(self, query: str, limit: int = 5) -> List[Dict]:
+        """Places with a name equal to the query"""
+        key = fold_name(query)
+        start = bisect_left(self.keys, key)
+        end = start
+        while end < len(self.keys) and self.keys[end] == key:
+            end += 1
+        key_ids = np.arange(start, end)
+        return self._rank(key_ids, np.ones(len(key_ids)), limit)
+    
+    def prefix(self, query: str, limit: int = 10, scan: int = 2000) -> List[Dict]:
+        """Places with a name starting with the query, most populous first"""
+        key = fold_name(query)
+        if not key:
+            return []
+        start = bisect_left(self.keys, key)
+        end = bisect_left(self.keys, key + "\U0010ffff", lo=start, hi=min(len(self.keys), start + scan))
+        key_ids = np.arange(start, end)
+        # Exact name matches rank above longer names sharing the prefix
+        scores = np.array([1.0 if self.keys[i] == key else 0.5 for i in key_ids])
+        return self._rank(key_ids, scores, limit)
+    
+    def fuzzy(self, query: str, limit: int = 5) -> List[Dict]:
+        """Places whose names share enough trigrams with the query"""
+        grams = trigrams(fold_name(query))
+        if len(grams) == 0:
+            return []
+        
+        # Keep only trigrams that occur somewhere in the index
+        positions = np.searchsorted(self.tri_codes, grams)
+        found = positions < len(self.tri_codes)
+        found[found] = np.asarray(self.tri_codes[positions[found]]) == grams[found]
+        positions = positions[found]
+        postings = [self.tri_postings[self.tri_offsets[p]:self.tri_offsets[p + 1]] for p in positions]
+        if not postings:
+            return []
+        
+        key_ids, shared = np.unique(np.concatenate(postings), return_counts=True)
+        # Jaccard similarity of the trigram sets
+        scores = shared / (len(grams) + np.asarray(self.key_trigram_counts[key_ids]) - shared)
+        keep = scores >= self.fuzzy_threshold
+        return self._rank(key_ids[keep], scores[keep], limit)
+    
+    def search(self, query: str, limit: int = 5) -> List[Dict]:
+        """Exact matches if any, otherwise fuzzy matches"""
+        return self.exact(query, limit) or self.fuzzy(query, limit)
+
+
+def open_gazetteer(index_dir: str = GAZETTEER_INDEX) -> Optional[GazetteerIndex]:
+    """Load the gazetteer index if one has been built"""
+    if not os.path.isfile(os.path.join(index_dir, "keys.npy")):
+        return None
+    return GazetteerIndex(index_dir)
+
+
+class LocalGeocoder:
+    """Geocoder answering from a gazetteer index without network access"""
+    
+    def __init__(self, index: GazetteerIndex):
+        self.index = index
+    
+    def geocode(self, place_name: str, candidates: int = 10) -> Optional[Tuple[float, float]]:
+        """Return (lat, lon) of the best match, or None"""
+        if "," not in place_name:
+            results = self.index.search(place_name, limit=1)
+            return (results[0]["lat"], results[0]["lon"]) if results else None
+        
+        # "Place, Region, Country": a place named with the full text, else one
+        # named by the leading part whose region or country match every other
+        # part; anything else is left to the next geocoder
+        results = self.index.exact(place_name, limit=1)
+        if results:
+            return (results[0]["lat"], results[0]["lon"])
+        name, *rest = (part.strip() for part in place_name.split(","))
+        wanted = {fold_name(part) for part in rest if fold_name(part)}
+        for place in self.index.search(name, limit=candidates):
+            if wanted <= set(place["qualifiers"]):
+                return (place["lat"], place["lon"])
+        return None
+
+
+def main():
+    """Build or query a gazetteer index from the command line"""
+    parser = argparse.ArgumentParser(description="Offline gazetteer index")
+    commands = parser.add_subparsers(dest="command", required=True)
+    
+    build = commands.add_parser("build", help="Build an index from a GeoNames dump")
+    build.add_argument("source")
+    build.add_argument("index_dir")
+    build.add_argument("--min-population", type=int, default=0)
+    build.add_argument("--admin1-names", help="GeoNames admin1CodesASCII.txt, for region names")
+    build.add_argument("--country-names", help="GeoNames countryInfo.txt, for country names")
+    
+    query = commands.add_parser("query", help="Look up a place in an index")
+    query.add_argument("index_dir")
+    query.add_argument("name")
+    query.add_argument("--limit", type=int, default=5)
+    
+    args = parser.parse_args()
+    if args.command == "build":
+        count = build_index(args.source, args.index_dir, args.min_population,
+                            args.admin1_names, args.country_names)
+        print(f"Indexed {count} places into {args.index_dir}")
+    else:
+        for place in GazetteerIndex(args.index_dir).search(args.name, args.limit):
+            print(f"{place['name']}\t{place['lat']:.5f}\t{place['lon']:.5f}\t"
+                  f"pop {place['population']}\tscore {place['score']:.2f}")
+
+
+if __name__ == "__main__":
+    main()
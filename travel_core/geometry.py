@@ -0,0 +1,128 @@
+"""Route geometry helpers"""
+
+import json
+from typing import Tuple, List, Dict
+
+import numpy as np
+
+from .config import MAP_DETAIL_ZOOM_LEVELS, MAP_MAX_ZOOM, MAP_SIMPLIFY_PX
+
+_GEOHASH_ALPHABET = "0123456789bcdefghjkmnpqrstuvwxyz"
+
+
+def route_latlon(feature: Dict) -> np.ndarray:
+    """Return a GeoJSON LineString feature's coordinates as an (N, 2) lat/lon array"""
+    coordinates = np.asarray(feature['geometry']['coordinates'], dtype=float)
+    if coordinates.size == 0:
+        return np.empty((0, 2))
+    return coordinates[:, 1::-1]
+
+
+def simplify_line(points: np.ndarray, tolerance: float) -> np.ndarray:
+    """Simplify a lat/lon polyline with Douglas-Peucker
+    
+    Longitudes are scaled by the cosine of the mean latitude so the tolerance
+    (in degrees of latitude) is roughly uniform in both directions.
+    """
+    n = len(points)
+    if n <= 2 or tolerance <= 0:
+        return points
+    
+    scale = np.array([1.0, np.cos(np.radians(points[:, 0].mean()))])
+    xy = points * scale
+    keep = np.zeros(n, dtype=bool)
+    keep[[0, -1]] = True
+    
+    # Iterative splitting avoids recursion limits on very long routes
+    stack = [(0, n - 1)]
+    while stack:
+        first, last = stack.pop()
+        if last - first < 2:
+            continue
+        
+        chord = xy[last] - xy[first]
+        offsets = xy[first + 1:last] - xy[first]
+        chord_length = np.hypot(*chord)
+        if chord_length == 0:
+            distances = np.hypot(offsets[:, 0], offsets[:, 1])
+        else:
+            distances = np.abs(chord[0] * offsets[:, 1] - chord[1] * offsets[:, 0]) / chord_length
+        
+        farthest = int(np.argmax(distances))
+        if distances[farthest] > tolerance:
+            split = first + 1 + farthest
+            keep[split] = True
+            stack.append((first, split))
+            stack.append((split, last))
+    
+    return points[keep]
+
+
+def simplification_tolerance(bounds: np.ndarray, width_px: int, height_px: int,
+                             pixels: float = MAP_SIMPLIFY_PX,
+                             zoom_levels: int = MAP_DETAIL_ZOOM_LEVELS) -> float:
+    """Degrees covered by the given number of pixels after zooming in from the fitted map
+    
+    Every zoom level halves the degrees per pixel, so a line simplified with
+    this tolerance stays within ``pixels`` of the route for ``zoom_levels``
+    levels past the view fitted to bounds. The tolerance never drops below a
+    pixel at MAP_MAX_ZOOM, where the map stops zooming.
+    """
+    (south, west), (north, east) = bounds
+    cos_lat = np.cos(np.radians((north + south) / 2))
+    lat_span = north - south
+    lon_span = (east - west) * cos_lat
+    degrees_per_px = max(lat_span / height_px, lon_span / width_px)
+    # Web Mercator zoom 0 fits 360 degrees of longitude into one 256 px tile
+    max_zoom_degrees_per_px = 360 / (256 * 2 ** MAP_MAX_ZOOM) * cos_lat
+    return max(degrees_per_px / 2 ** zoom_levels, max_zoom_degrees_per_px) * pixels
+
+
+def geohash_cell(lat: float, lon: float, precision: int) -> Tuple[str, Tuple[float, float]]:
+    """Geohash of a point and the centre of its cell"""
+    lat_range, lon_range = [-90.0, 90.0], [-180.0, 180.0]
+    chars, bits, value, even = [], 0, 0, True
+    while len(chars) < precision:
+        # Bits alternate between longitude and latitude, longitude first
+        rng, coord = (lon_range, lon) if even else (lat_range, lat)
+        mid = (rng[0] + rng[1]) / 2
+        if coord >= mid:
+            value = value * 2 + 1
+            rng[0] = mid
+        else:
+            value *= 2
+            rng[1] = mid
+        even = not even
+        bits += 1
+        if bits == 5:
+            chars.append(_GEOHASH_ALPHABET[value])
+            bits, value = 0, 0
+    center = ((lat_range[0] + lat_range[1]) / 2, (lon_range[0] + lon_range[1]) / 2)
+    return "".join(chars), center
+
+
+def merge_route_legs(routes: List[Dict]) -> Dict:
+    """Join consecutive ORS GeoJSON directions responses into a single route"""
+    merged = json.loads(json.dumps(routes[0]))
+    feature = merged['features'][0]
+    coordinates = feature['geometry']['coordinates']
+    properties = feature['properties']
+    summary = properties.setdefault('summary', {})
+    
+    for route in routes[1:]:
+        leg = route['features'][0]
+        offset = len(coordinates) - 1
+        # Each chunk starts where the previous one ended
+        coordinates.extend(leg['geometry']['coordinates'][1:])
+        for segment in leg['properties']['segments']:
+            for step in segment.get('steps', []):
+                step['way_points'] = [w + offset for w in step.get('way_points', [])]
+            properties['segments'].append(segment)
+        properties['way_points'] = (properties.get('way_points', [])[:-1]
+                                    + [w + offset for w in leg['properties'].get('way_points', [])])
+        for metric in ('distance', 'duration'):
+            summary[metric] = summary.get(metric, 0) + leg['properties'].get('summary', {}).get(metric, 0)
+    
+    merged.pop('bbox', None)
+    feature.pop('bbox', None)
+    return merged
@@ -0,0 +1,127 @@
+"""Persistent search history with incrementally maintained analytics"""
+
+import os
+import sqlite3
+import threading
+from typing import Tuple, List, Dict
+
+from .cache import GeocodeStore
+from .config import HISTORY_DB
+
+
+class HistoryStore:
+    """Append-only search log partitioned by user, shared by all worker processes
+    
+    Every search is appended to ``searches``; per-user totals and destination
+    counts are updated in the same transaction, so the dashboard reads a
+    handful of pre-aggregated rows instead of scanning the whole log.
+    """
+    
+    def __init__(self, path: str):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False,
+                                     isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS searches (
+                id INTEGER PRIMARY KEY,
+                user_id TEXT NOT NULL,
+                entry_id TEXT NOT NULL,
+                timestamp TEXT NOT NULL,
+                start_place TEXT NOT NULL,
+                end_place TEXT NOT NULL,
+                distance REAL NOT NULL,
+                duration REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS searches_user ON searches(user_id, id);
+            
+            CREATE TABLE IF NOT EXISTS user_totals (
+                user_id TEXT PRIMARY KEY,
+                searches INTEGER NOT NULL,
+                distance REAL NOT NULL,
+                duration REAL NOT NULL
+            );
+            
+            CREATE TABLE IF NOT EXISTS destinations (
+                user_id TEXT NOT NULL,
+                place_key TEXT NOT NULL,
+                name TEXT NOT NULL,
+                searches INTEGER NOT NULL,
+                PRIMARY KEY (user_id, place_key)
+            );
+            CREATE INDEX IF NOT EXISTS destinations_rank ON destinations(user_id, searches);
+        """)
+    
+    def record(self, user_id: str, entry: Dict):
+        """Append a history entry (see make_history_entry) and update the aggregates"""
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.execute(
+                    "INSERT INTO searches (user_id, entry_id, timestamp, start_place, end_place, "
+                    "distance, duration) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (user_id, entry['id'], entry['timestamp'], entry['start'], entry['end'],
+                     entry['distance'], entry['duration'])
+                )
+                self._conn.execute(
+                    "INSERT INTO user_totals (user_id, searches, distance, duration) VALUES (?, 1, ?, ?) "
+                    "ON CONFLICT(user_id) DO UPDATE SET searches = searches + 1, "
+                    "distance = distance + excluded.distance, duration = duration + excluded.duration",
+                    (user_id, entry['distance'], entry['duration'])
+                )
+                self._conn.execute(
+                    "INSERT INTO destinations (user_id, place_key, name, searches) VALUES (?, ?, ?, 1) "
+                    "ON CONFLICT(user_id, place_key) DO UPDATE SET searches = searches + 1, "
+                    "name = excluded.name",
+                    (user_id, GeocodeStore.normalize(entry['end']), entry['end'])
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+    
+    def recent(self, user_id: str, limit: int = 10) -> List[Dict]:
+        """Most recent entries first, in the make_history_entry format"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT entry_id, timestamp, start_place, end_place, distance, duration FROM searches "
+                "WHERE user_id = ? ORDER BY id DESC LIMIT ?",
+                (user_id, limit)
+            ).fetchall()
+        return [
+            {'id': entry_id, 'timestamp': timestamp, 'start': start_place, 'end': end_place,
+             'distance': distance, 'duration': duration}
+            for entry_id, timestamp, start_place, end_place, distance, duration in rows
+        ]
+    
+    def totals(self, user_id: str) -> Dict:
+        """Search count, total and mean distance (km) and duration (min)"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT searches, distance, duration FROM user_totals WHERE user_id = ?",
+                (user_id,)
+            ).fetchone()
+        searches, distance, duration = row or (0, 0.0, 0.0)
+        return {
+            'searches': searches,
+            'distance': distance,
+            'duration': duration,
+            'mean_distance': distance / searches if searches else 0.0,
+            'mean_duration': duration / searches if searches else 0.0
+        }
+    
+    def top_destinations(self, user_id: str, limit: int = 10) -> List[Tuple[str, int]]:
+        """Most searched destinations with their search counts"""
+        with self._lock:
+            return self._conn.execute(
+                "SELECT name, searches FROM destinations WHERE user_id = ? "
+                "ORDER BY searches DESC, name LIMIT ?",
+                (user_id, limit)
+            ).fetchall()
+
+
+def open_history_store(path: str = HISTORY_DB) -> HistoryStore:
+    """Search history store in the user data directory"""
+    return HistoryStore(path)
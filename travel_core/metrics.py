@@ -0,0 +1,165 @@
+"""In-process timing and counter metrics, exported as Prometheus text or JSON
+
+Stages are timed with ``metrics.span("stage")``; caches count hits and
+misses and upstream calls count their failures. Histograms keep Prometheus
+buckets for scraping plus a ring buffer of recent samples for p50/p95/p99.
+Metrics are per process; with several workers, scrape each one.
+"""
+
+import functools
+import threading
+import time
+from contextlib import contextmanager
+from typing import Optional, Tuple, List, Dict
+
+import numpy as np
+
+# Stage latency, cache lookups and upstream failures
+STAGE_SECONDS = "travel_stage_seconds"
+CACHE_REQUESTS = "travel_cache_requests_total"
+UPSTREAM_ERRORS = "travel_upstream_errors_total"
+
+# Histogram bucket upper bounds, in seconds
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+class Histogram:
+    """Bucketed counts plus the most recent samples for percentiles"""
+    
+    def __init__(self, reservoir: int):
+        self.counts = np.zeros(len(BUCKETS) + 1, dtype=np.int64)
+        self.count = 0
+        self.sum = 0.0
+        self.recent = np.empty(reservoir)
+        self._next = 0
+    
+    def observe(self, value: float):
+        """Record one sample"""
+        self.counts[np.searchsorted(BUCKETS, value)] += 1
+        self.count += 1
+        self.sum += value
+        self.recent[self._next % len(self.recent)] = value
+        self._next += 1
+    
+    def percentiles(self, quantiles=(50, 95, 99)) -> List[float]:
+        """Percentiles of the recent samples"""
+        samples = self.recent[:min(self._next, len(self.recent))]
+        if len(samples) == 0:
+            return [0.0] * len(quantiles)
+        return np.percentile(samples, quantiles).tolist()
+
+
+class Metrics:
+    """Thread-safe registry of labelled counters and histograms"""
+    
+    def __init__(self, reservoir: int = 2048):
+        self.reservoir = reservoir
+        self._counters: Dict[Tuple[str, Labels], float] = {}
+        self._histograms: Dict[Tuple[str, Labels], Histogram] = {}
+        self._lock = threading.Lock()
+    
+    def inc(self, name: str, amount: float = 1, **labels):
+        """Add to a counter"""
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+    
+    def observe(self, name: str, value: float, **labels):
+        """Record a sample in a histogram"""
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram(self.reservoir)
+            histogram.observe(value)
+    
+    @contextmanager
+    def span(self, stage: str):
+        """Time the enclosed block as a stage, whether or not it raises"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(STAGE_SECONDS, time.perf_counter() - start, stage=stage)
+    
+    def timed(self, stage: str):
+        """Decorator timing every call of a function as a stage"""
+        def decorator(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.span(stage):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+    
+    def cache_result(self, cache: str, hit: bool):
+        """Count a cache lookup"""
+        self.inc(CACHE_REQUESTS, cache=cache, result="hit" if hit else "miss")
+    
+    def upstream_error(self, provider: str, error: BaseException):
+        """Count a failed upstream call, telling rate limiting apart from other errors"""
+        status = (getattr(error, "status", None) or getattr(error, "status_code", None)
+                  or getattr(getattr(error, "response", None), "status_code", None))
+        kind = "rate_limited" if status == 429 else "error"
+        self.inc(UPSTREAM_ERRORS, provider=provider, kind=kind)
+    
+    def reset(self):
+        """Drop every recorded value"""
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+    
+    def snapshot(self) -> Dict:
+        """Current values as JSON-serializable data, with p50/p95/p99 per histogram"""
+        with self._lock:
+            counters = [
+                {"name": name, "labels": dict(labels), "value": value}
+                for (name, labels), value in sorted(self._counters.items())
+            ]
+            histograms = []
+            for (name, labels), histogram in sorted(self._histograms.items(), key=lambda item: item[0]):
+                p50, p95, p99 = histogram.percentiles()
+                histograms.append({
+                    "name": name,
+                    "labels": dict(labels),
+                    "count": histogram.count,
+                    "sum": histogram.sum,
+                    "p50": p50,
+                    "p95": p95,
+                    "p99": p99
+                })
+        return {"counters": counters, "histograms": histograms}
+    
+    def prometheus(self) -> str:
+        """Current values in the Prometheus text exposition format"""
+        def format_labels(labels: Labels, extra: Optional[Tuple[str, str]] = None) -> str:
+            pairs = [*labels, extra] if extra else list(labels)
+            if not pairs:
+                return ""
+            return "{" + ",".join(f'{key}="{value}"' for key, value in pairs) + "}"
+        
+        lines = []
+        with self._lock:
+            typed = set()
+            for (name, labels), value in sorted(self._counters.items()):
+                if name not in typed:
+                    lines.append(f"# TYPE {name} counter")
+                    typed.add(name)
+                lines.append(f"{name}{format_labels(labels)} {value:g}")
+            
+            for (name, labels), histogram in sorted(self._histograms.items(), key=lambda item: item[0]):
+                if name not in typed:
+                    lines.append(f"# TYPE {name} histogram")
+                    typed.add(name)
+                cumulative = np.cumsum(histogram.counts)
+                for bound, count in zip((*BUCKETS, "+Inf"), cumulative):
+                    lines.append(f"{name}_bucket{format_labels(labels, ('le', str(bound)))} {count}")
+                lines.append(f"{name}_sum{format_labels(labels)} {histogram.sum:g}")
+                lines.append(f"{name}_count{format_labels(labels)} {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+
+# Registry shared by everything in the process
+metrics = Metrics()
@@ -0,0 +1,83 @@
+"""Visiting-order optimization for multi-stop trips"""
+
+from typing import Optional, List
+
+import numpy as np
+
+
+def solve_stop_order(cost: np.ndarray, max_moves: Optional[int] = None) -> List[int]:
+    """Order points to minimise total cost of an open path with fixed endpoints
+    
+    Index 0 is the start and the last index the destination. A nearest-neighbour
+    tour is improved with 2-opt and Or-opt moves, each scored for all
+    candidate positions at once with NumPy.
+    """
+    cost = np.asarray(cost, dtype=float)
+    n = len(cost)
+    if n <= 3:
+        return list(range(n))
+    
+    # Nearest-neighbour construction
+    tour = [0]
+    unvisited = np.ones(n, dtype=bool)
+    unvisited[[0, n - 1]] = False
+    for _ in range(n - 2):
+        current = int(np.argmin(np.where(unvisited, cost[tour[-1]], np.inf)))
+        tour.append(current)
+        unvisited[current] = False
+    tour.append(n - 1)
+    tour = np.array(tour)
+    
+    max_moves = max_moves if max_moves is not None else 20 * n
+    for _ in range(max_moves):
+        best_delta, best_tour = -1e-9, None
+        
+        # 2-opt: reverse tour[i..j]; asymmetric costs are handled through
+        # prefix sums of the change along the reversed stretch
+        fwd = cost[tour[:-1], tour[1:]]
+        bwd = cost[tour[1:], tour[:-1]]
+        prefix = np.concatenate(([0.0], np.cumsum(bwd - fwd)))
+        idx = np.arange(1, n - 1)
+        i, j = np.meshgrid(idx, idx, indexing="ij")
+        delta = (cost[tour[i - 1], tour[j]] + cost[tour[i], tour[j + 1]]
+                 - cost[tour[i - 1], tour[i]] - cost[tour[j], tour[j + 1]]
+                 + prefix[j] - prefix[i])
+        delta = np.where(j > i, delta, np.inf)
+        flat = int(np.argmin(delta))
+        if delta.flat[flat] < best_delta:
+            bi, bj = i.flat[flat], j.flat[flat]
+            best_delta = delta.flat[flat]
+            best_tour = np.concatenate((tour[:bi], tour[bi:bj + 1][::-1], tour[bj + 1:]))
+        
+        # Or-opt: move a run of 1-3 stops between two other neighbours
+        for length in (1, 2, 3):
+            if n - 2 < length + 1:
+                break
+            starts = np.arange(1, n - length)
+            seg_first, seg_last = tour[starts], tour[starts + length - 1]
+            before, after = tour[starts - 1], tour[starts + length]
+            removal_gain = (cost[before, seg_first] + cost[seg_last, after]
+                            - cost[before, after])
+            
+            k = np.arange(n - 1)
+            insertion_cost = (cost[tour[k][None, :], seg_first[:, None]]
+                              + cost[seg_last[:, None], tour[k + 1][None, :]]
+                              - cost[tour[k], tour[k + 1]][None, :])
+            # Insertion edges must lie outside the moved run and its old neighbours
+            valid = (k[None, :] < starts[:, None] - 1) | (k[None, :] > starts[:, None] + length - 1)
+            delta = np.where(valid, insertion_cost - removal_gain[:, None], np.inf)
+            flat = int(np.argmin(delta))
+            if delta.flat[flat] < best_delta:
+                si, bk = divmod(flat, n - 1)
+                start = starts[si]
+                segment = tour[start:start + length]
+                rest = np.concatenate((tour[:start], tour[start + length:]))
+                position = bk + 1 if bk < start else bk - length + 1
+                best_delta = delta.flat[flat]
+                best_tour = np.concatenate((rest[:position], segment, rest[position:]))
+        
+        if best_tour is None:
+            break
+        tour = best_tour
+    
+    return tour.tolist()
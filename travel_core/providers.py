@@ -0,0 +1,66 @@
+"""Upstream providers used by the travel service"""
+
+from functools import partial
+from typing import Optional, Tuple
+from urllib.parse import urlsplit
+
+from .config import GAZETTEER_INDEX, HTTP_POOL_SIZE, HTTP_RETRIES, NOMINATIM_RATE, NOMINATIM_URL
+from .gazetteer import LocalGeocoder, open_gazetteer
+from .ratelimit import RateLimiter
+
+
+class NominatimGeocoder:
+    """Geocoder backed by the public Nominatim service"""
+    
+    def __init__(self, limiter: Optional[RateLimiter] = None,
+                 user_agent: str = "smart-travel-companion", timeout: float = 10,
+                 url: str = NOMINATIM_URL):
+        from geopy.adapters import RequestsAdapter
+        from geopy.geocoders import Nominatim
+        
+        self.limiter = limiter
+        endpoint = urlsplit(url)
+        # One geolocator keeps one keep-alive connection pool for all lookups
+        self.geolocator = Nominatim(
+            user_agent=user_agent,
+            timeout=timeout,
+            domain=endpoint.netloc + endpoint.path.rstrip("/"),
+            scheme=endpoint.scheme,
+            adapter_factory=partial(
+                RequestsAdapter,
+                pool_connections=HTTP_POOL_SIZE,
+                pool_maxsize=HTTP_POOL_SIZE,
+                max_retries=HTTP_RETRIES
+            )
+        )
+    
+    def geocode(self, place_name: str) -> Optional[Tuple[float, float]]:
+        """Return (lat, lon) for a place name, or None if it is not found"""
+        if self.limiter:
+            self.limiter.acquire()
+        location = self.geolocator.geocode(place_name)
+        return (location.latitude, location.longitude) if location else None
+
+
+class FallbackGeocoder:
+    """Try geocoders in order, moving on only when one has no match"""
+    
+    def __init__(self, *geocoders):
+        self.geocoders = geocoders
+    
+    def geocode(self, place_name: str) -> Optional[Tuple[float, float]]:
+        """Return the first match found, or None"""
+        for geocoder in self.geocoders:
+            coords = geocoder.geocode(place_name)
+            if coords:
+                return coords
+        return None
+
+
+def create_geocoder(index_dir: str = GAZETTEER_INDEX):
+    """Nominatim geocoder, preceded by the offline gazetteer when an index exists"""
+    nominatim = NominatimGeocoder(RateLimiter(NOMINATIM_RATE, name="nominatim"))
+    index = open_gazetteer(index_dir)
+    if index is None:
+        return nominatim
+    return FallbackGeocoder(LocalGeocoder(index), nominatim)
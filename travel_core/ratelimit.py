@@ -0,0 +1,34 @@
+"""Rate limiting for upstream APIs"""
+
+import threading
+import time
+
+from .metrics import STAGE_SECONDS, metrics
+
+
+class RateLimiter:
+    """Thread-safe token bucket shared by every caller of an upstream API"""
+
+    def __init__(self, rate: float, burst: int = 1, name: str = "upstream"):
+        self.rate = rate
+        self.burst = burst
+        self.name = name
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+    
+    def acquire(self):
+        """Block until a request may be sent"""
+        started = time.perf_counter()
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    break
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+        # Time spent queued behind the limit, per upstream
+        metrics.observe(STAGE_SECONDS, time.perf_counter() - started, stage=f"rate_limit_wait_{self.name}")
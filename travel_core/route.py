@@ -0,0 +1,215 @@
+"""Compact, array-backed routes for long-lived state
+
+A directions response is a deep tree of dicts and lists: every coordinate
+is a two-float list and every step a dict. ``CompactRoute`` holds the same
+routes as a few flat NumPy arrays each, a small fraction of the memory, and
+rebuilds GeoJSON only for callers that need the payload itself.
+"""
+
+import hashlib
+from typing import Optional, Union, List, Dict
+
+import numpy as np
+
+from .directions import DirectionsView, directions_from_steps
+
+# Coordinates are kept as fixed-point micro-degrees (~0.1 m), finer than
+# ORS reports them, so converting back reproduces the response's values
+COORD_SCALE = 1_000_000
+
+
+def _fixed(values: List[List[float]]) -> np.ndarray:
+    """(N, 2) lat/lon micro-degrees from GeoJSON [lon, lat, ...] positions"""
+    if not values:
+        return np.empty((0, 2), dtype=np.int32)
+    coordinates = np.asarray(values, dtype=float)
+    return np.rint(coordinates[:, 1::-1] * COORD_SCALE).astype(np.int32)
+
+
+class RouteLine:
+    """One route of a directions response, with its geometry and steps in flat arrays"""
+    
+    __slots__ = (
+        "points", "elevation", "distance", "duration", "ascent", "descent", "way_points",
+        "leg_distance", "leg_duration", "leg_steps",
+        "step_distance", "step_duration", "step_type", "step_way_points", "step_instruction", "step_name",
+        "extras"
+    )
+    
+    def __init__(self, feature: Dict):
+        coordinates = feature['geometry']['coordinates']
+        properties = feature['properties']
+        summary = properties.get('summary', {})
+        segments = properties.get('segments', [])
+        steps = [step for segment in segments for step in segment.get('steps', [])]
+        
+        self.points = _fixed(coordinates)
+        # Elevation is only present when it was requested
+        self.elevation = (np.asarray([c[2] for c in coordinates], dtype=np.float32)
+                          if coordinates and len(coordinates[0]) > 2 else None)
+        self.distance = float(summary.get('distance', 0))
+        self.duration = float(summary.get('duration', 0))
+        self.ascent = properties.get('ascent')
+        self.descent = properties.get('descent')
+        self.way_points = np.asarray(properties.get('way_points', []), dtype=np.int32)
+        
+        self.leg_distance = np.array([segment.get('distance', 0) for segment in segments], dtype=float)
+        self.leg_duration = np.array([segment.get('duration', 0) for segment in segments], dtype=float)
+        self.leg_steps = np.array([len(segment.get('steps', [])) for segment in segments], dtype=np.int32)
+        
+        self.step_distance = np.array([step.get('distance', 0) for step in steps], dtype=float)
+        self.step_duration = np.array([step.get('duration', 0) for step in steps], dtype=float)
+        self.step_type = np.array([step.get('type', -1) for step in steps], dtype=np.int16)
+        self.step_way_points = np.array([step.get('way_points', [0, 0]) for step in steps],
+                                        dtype=np.int32).reshape(-1, 2)
+        self.step_instruction = np.array([step.get('instruction', '') for step in steps], dtype=object)
+        self.step_name = np.array([step.get('name', '') for step in steps], dtype=object)
+        
+        # Extra info (tollways, waytypes, ...) as [from, to, value] rows per kind
+        self.extras = {
+            kind: np.asarray(info.get('values', []), dtype=np.int64).reshape(-1, 3)
+            for kind, info in properties.get('extras', {}).items()
+        }
+    
+    def __len__(self) -> int:
+        return len(self.points)
+    
+    def latlon(self) -> np.ndarray:
+        """Coordinates as an (N, 2) lat/lon array of degrees"""
+        return self.points / COORD_SCALE
+    
+    def leg_bounds(self) -> np.ndarray:
+        """Index of each leg's first step, plus the total step count"""
+        return np.concatenate([[0], np.cumsum(self.leg_steps)])
+    
+    def leg_starts(self) -> np.ndarray:
+        """Point index where each leg with steps begins"""
+        bounds = self.leg_bounds()
+        return self.step_way_points[bounds[:-1][self.leg_steps > 0], 0]
+    
+    def directions(self, leg_names: Optional[List[str]] = None) -> DirectionsView:
+        """Turn-by-turn directions of every leg"""
+        instructions = self.step_instruction.copy()
+        instructions[instructions == ''] = 'Continue'
+        legs = np.repeat(np.arange(len(self.leg_steps), dtype=np.int32), self.leg_steps)
+        return directions_from_steps(instructions, legs, self.step_distance, self.step_duration,
+                                     len(self.leg_steps), leg_names)
+    
+    def to_feature(self) -> Dict:
+        """Rebuild the GeoJSON feature"""
+        coordinates = np.round(self.latlon()[:, ::-1], 6)
+        if self.elevation is not None:
+            coordinates = np.column_stack([coordinates, np.round(self.elevation.astype(float), 1)])
+        bounds = self.leg_bounds()
+        segments = []
+        for leg in range(len(self.leg_steps)):
+            segments.append({
+                "distance": float(self.leg_distance[leg]),
+                "duration": float(self.leg_duration[leg]),
+                "steps": [
+                    {
+                        "distance": float(self.step_distance[i]),
+                        "duration": float(self.step_duration[i]),
+                        "type": int(self.step_type[i]),
+                        "instruction": self.step_instruction[i],
+                        "name": self.step_name[i],
+                        "way_points": self.step_way_points[i].tolist()
+                    }
+                    for i in range(bounds[leg], bounds[leg + 1])
+                ]
+            })
+        
+        properties = {
+            "segments": segments,
+            "summary": {"distance": self.distance, "duration": self.duration},
+            "way_points": self.way_points.tolist()
+        }
+        if self.ascent is not None:
+            properties.update(ascent=self.ascent, descent=self.descent)
+        if self.extras:
+            properties["extras"] = {kind: {"values": values.tolist()} for kind, values in self.extras.items()}
+        
+        feature = {"type": "Feature", "geometry": {"type": "LineString", "coordinates": coordinates.tolist()},
+                   "properties": properties}
+        if len(self.points):
+            feature["bbox"] = [*coordinates[:, :2].min(axis=0).tolist(), *coordinates[:, :2].max(axis=0).tolist()]
+        return feature
+    
+    @property
+    def nbytes(self) -> int:
+        """Approximate memory held by the arrays and strings"""
+        arrays = [self.points, self.way_points, self.leg_distance, self.leg_duration, self.leg_steps,
+                  self.step_distance, self.step_duration, self.step_type, self.step_way_points,
+                  self.step_instruction, self.step_name, *self.extras.values()]
+        if self.elevation is not None:
+            arrays.append(self.elevation)
+        strings = sum(len(text) + 49 for text in (*self.step_instruction, *self.step_name))
+        return sum(array.nbytes for array in arrays) + strings
+    
+    def update_digest(self, digest):
+        """Feed everything that identifies the route into a hashlib digest"""
+        for array in (self.points, self.step_way_points, self.step_distance, self.step_duration):
+            digest.update(np.ascontiguousarray(array).tobytes())
+        digest.update("\x00".join((*self.step_instruction, *self.step_name)).encode())
+        digest.update(f"{self.distance}:{self.duration}".encode())
+
+
+class CompactRoute:
+    """A directions response, main route first, held as RouteLines"""
+    
+    __slots__ = ("routes", "metadata")
+    
+    def __init__(self, routes: List[RouteLine], metadata: Optional[Dict] = None):
+        self.routes = routes
+        self.metadata = metadata
+    
+    @classmethod
+    def from_geojson(cls, route: Dict) -> "CompactRoute":
+        """Compact an ORS GeoJSON directions response"""
+        return cls([RouteLine(feature) for feature in route['features']], route.get('metadata'))
+    
+    @property
+    def main(self) -> RouteLine:
+        """The route ORS ranked first"""
+        return self.routes[0]
+    
+    def with_main(self, index: int) -> "CompactRoute":
+        """The same routes with another one first, sharing the arrays"""
+        return CompactRoute([self.routes[index], *(line for i, line in enumerate(self.routes) if i != index)],
+                            self.metadata)
+    
+    def to_geojson(self) -> Dict:
+        """Rebuild the GeoJSON directions response"""
+        features = [line.to_feature() for line in self.routes]
+        route = {"type": "FeatureCollection", "features": features}
+        boxes = np.array([feature["bbox"] for feature in features if "bbox" in feature])
+        if len(boxes):
+            route["bbox"] = [*boxes[:, :2].min(axis=0).tolist(), *boxes[:, 2:].max(axis=0).tolist()]
+        if self.metadata is not None:
+            route["metadata"] = self.metadata
+        return route
+    
+    @property
+    def nbytes(self) -> int:
+        """Approximate memory held by all routes"""
+        return sum(line.nbytes for line in self.routes)
+    
+    def digest(self) -> str:
+        """Stable hash of the routes' geometry and steps"""
+        digest = hashlib.sha1()
+        for line in self.routes:
+            line.update_digest(digest)
+        return digest.hexdigest()
+
+
+RouteLike = Union[Dict, CompactRoute]
+
+
+def compact_route(route: RouteLike) -> CompactRoute:
+    """A route as a CompactRoute, converting a GeoJSON response"""
+    return route if isinstance(route, CompactRoute) else CompactRoute.from_geojson(route)
+
+
+def route_geojson(route: RouteLike) -> Dict:
+    """A route as a GeoJSON response, rebuilding it from a CompactRoute"""
+    return route.to_geojson() if isinstance(route, CompactRoute) else route
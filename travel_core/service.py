@@ -0,0 +1,538 @@
+"""UI-free travel operations with pluggable providers and caches"""
+
+import hashlib
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Optional, Tuple, List, Dict, Iterator
+
+import numpy as np
+
+from .assistant import ConversationMemory, build_prompt, stream_chat_text
+from .cache import GeocodeStore, IsochroneCache, RouteCache, ResponseCache
+from .config import (
+    GEOCODE_WORKERS,
+    ISOCHRONE_GEOHASH_PRECISION,
+    ORS_ISOCHRONE_MAX_LOCATIONS,
+    ORS_ISOCHRONE_MAX_RANGES,
+    ORS_MAX_WAYPOINTS,
+    RESPONSE_CACHE_SEMANTIC,
+    ROUTE_EXTRA_INFO,
+    WEATHER_ROUTE_SAMPLES,
+)
+from .geometry import geohash_cell, merge_route_legs
+from .metrics import CACHE_REQUESTS, STAGE_SECONDS, metrics
+from .optimize import solve_stop_order
+from .route import RouteLike, compact_route
+from .singleflight import LeaderCancelled, SingleFlight, shared_flights
+from .suggest import PlaceSuggester
+from .weather import WeatherService
+
+Coords = Tuple[float, float]
+
+# Route preferences understood by ORS
+PREFERENCES = ('fastest', 'shortest', 'recommended')
+
+
+@dataclass
+class RouteResult:
+    """A directions response and where it came from"""
+    route: Dict
+    cached: bool = False
+    stale: bool = False
+
+
+@dataclass
+class ChatRequest:
+    """A prepared assistant request: the prompt, its history and its cache scope"""
+    question: str
+    prompt: str
+    chat_kwargs: Dict
+    cache_scope: str
+    semantic: bool
+    history: List[Dict] = field(default_factory=list)
+    
+    @property
+    def key(self) -> str:
+        """Identity of the request for coalescing identical calls"""
+        return hashlib.sha1(f"{self.cache_scope}\x00{self.prompt}".encode()).hexdigest()
+
+
+def make_history_entry(start_place: str, end_place: str,
+                       distance: float, duration: float) -> Dict:
+    """Build a search history entry"""
+    now = datetime.now()
+    return {
+        # Include milliseconds so entries created in the same second stay unique
+        'id': now.strftime('%Y%m%d_%H%M%S_%f')[:-3],
+        'timestamp': now.strftime('%Y-%m-%d %H:%M:%S'),
+        'start': start_place,
+        'end': end_place,
+        'distance': distance,
+        'duration': duration
+    }
+
+
+class TravelService:
+    """Geocoding, routing and assistant operations independent of any UI
+    
+    Providers are plain objects: ``geocoder`` exposes ``geocode(name)``,
+    ``router`` is an ``openrouteservice.Client`` (or anything with the same
+    ``directions``, ``distance_matrix`` and ``isochrones`` methods) and
+    ``chat_client`` is a ``cohere.Client``. Any cache may be left out to
+    disable that layer. Upstream failures are raised to the caller.
+    
+    Concurrent identical geocode, route and assistant requests are coalesced
+    through ``flights``, which defaults to one instance shared process-wide.
+    Places that geocode successfully are added to ``places`` for type-ahead.
+    ``weather`` is a ``WeatherService``; without one weather lookups fail.
+    Reachable areas are cached in ``isochrone_cache``.
+    """
+    
+    def __init__(self, geocoder=None, router=None, chat_client=None,
+                 geocode_store: Optional[GeocodeStore] = None,
+                 route_cache: Optional[RouteCache] = None,
+                 response_cache: Optional[ResponseCache] = None,
+                 geocode_workers: int = GEOCODE_WORKERS,
+                 chat_model: str = "command-r",
+                 chat_temperature: float = 0.7,
+                 chat_max_tokens: int = 1000,
+                 flights: Optional[SingleFlight] = None,
+                 places: Optional[PlaceSuggester] = None,
+                 weather: Optional[WeatherService] = None,
+                 isochrone_cache: Optional[IsochroneCache] = None):
+        self.geocoder = geocoder
+        self.router = router
+        self.chat_client = chat_client
+        self.geocode_store = geocode_store
+        self.route_cache = route_cache
+        self.response_cache = response_cache
+        self.geocode_workers = geocode_workers
+        self.chat_model = chat_model
+        self.chat_temperature = chat_temperature
+        self.chat_max_tokens = chat_max_tokens
+        self.flights = flights or shared_flights
+        self.places = places
+        self.weather = weather
+        self.isochrone_cache = isochrone_cache
+    
+    # Geocoding
+    
+    def geocode(self, place_name: str) -> Optional[Coords]:
+        """Geocode a place name to coordinates, or None if it is not found"""
+        results, errors = self.geocode_many([place_name])
+        if place_name in errors:
+            raise errors[place_name]
+        return results[place_name]
+    
+    @metrics.timed("geocode")
+    def geocode_many(self, place_names: List[str]) -> Tuple[Dict[str, Optional[Coords]], Dict[str, Exception]]:
+        """Geocode several place names concurrently, querying each distinct name once
+        
+        Returns the coordinates per name (None when not found or failed) and
+        the upstream error for each name that failed.
+        """
+        normalize = self.geocode_store.normalize if self.geocode_store else GeocodeStore.normalize
+        resolved = {}
+        pending = {}
+        
+        # Serve cache hits directly and dedupe names that normalize the same
+        for name in place_names:
+            key = normalize(name)
+            if key in resolved or key in pending:
+                continue
+            hit, coords = self.geocode_store.lookup(name) if self.geocode_store else (False, None)
+            metrics.cache_result("geocode", hit)
+            if hit:
+                resolved[key] = coords
+            else:
+                pending[key] = name
+        
+        failed = {}
+        if pending:
+            if self.geocoder is None:
+                raise RuntimeError("No geocoding provider configured")
+            workers = min(self.geocode_workers, len(pending))
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                futures = {
+                    key: pool.submit(self.flights.do, f"geocode:{key}", self._geocode_remote, name)
+                    for key, name in pending.items()
+                }
+            
+            for key, future in futures.items():
+                try:
+                    resolved[key] = future.result()
+                except Exception as e:
+                    failed[key] = e
+                    resolved[key] = None
+        
+        results = {name: resolved[normalize(name)] for name in place_names}
+        errors = {name: failed[normalize(name)] for name in place_names if normalize(name) in failed}
+        return results, errors
+    
+    def _geocode_remote(self, place_name: str) -> Optional[Coords]:
+        """Query the geocoder and cache the answer"""
+        # A call that finished just before this one joined may have filled the cache
+        if self.geocode_store:
+            hit, coords = self.geocode_store.lookup(place_name)
+            if hit:
+                return coords
+        
+        try:
+            with metrics.span("geocode_upstream"):
+                coords = self.geocoder.geocode(place_name)
+        except Exception as e:
+            metrics.upstream_error("geocoder", e)
+            raise
+        # Only definitive answers are cached; errors propagate to the caller
+        if self.geocode_store:
+            self.geocode_store.save(place_name, coords)
+        if coords and self.places is not None:
+            self.places.add(place_name, coords)
+        return coords
+    
+    def remember_place(self, place_name: str, coords: Coords):
+        """Record a place whose coordinates are already known, e.g. a picked suggestion"""
+        if self.geocode_store:
+            hit, _ = self.geocode_store.lookup(place_name)
+            if not hit:
+                self.geocode_store.save(place_name, coords)
+        if self.places is not None:
+            self.places.add(place_name, coords)
+    
+    # Routing
+    
+    @metrics.timed("route")
+    def route(self, start_coords: Coords, end_coords: Coords,
+              profile: str = 'driving-car', preference: str = 'fastest',
+              avoid_features: Optional[List[str]] = None,
+              waypoints: Optional[List[Coords]] = None) -> RouteResult:
+        """Calculate a route passing through any waypoints in order"""
+        if self.router is None:
+            raise RuntimeError("No routing provider configured")
+        
+        preference = preference.lower() if preference.lower() in PREFERENCES else 'fastest'
+        options = {'avoid_features': list(avoid_features or [])}
+        points = [start_coords, *(waypoints or []), end_coords]
+        coordinates = [tuple(point)[::-1] for point in points]
+        
+        # ORS only computes alternatives for plain two-point routes; heights and
+        # extra info come with them so they can be compared side by side
+        params = {}
+        if len(coordinates) == 2:
+            params['alternative_routes'] = {'target_count': 2, 'weight_factor': 1.4}
+            params['elevation'] = True
+            params['extra_info'] = ROUTE_EXTRA_INFO
+        
+        if self.route_cache:
+            cache_key = self.route_cache.make_key(
+                coordinates, profile, preference, options['avoid_features'], **params
+            )
+            route = self.route_cache.get(cache_key)
+            metrics.cache_result("route", route is not None)
+            if route:
+                return RouteResult(route, cached=True)
+        else:
+            key_data = [coordinates, profile, preference, options, params]
+            cache_key = hashlib.sha1(json.dumps(key_data, sort_keys=True).encode()).hexdigest()
+        
+        try:
+            route = self.flights.do(
+                f"route:{cache_key}", self._fetch_route,
+                cache_key, coordinates, profile, options, preference, params
+            )
+        except Exception:
+            # Fall back to an expired entry if the router is unavailable
+            route = self.route_cache.get(cache_key, allow_stale=True) if self.route_cache else None
+            if not route:
+                raise
+            metrics.inc(CACHE_REQUESTS, cache="route", result="stale")
+            return RouteResult(route, cached=True, stale=True)
+        
+        return RouteResult(route)
+    
+    def _fetch_route(self, cache_key: str, coordinates: List, profile: str, options: Dict,
+                     preference: str, params: Dict) -> Dict:
+        """Request directions and cache them"""
+        if self.route_cache:
+            # A call that finished just before this one joined may have filled the cache
+            route = self.route_cache.get(cache_key)
+            if route:
+                return route
+        
+        route = self._request_directions(coordinates, profile, options, preference, params)
+        if self.route_cache:
+            self.route_cache.set(cache_key, route)
+        return route
+    
+    def _request_directions(self, coordinates: List, profile: str, options: Dict,
+                            preference: str, params: Dict) -> Dict:
+        """Request directions, splitting long waypoint lists into chained requests"""
+        legs = []
+        chunk = ORS_MAX_WAYPOINTS - 1
+        for i in range(0, len(coordinates) - 1, chunk):
+            try:
+                with metrics.span("directions_upstream"):
+                    legs.append(self.router.directions(
+                        coordinates=coordinates[i:i + chunk + 1],
+                        profile=profile,
+                        format='geojson',
+                        options=options,
+                        preference=preference,
+                        **params
+                    ))
+            except Exception as e:
+                metrics.upstream_error("ors", e)
+                raise
+        return legs[0] if len(legs) == 1 else merge_route_legs(legs)
+    
+    def optimize_stop_order(self, start_coords: Coords, stops: List[Coords],
+                            end_coords: Coords, profile: str = 'driving-car') -> List[int]:
+        """Return the visiting order of stops that minimises total travel time"""
+        if self.router is None:
+            raise RuntimeError("No routing provider configured")
+        
+        points = [start_coords, *stops, end_coords]
+        # One matrix request replaces a directions call per pair of points
+        try:
+            with metrics.span("matrix_upstream"):
+                matrix = self.router.distance_matrix(
+                    locations=[tuple(point)[::-1] for point in points],
+                    profile=profile,
+                    metrics=['duration']
+                )
+        except Exception as e:
+            metrics.upstream_error("ors", e)
+            raise
+        durations = np.array(matrix['durations'], dtype=float)
+        # Unreachable pairs come back as null; make them prohibitively expensive
+        durations = np.nan_to_num(durations, nan=1e9)
+        
+        order = solve_stop_order(durations)
+        return [i - 1 for i in order[1:-1]]
+    
+    # Reachable areas
+    
+    def isochrones(self, centers: List[Coords], minutes: List[float],
+                   profile: str = 'driving-car') -> Dict:
+        """Areas reachable from each centre within each time range, as GeoJSON
+        
+        Centres are snapped to geohash cells, so nearby requests share cached
+        polygons. Cells with anything missing from the cache are fetched
+        together, in one upstream request unless the batch exceeds the ORS
+        limits. Features come back per centre, in ascending range, with
+        ``center_index``, ``minutes`` and ``area_km2``.
+        """
+        if self.router is None:
+            raise RuntimeError("No routing provider configured")
+        
+        ranges = sorted({int(round(m * 60)) for m in minutes})
+        cells = [geohash_cell(lat, lon, ISOCHRONE_GEOHASH_PRECISION) for lat, lon in centers]
+        
+        found = {}
+        missing_cells: Dict[str, Coords] = {}
+        missing_ranges = set()
+        for cell, center in dict.fromkeys(cells):
+            for seconds in ranges:
+                feature = None
+                if self.isochrone_cache:
+                    feature = self.isochrone_cache.get(self.isochrone_cache.make_key(cell, profile, seconds))
+                    metrics.cache_result("isochrone", feature is not None)
+                if feature:
+                    found[(cell, seconds)] = feature
+                else:
+                    missing_cells[cell] = center
+                    missing_ranges.add(seconds)
+        
+        # One request covers every missing cell and range; a few cached
+        # polygons may be fetched again rather than splitting the request
+        pending = list(missing_cells.items())
+        missing_ranges = sorted(missing_ranges)
+        for i in range(0, len(pending), ORS_ISOCHRONE_MAX_LOCATIONS):
+            batch = pending[i:i + ORS_ISOCHRONE_MAX_LOCATIONS]
+            for j in range(0, len(missing_ranges), ORS_ISOCHRONE_MAX_RANGES):
+                batch_ranges = missing_ranges[j:j + ORS_ISOCHRONE_MAX_RANGES]
+                key = f"isochrones:{profile}:{batch_ranges}:{[cell for cell, _ in batch]}"
+                found.update(self.flights.do(key, self._fetch_isochrones, batch, batch_ranges, profile))
+        
+        features = []
+        for index, ((cell, _), center) in enumerate(zip(cells, centers)):
+            for seconds in ranges:
+                feature = found.get((cell, seconds))
+                if feature is None:
+                    continue
+                features.append({
+                    "type": "Feature",
+                    "geometry": feature["geometry"],
+                    "properties": {
+                        "center_index": index,
+                        "center": list(center),
+                        "minutes": seconds / 60,
+                        # ORS reports areas in square metres
+                        "area_km2": feature["properties"].get("area", 0) / 1e6
+                    }
+                })
+        return {"type": "FeatureCollection", "features": features}
+    
+    def _fetch_isochrones(self, batch: List[Tuple[str, Coords]], ranges: List[int],
+                          profile: str) -> Dict[Tuple[str, int], Dict]:
+        """Request isochrones for several cell centres and ranges at once and cache them"""
+        try:
+            with metrics.span("isochrones_upstream"):
+                response = self.router.isochrones(
+                    locations=[center[::-1] for _, center in batch],
+                    profile=profile,
+                    range=ranges,
+                    attributes=['area']
+                )
+        except Exception as e:
+            metrics.upstream_error("ors", e)
+            raise
+        
+        results = {}
+        for feature in response['features']:
+            # group_index is the position of the feature's centre in the request
+            cell = batch[feature['properties']['group_index']][0]
+            seconds = int(feature['properties']['value'])
+            results[(cell, seconds)] = feature
+            if self.isochrone_cache:
+                self.isochrone_cache.set(self.isochrone_cache.make_key(cell, profile, seconds), feature)
+        return results
+    
+    # Weather
+    
+    def route_weather(self, route: RouteLike, samples: int = WEATHER_ROUTE_SAMPLES) -> List[Dict]:
+        """Current weather at evenly spaced points of the main route, ending at the destination"""
+        if self.weather is None:
+            raise RuntimeError("No weather provider configured")
+        return self.weather.along_route(compact_route(route).main.latlon(), samples)
+    
+    # Assistant
+    
+    def prepare_chat(self, question: str, history: Optional[List[Dict]] = None,
+                     context: Optional[List[str]] = None,
+                     memory: Optional[ConversationMemory] = None) -> ChatRequest:
+        """Build the prompt, fit earlier turns into the token budget and pick a cache scope"""
+        memory = memory or ConversationMemory()
+        context = list(context or [])
+        
+        # Fit earlier turns into the context budget, summarizing what is dropped
+        draft_prompt = build_prompt(question, context)
+        chat_history, earlier_summary = memory.fit(
+            history or [],
+            reserved_tokens=memory.estimate_tokens(draft_prompt)
+        )
+        if earlier_summary:
+            context.append(earlier_summary)
+        prompt = build_prompt(question, context)
+        
+        chat_kwargs = {
+            "message": prompt,
+            "model": self.chat_model,
+            "temperature": self.chat_temperature,
+            "max_tokens": self.chat_max_tokens
+        }
+        if chat_history:
+            chat_kwargs["chat_history"] = chat_history
+        
+        # Answers that depend on earlier turns or on context (the current route,
+        # a summary of dropped turns) are only reused for exactly that input
+        cache_scope = f"{self.chat_model}:{self.chat_temperature}"
+        if chat_history:
+            history_key = json.dumps(chat_history, sort_keys=True).encode()
+            cache_scope += f":{hashlib.sha1(history_key).hexdigest()}"
+        if context:
+            context_key = json.dumps(context).encode()
+            cache_scope += f":ctx-{hashlib.sha1(context_key).hexdigest()}"
+        
+        return ChatRequest(
+            question=question,
+            prompt=prompt,
+            chat_kwargs=chat_kwargs,
+            cache_scope=cache_scope,
+            semantic=RESPONSE_CACHE_SEMANTIC and not chat_history and not context,
+            history=chat_history
+        )
+    
+    def cached_answer(self, request: ChatRequest) -> Optional[str]:
+        """Return a cached answer for the request, if any"""
+        if not self.response_cache:
+            return None
+        answer = self.response_cache.get(
+            request.question, request.prompt, request.cache_scope, semantic=request.semantic
+        )
+        metrics.cache_result("response", answer is not None)
+        return answer
+    
+    def stream_answer(self, request: ChatRequest) -> Iterator[str]:
+        """Yield the answer as it is generated and cache it once complete
+        
+        If an identical request is already streaming, wait for it and yield
+        its full answer in one piece; if that stream is abandoned, take over.
+        """
+        if self.chat_client is None:
+            raise RuntimeError("No chat provider configured")
+        
+        flight_key = f"chat:{request.key}"
+        call, leader = self.flights.join(flight_key)
+        while not leader:
+            try:
+                answer = call.wait()
+            except LeaderCancelled:
+                call, leader = self.flights.join(flight_key)
+                continue
+            yield answer
+            return
+        
+        chunks = []
+        started = time.perf_counter()
+        try:
+            for chunk in stream_chat_text(self.chat_client, **request.chat_kwargs):
+                if not chunks:
+                    metrics.observe(STAGE_SECONDS, time.perf_counter() - started, stage="assistant_first_token")
+                chunks.append(chunk)
+                yield chunk
+        except BaseException as e:
+            # Also covers the consumer abandoning the stream part-way
+            if isinstance(e, Exception):
+                metrics.upstream_error("cohere", e)
+            self.flights.finish(flight_key, call, error=e)
+            raise
+        
+        metrics.observe(STAGE_SECONDS, time.perf_counter() - started, stage="assistant_stream")
+        text = "".join(chunks)
+        self._cache_answer(request, text)
+        self.flights.finish(flight_key, call, result=text)
+    
+    def complete(self, request: ChatRequest) -> str:
+        """Generate the full answer in one call and cache it"""
+        if self.chat_client is None:
+            raise RuntimeError("No chat provider configured")
+        return self.flights.do(f"chat:{request.key}", self._complete, request)
+    
+    def _complete(self, request: ChatRequest) -> str:
+        """Call the chat provider and cache its answer"""
+        try:
+            with metrics.span("assistant_complete"):
+                text = self.chat_client.chat(**request.chat_kwargs).text
+        except Exception as e:
+            metrics.upstream_error("cohere", e)
+            raise
+        self._cache_answer(request, text)
+        return text
+    
+    def ask(self, question: str, history: Optional[List[Dict]] = None,
+            context: Optional[List[str]] = None) -> Tuple[str, bool]:
+        """Answer a question, returning the text and whether it came from cache"""
+        request = self.prepare_chat(question, history, context)
+        cached = self.cached_answer(request)
+        if cached is not None:
+            return cached, True
+        return self.complete(request), False
+    
+    def _cache_answer(self, request: ChatRequest, text: str):
+        """Store a generated answer"""
+        if self.response_cache:
+            self.response_cache.set(request.question, request.prompt, request.cache_scope, text)
@@ -0,0 +1,84 @@
+"""Request coalescing for identical in-flight upstream calls"""
+
+import threading
+from typing import Any, Callable, Dict, Tuple
+
+
+class LeaderCancelled(RuntimeError):
+    """The caller running a call stopped before it finished"""
+
+
+class _Call:
+    """An in-flight call that other callers can wait on"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+    
+    def wait(self) -> Any:
+        self.done.wait()
+        if self.error is not None:
+            raise self.error
+        return self.result
+
+
+class SingleFlight:
+    """Coalesce concurrent identical calls into one upstream request
+    
+    The first caller for a key runs the call; callers arriving while it is
+    in flight wait and share its result or exception. Once finished the key
+    is forgotten, so later calls go upstream (or to a cache) again.
+    
+    A leader stopped by something other than an Exception (a closed
+    generator, KeyboardInterrupt) hands its waiters LeaderCancelled instead,
+    and ``do`` retries them, one becoming the new leader.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[str, _Call] = {}
+    
+    def join(self, key: str) -> Tuple[_Call, bool]:
+        """Return the call for key and whether the caller must run it"""
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                call.waiters += 1
+                return call, False
+            call = self._calls[key] = _Call()
+            return call, True
+    
+    def finish(self, key: str, call: _Call, result: Any = None, error: BaseException = None):
+        """Publish the outcome of a call run by its leader"""
+        with self._lock:
+            if self._calls.get(key) is call:
+                del self._calls[key]
+        # GeneratorExit and the like belong to the leader, not its waiters
+        if error is not None and not isinstance(error, Exception):
+            error = LeaderCancelled("leader cancelled")
+        call.result = result
+        call.error = error
+        call.done.set()
+    
+    def do(self, key: str, fn: Callable, *args, **kwargs) -> Any:
+        """Run fn once for all concurrent callers with the same key"""
+        call, leader = self.join(key)
+        while not leader:
+            try:
+                return call.wait()
+            except LeaderCancelled:
+                call, leader = self.join(key)
+        
+        try:
+            result = fn(*args, **kwargs)
+        except BaseException as e:
+            self.finish(key, call, error=e)
+            raise
+        self.finish(key, call, result=result)
+        return result
+
+
+# Shared by every service in the process unless one is given explicitly
+shared_flights = SingleFlight()
@@ -0,0 +1,99 @@
+"""Type-ahead suggestions for place names the app has already resolved"""
+
+import threading
+from bisect import bisect_left, insort
+from typing import Optional, Tuple, List, Dict
+
+from .gazetteer import fold_name
+
+Coords = Tuple[float, float]
+
+
+class PlaceSuggester:
+    """Sorted-array prefix index over place names, weighted by use
+    
+    Every word start of a name is indexed, so "mumbai" suggests both
+    "Mumbai Central" and "Gateway of India, Mumbai". Matches on the start of
+    the whole name rank first, then by accumulated weight. Lookups are a
+    binary search plus a scan bounded by ``max_scan``, so they stay fast as
+    the vocabulary grows.
+    """
+    
+    def __init__(self, max_scan: int = 500):
+        self.max_scan = max_scan
+        # (folded word start, place id), kept sorted
+        self._keys: List[Tuple[str, int]] = []
+        self._ids: Dict[str, int] = {}
+        self._folded: List[str] = []
+        self._names: List[str] = []
+        self._coords: List[Optional[Coords]] = []
+        self._weights: List[float] = []
+        self._lock = threading.Lock()
+    
+    def __len__(self) -> int:
+        return len(self._names)
+    
+    def add(self, name: str, coords: Optional[Coords] = None, weight: float = 1.0):
+        """Add a place, or add weight to it if it is already known"""
+        key = fold_name(name)
+        if not key:
+            return
+        with self._lock:
+            place = self._ids.get(key)
+            if place is not None:
+                self._weights[place] += weight
+                if coords:
+                    self._coords[place] = coords
+                return
+            
+            place = len(self._names)
+            self._ids[key] = place
+            self._folded.append(key)
+            self._names.append(name.strip())
+            self._coords.append(coords)
+            self._weights.append(weight)
+            words = key.split(" ")
+            for i in range(len(words)):
+                insort(self._keys, (" ".join(words[i:]), place))
+    
+    def lookup(self, name: str) -> Optional[Coords]:
+        """Coordinates of a known place, if they were recorded"""
+        place = self._ids.get(fold_name(name))
+        return None if place is None else self._coords[place]
+    
+    def suggest(self, text: str, limit: int = 5) -> List[Dict]:
+        """Known places with a word starting with the text, best first"""
+        key = fold_name(text)
+        if not key:
+            return []
+        
+        with self._lock:
+            best = {}
+            start = bisect_left(self._keys, (key,))
+            for i in range(start, min(start + self.max_scan, len(self._keys))):
+                word_start, place = self._keys[i]
+                if not word_start.startswith(key):
+                    break
+                whole = len(word_start) == len(self._folded[place])
+                best[place] = max(best.get(place, False), whole)
+            
+            ranked = sorted(best, key=lambda p: (best[p], self._weights[p]), reverse=True)
+            return [
+                {"name": self._names[p], "coords": self._coords[p], "weight": self._weights[p]}
+                for p in ranked[:limit]
+            ]
+
+
+def merge_suggestions(*groups: List[Dict], limit: int = 5) -> List[Dict]:
+    """Concatenate suggestion lists in priority order, dropping repeated places"""
+    merged, seen = [], set()
+    for group in groups:
+        for place in group:
+            key = fold_name(place["name"])
+            if key in seen:
+                continue
+            seen.add(key)
+            merged.append(place)
+            if len(merged) == limit:
+                return merged
+    return merged
@@ -0,0 +1,195 @@
+"""Current weather along a route, batched and cached by geohash cell
+
+Providers expose ``current_many(points)`` returning one observation per
+(lat, lon) point: ``{"temperature_c", "humidity_pct", "wind_kmh",
+"condition"}``. ``OpenMeteoWeather`` needs no API key; ``StubWeather`` is
+deterministic and offline, for development and tests.
+
+``WeatherService`` snaps every point to a geohash cell and caches results
+per cell and time bucket, so nearby samples and repeated renders share one
+observation and only cells missing from the cache go upstream, batched.
+"""
+
+import json
+import math
+import os
+import time
+from typing import TYPE_CHECKING, Optional, Tuple, List, Dict
+
+import numpy as np
+
+from .cache import PersistentCache
+from .clients import pooled_adapter
+from .config import (
+    CACHE_DIR,
+    HTTP_TIMEOUT,
+    WEATHER_BATCH_SIZE,
+    WEATHER_BUCKET_SECONDS,
+    WEATHER_GEOHASH_PRECISION,
+    WEATHER_PROVIDER,
+)
+from .geometry import geohash_cell
+from .metrics import metrics
+
+if TYPE_CHECKING:
+    import requests
+
+Coords = Tuple[float, float]
+
+# WMO weather interpretation codes used by Open-Meteo
+WMO_CONDITIONS = {
+    0: "Clear", 1: "Mainly clear", 2: "Partly cloudy", 3: "Overcast",
+    45: "Fog", 48: "Rime fog",
+    51: "Light drizzle", 53: "Drizzle", 55: "Heavy drizzle",
+    56: "Freezing drizzle", 57: "Freezing drizzle",
+    61: "Light rain", 63: "Rain", 65: "Heavy rain",
+    66: "Freezing rain", 67: "Freezing rain",
+    71: "Light snow", 73: "Snow", 75: "Heavy snow", 77: "Snow grains",
+    80: "Rain showers", 81: "Rain showers", 82: "Violent rain showers",
+    85: "Snow showers", 86: "Snow showers",
+    95: "Thunderstorm", 96: "Thunderstorm with hail", 99: "Thunderstorm with hail",
+}
+
+
+def sample_along(points: np.ndarray, count: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Evenly spaced (lat, lon) samples along a polyline and their distance from the start in km"""
+    if len(points) == 0:
+        return np.empty((0, 2)), np.empty(0)
+    # Equirectangular segment lengths are accurate enough for spacing samples
+    lat = np.radians(points[:, 0])
+    dlat = np.diff(lat)
+    dlon = np.diff(np.radians(points[:, 1])) * np.cos((lat[1:] + lat[:-1]) / 2)
+    cumulative = np.concatenate([[0.0], np.cumsum(np.hypot(dlat, dlon) * 6371.0)])
+    
+    targets = np.linspace(0, cumulative[-1], max(count, 1))
+    samples = np.column_stack([
+        np.interp(targets, cumulative, points[:, 0]),
+        np.interp(targets, cumulative, points[:, 1])
+    ])
+    return samples, targets
+
+
+class OpenMeteoWeather:
+    """Current conditions from the Open-Meteo forecast API, many points per request"""
+    
+    URL = "https://api.open-meteo.com/v1/forecast"
+    
+    def __init__(self, session: Optional["requests.Session"] = None, timeout: float = HTTP_TIMEOUT):
+        if session is None:
+            import requests
+            
+            session = requests.Session()
+            session.mount("https://", pooled_adapter())
+        self.session = session
+        self.timeout = timeout
+    
+    def current_many(self, points: List[Coords]) -> List[Dict]:
+        """Current weather at each point, in one upstream request"""
+        response = self.session.get(self.URL, params={
+            "latitude": ",".join(f"{lat:.4f}" for lat, _ in points),
+            "longitude": ",".join(f"{lon:.4f}" for _, lon in points),
+            "current": "temperature_2m,relative_humidity_2m,weather_code,wind_speed_10m",
+        }, timeout=self.timeout)
+        response.raise_for_status()
+        data = response.json()
+        # A single location comes back as an object, several as a list
+        locations = data if isinstance(data, list) else [data]
+        return [
+            {
+                "temperature_c": current["temperature_2m"],
+                "humidity_pct": current["relative_humidity_2m"],
+                "wind_kmh": current["wind_speed_10m"],
+                "condition": WMO_CONDITIONS.get(current["weather_code"], "Unknown")
+            }
+            for current in (location["current"] for location in locations)
+        ]
+
+
+class StubWeather:
+    """Deterministic offline weather that varies smoothly with position and time"""
+    
+    def __init__(self):
+        self.calls = 0
+    
+    def current_many(self, points: List[Coords]) -> List[Dict]:
+        """Synthetic current weather at each point"""
+        self.calls += 1
+        hour = time.time() / 3600
+        results = []
+        for lat, lon in points:
+            temperature = 30 - abs(lat) * 0.4 + 4 * math.sin(hour * math.pi / 12 + lon / 30)
+            results.append({
+                "temperature_c": round(temperature, 1),
+                "humidity_pct": round(60 + 20 * math.sin(lat + lon)),
+                "wind_kmh": round(10 + 5 * math.cos(lat * lon), 1),
+                "condition": ("Clear", "Partly cloudy", "Overcast", "Light rain")[int(abs(lat * 7 + lon * 3)) % 4]
+            })
+        return results
+
+
+class WeatherService:
+    """Weather lookups cached per geohash cell and time bucket"""
+    
+    def __init__(self, provider, cache: Optional[PersistentCache] = None,
+                 precision: int = WEATHER_GEOHASH_PRECISION,
+                 bucket_seconds: float = WEATHER_BUCKET_SECONDS,
+                 batch_size: int = WEATHER_BATCH_SIZE):
+        self.provider = provider
+        self.cache = cache
+        self.precision = precision
+        self.bucket_seconds = bucket_seconds
+        self.batch_size = batch_size
+    
+    def lookup(self, points: List[Coords]) -> List[Dict]:
+        """Weather for each point; cells missing from the cache are fetched in batches"""
+        bucket = int(time.time() // self.bucket_seconds)
+        cells = [geohash_cell(lat, lon, self.precision) for lat, lon in points]
+        
+        found = {}
+        missing = {}
+        for cell, center in cells:
+            if cell in found or cell in missing:
+                continue
+            value = self.cache.get(f"{cell}:{bucket}") if self.cache else None
+            metrics.cache_result("weather", value is not None)
+            if value is not None:
+                found[cell] = json.loads(value)
+            else:
+                missing[cell] = center
+        
+        # Cell centres stand in for every point inside the cell
+        pending = list(missing.items())
+        for start in range(0, len(pending), self.batch_size):
+            batch = pending[start:start + self.batch_size]
+            try:
+                with metrics.span("weather_upstream"):
+                    results = self.provider.current_many([center for _, center in batch])
+            except Exception as e:
+                metrics.upstream_error("weather", e)
+                raise
+            for (cell, _), result in zip(batch, results):
+                found[cell] = result
+                if self.cache:
+                    # Expire with the bucket, so a new bucket always gets fresh data
+                    self.cache.set(f"{cell}:{bucket}", json.dumps(result).encode(), self.bucket_seconds)
+        
+        return [found[cell] for cell, _ in cells]
+    
+    def along_route(self, points: np.ndarray, samples: int) -> List[Dict]:
+        """Weather at evenly spaced points of an (N, 2) lat/lon route, with distance_km"""
+        sample_points, distances = sample_along(points, samples)
+        weather = self.lookup([tuple(p) for p in sample_points.tolist()])
+        return [
+            {**result, "lat": lat, "lon": lon, "distance_km": float(distance)}
+            for result, (lat, lon), distance in zip(weather, sample_points.tolist(), distances)
+        ]
+
+
+def open_weather_service(provider_name: str = WEATHER_PROVIDER,
+                         cache_dir: str = CACHE_DIR) -> WeatherService:
+    """Weather service for the configured provider, cached in the shared cache directory"""
+    providers = {"open-meteo": OpenMeteoWeather, "stub": StubWeather}
+    if provider_name not in providers:
+        raise ValueError(f"Unknown weather provider {provider_name!r}; expected one of {', '.join(providers)}")
+    cache = PersistentCache(os.path.join(cache_dir, "weather.sqlite3"), table="weather", max_entries=20000)
+    return WeatherService(providers[provider_name](), cache)